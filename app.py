@@ -1,639 +1,3152 @@
-import oracledb
-from flask import Flask, jsonify, render_template, request, send_file
+from flask import Flask, Response, g, jsonify, request, send_file
 import sys
+import argparse
 import traceback
-import barcode
-from barcode.writer import ImageWriter
 import os
 import re
-import pandas as pd
+import io
+import json
+import csv
+import hashlib
+import gzip
+import bisect
+import uuid
+import importlib.util
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from apscheduler.schedulers.background import BackgroundScheduler
 import random
-import xgboost as xgb
+import math
+import queue
+import threading
+import time
+import atexit
+import functools
+import contextlib
+import contextvars
 
-app = Flask(__name__)
+# pandas/numpy/xgboost/openpyxl/barcode/oracledb/apscheduler 는 쓰는 함수 안에서 불러옴 (import 시간 단축)
+# 앱은 create_app() 으로 만들고, 라우트는 blueprints/ 의 모듈별 블루프린트 (inventory, sales, barcodes, restock, ops)
 
-# 최근 구매한 상품을 저장할 리스트
-recent_purchases = []
+# 바코드 이미지 캐시 설정
+BARCODE_DIR = os.path.join('static', 'barcodes')
+BARCODE_CACHE_SIZE = int(os.environ.get('BARCODE_CACHE_SIZE', 1024))  # 메모리에 보관할 이미지 수
+BARCODE_WORKERS = int(os.environ.get('BARCODE_WORKERS', os.cpu_count() or 2))  # 일괄 렌더링 프로세스 수
+BARCODE_FORMATS = {'png': 'image/png', 'svg': 'image/svg+xml'}
+
+# (바코드 번호, 형식) -> (이미지 바이트, ETag) LRU 캐시
+barcode_cache = OrderedDict()
+barcode_cache_lock = threading.Lock()
+barcode_process_pool = None
+
+def is_valid_ean13(barcode_number):
+    # EAN-13 은 12자리(체크디지트 자동 계산) 또는 13자리 숫자
+    return bool(barcode_number) and re.fullmatch(r'\d{12,13}', barcode_number) is not None
+
+def render_barcode_bytes(barcode_number, fmt='png'):
+    # 프로세스 풀에서도 호출되므로 전역 상태를 건드리지 않음
+    import barcode
+    from barcode.writer import ImageWriter, SVGWriter
+    writer = SVGWriter() if fmt == 'svg' else ImageWriter()
+    buffer = io.BytesIO()
+    barcode.get("ean13", barcode_number, writer=writer).write(buffer)
+    return buffer.getvalue()
+
+def barcode_file_path(barcode_number, fmt='png'):
+    return os.path.join(BARCODE_DIR, f'{barcode_number}.{fmt}')
+
+def store_barcode_image(barcode_number, fmt, data):
+    # 디스크에 저장하고 LRU 캐시에 넣음 (같은 이름의 임시 파일을 거쳐 교체)
+    path = barcode_file_path(barcode_number, fmt)
+    if not os.path.exists(path):
+        os.makedirs(BARCODE_DIR, exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    etag = hashlib.sha1(data).hexdigest()
+    with barcode_cache_lock:
+        barcode_cache[(barcode_number, fmt)] = (data, etag)
+        barcode_cache.move_to_end((barcode_number, fmt))
+        while len(barcode_cache) > BARCODE_CACHE_SIZE:
+            barcode_cache.popitem(last=False)
+    return data, etag
+
+def get_barcode_image(barcode_number, fmt='png'):
+    # 메모리 캐시 -> 디스크 -> 새로 렌더링 순서로 이미지를 찾음
+    key = (barcode_number, fmt)
+    with barcode_cache_lock:
+        cached = barcode_cache.get(key)
+        if cached:
+            barcode_cache.move_to_end(key)
+            return cached
+
+    path = barcode_file_path(barcode_number, fmt)
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            data = f.read()
+    else:
+        data = render_barcode_bytes(barcode_number, fmt)
+    return store_barcode_image(barcode_number, fmt, data)
+
+def get_barcode_process_pool():
+    global barcode_process_pool
+    with barcode_cache_lock:
+        if barcode_process_pool is None:
+            barcode_process_pool = ProcessPoolExecutor(max_workers=BARCODE_WORKERS)
+    return barcode_process_pool
+
+def render_barcode_batch(barcode_numbers, fmt='png'):
+    # 캐시에 없는 바코드만 프로세스 풀에서 한꺼번에 렌더링
+    results = []
+    missing = []
+    for barcode_number in dict.fromkeys(barcode_numbers):
+        if not is_valid_ean13(barcode_number):
+            results.append({'barcode': barcode_number, 'error': 'EAN-13 바코드는 12~13자리 숫자여야 합니다.'})
+        elif (barcode_number, fmt) in barcode_cache or os.path.exists(barcode_file_path(barcode_number, fmt)):
+            _, etag = get_barcode_image(barcode_number, fmt)
+            results.append({'barcode': barcode_number, 'url': f'/static/barcodes/{barcode_number}.{fmt}', 'etag': etag})
+        else:
+            missing.append(barcode_number)
+
+    if missing:
+        pool = get_barcode_process_pool()
+        rendered = pool.map(render_barcode_bytes, missing, [fmt] * len(missing), chunksize=16)
+        for barcode_number, data in zip(missing, rendered):
+            _, etag = store_barcode_image(barcode_number, fmt, data)
+            results.append({'barcode': barcode_number, 'url': f'/static/barcodes/{barcode_number}.{fmt}', 'etag': etag})
+    return results
 
 def generate_barcode_image(barcode_number):
     try:
-        # 바코드 객체 생성 + 이미지 저장 옵션
-        ean = barcode.get("ean13", barcode_number, writer=ImageWriter())
-        
-        # 바코드 이미지로 저장
-        filename = ean.save(os.path.join('static', 'barcodes', barcode_number))
-        return f'/static/barcodes/{barcode_number}.png'
-    except Exception as e:
-        print(f"바코드 생성 오류: {str(e)}")
-        raise
+        # 캐시에 없을 때만 바코드 이미지 생성 + 저장
+        get_barcode_image(barcode_number, 'png')
+        return f'/static/barcodes/{barcode_number}.png'
+    except Exception as e:
+        print(f"바코드 생성 오류: {str(e)}")
+        raise
+
+# 백그라운드 작업 (작업 ID 로 진행 상태 조회)
+MAX_FINISHED_JOBS = 100
+background_jobs = OrderedDict()
+jobs_lock = threading.Lock()
+job_executor = ThreadPoolExecutor(max_workers=int(os.environ.get('JOB_WORKERS', 2)))
+
+def start_background_job(kind, func, *args):
+    # 작업은 요청한 매장의 DB/상태에서 실행
+    job_id = uuid.uuid4().hex
+    store_id = get_current_store_id()
+    with jobs_lock:
+        background_jobs[job_id] = {
+            'id': job_id,
+            'kind': kind,
+            'store_id': store_id,
+            'status': 'running',
+            'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'finished_at': None,
+            'result': None,
+            'error': None,
+            'collected': False  # 결과 파일을 받아 갔는지 (내보내기 파일 정리 기준)
+        }
+
+    def run():
+        try:
+            with store_context(store_id):
+                result = func(*args)
+            status, error = 'done', None
+        except Exception as e:
+            print(f"백그라운드 작업 오류 ({kind}): {str(e)}")
+            print(traceback.format_exc())
+            result, status, error = None, 'failed', str(e)
+        with jobs_lock:
+            background_jobs[job_id].update({
+                'status': status,
+                'result': result,
+                'error': error,
+                'finished_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            })
+            # 오래된 완료 작업 정리
+            finished = [key for key, job in background_jobs.items() if job['status'] != 'running']
+            for key in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+                del background_jobs[key]
+
+    job_executor.submit(run)
+    return job_id
+
+def get_background_job(job_id):
+    with jobs_lock:
+        job = background_jobs.get(job_id)
+        return dict(job) if job else None
+
+def get_pending_job_files(kind):
+    # 끝났지만 결과 파일을 아직 받아 가지 않은 작업의 파일 이름
+    with jobs_lock:
+        return {
+            job['result']['file'] for job in background_jobs.values()
+            if job['kind'] == kind and job['result'] and not job['collected']
+        }
+
+def mark_job_file_collected(kind, filename):
+    with jobs_lock:
+        for job in background_jobs.values():
+            if job['kind'] == kind and job['result'] and job['result'].get('file') == filename:
+                job['collected'] = True
+
+# 실시간 이벤트 (SSE 로 모든 대시보드에 변경분만 전달)
+EVENT_HISTORY_SIZE = 500  # 재접속(Last-Event-ID) 시 다시 보내줄 최근 이벤트 수
+EVENT_QUEUE_SIZE = 1000  # 구독자별 대기 이벤트 한도 (넘치면 연결을 끊고 재접속하게 함)
+EVENT_HEARTBEAT_SECONDS = 15
+
+event_lock = threading.Lock()
+event_subscribers = {}  # 구독자 대기열 -> 매장 ID (그 매장의 이벤트만 받음)
+event_history = deque(maxlen=EVENT_HISTORY_SIZE)
+event_seq = 0
+
+def publish_event(event_type, data):
+    global event_seq
+    store_id = get_current_store_id()
+    with event_lock:
+        event_seq += 1
+        event = {'id': event_seq, 'type': event_type, 'store_id': store_id, 'data': data}
+        event_history.append(event)
+        for subscriber, subscriber_store_id in list(event_subscribers.items()):
+            if subscriber_store_id != store_id:
+                continue
+            try:
+                subscriber.put_nowait(event)
+            except queue.Full:
+                # 느린 구독자: 대기열을 비우고 종료 신호(None)를 넣음
+                event_subscribers.pop(subscriber, None)
+                while not subscriber.empty():
+                    subscriber.get_nowait()
+                subscriber.put_nowait(None)
+    return event
+
+def subscribe_events(last_event_id=None):
+    # 현재 매장의 이벤트만 구독 (이벤트 ID 는 매장 공통 순번이라 재접속 기준으로 그대로 사용)
+    store_id = get_current_store_id()
+    subscriber = queue.Queue(maxsize=EVENT_QUEUE_SIZE)
+    with event_lock:
+        backlog = [event for event in event_history
+                   if event['store_id'] == store_id and event['id'] > last_event_id] if last_event_id is not None else []
+        event_subscribers[subscriber] = store_id
+    return subscriber, backlog
+
+def unsubscribe_events(subscriber):
+    with event_lock:
+        event_subscribers.pop(subscriber, None)
+
+def format_sse(event):
+    data = json.dumps(event['data'], ensure_ascii=False, default=str)
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {data}\n\n"
+
+# 운영 지표 (Prometheus 텍스트 형식으로 /metrics 에서 제공)
+METRICS_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)  # 초
+METRICS_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)  # 요청당 쿼리 수 (N+1 패턴 확인용)
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', 200))  # 이보다 오래 걸린 쿼리는 SQL 과 함께 로그
+
+metrics_lock = threading.Lock()
+# 이름 -> {'type', 'help', 'buckets', 'series': {라벨 튜플: 값}}
+metrics = OrderedDict()
+request_db_stats = threading.local()  # 현재 스레드에서 처리 중인 요청의 DB 사용량
+
+def define_metric(name, metric_type, help_text, buckets=None):
+    metrics[name] = {'type': metric_type, 'help': help_text, 'buckets': buckets, 'series': {}}
+
+define_metric('http_requests_total', 'counter', 'HTTP requests by endpoint, method and status')
+define_metric('http_request_duration_seconds', 'histogram', 'HTTP request latency', METRICS_LATENCY_BUCKETS)
+define_metric('http_request_db_queries', 'histogram', 'DB queries executed per HTTP request', METRICS_COUNT_BUCKETS)
+define_metric('http_request_db_seconds', 'histogram', 'Time spent in DB calls per HTTP request', METRICS_LATENCY_BUCKETS)
+define_metric('db_query_duration_seconds', 'histogram', 'DB execute/executemany latency by statement type', METRICS_LATENCY_BUCKETS)
+define_metric('db_rows_fetched_total', 'counter', 'Rows fetched from DB cursors by endpoint')
+define_metric('db_slow_queries_total', 'counter', f'DB calls slower than {SLOW_QUERY_MS:g}ms by statement type')
+define_metric('db_pool_wait_seconds', 'histogram', 'Time spent waiting for a pooled connection', METRICS_LATENCY_BUCKETS)
+define_metric('db_pool_timeouts_total', 'counter', 'Pool acquires that timed out')
+define_metric('scheduler_job_duration_seconds', 'histogram', 'Scheduled job run time by job and outcome', METRICS_LATENCY_BUCKETS)
+define_metric('scheduler_job_last_run_timestamp_seconds', 'gauge', 'Unix time when the job last finished, by job and outcome')
+define_metric('scheduler_job_skipped_total', 'counter', 'Scheduled runs skipped because another worker holds or already ran the job')
+
+def increment_metric(name, labels, amount=1):
+    with metrics_lock:
+        series = metrics[name]['series']
+        series[labels] = series.get(labels, 0) + amount
+
+def set_metric(name, labels, value):
+    with metrics_lock:
+        metrics[name]['series'][labels] = value
+
+def observe_metric(name, labels, value):
+    # 히스토그램: 버킷별 누적 개수 + 합계 + 개수
+    with metrics_lock:
+        metric = metrics[name]
+        series = metric['series'].get(labels)
+        if series is None:
+            series = metric['series'][labels] = {'buckets': [0] * len(metric['buckets']), 'sum': 0.0, 'count': 0}
+        index = bisect.bisect_left(metric['buckets'], value)
+        if index < len(series['buckets']):
+            series['buckets'][index] += 1
+        series['sum'] += value
+        series['count'] += 1
+
+def format_metric_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+METRIC_LABEL_NAMES = {
+    'http_requests_total': ('endpoint', 'method', 'status'),
+    'http_request_duration_seconds': ('endpoint', 'method'),
+    'http_request_db_queries': ('endpoint',),
+    'http_request_db_seconds': ('endpoint',),
+    'db_query_duration_seconds': ('statement',),
+    'db_rows_fetched_total': ('endpoint',),
+    'db_slow_queries_total': ('statement',),
+    'db_pool_wait_seconds': (),
+    'db_pool_timeouts_total': (),
+    'scheduler_job_duration_seconds': ('job', 'outcome'),
+    'scheduler_job_last_run_timestamp_seconds': ('job', 'outcome'),
+    'scheduler_job_skipped_total': ('job',)
+}
+
+def render_metrics():
+    lines = []
+    with metrics_lock:
+        for name, metric in metrics.items():
+            label_names = METRIC_LABEL_NAMES[name]
+            lines.append(f"# HELP {name} {metric['help']}")
+            lines.append(f"# TYPE {name} {metric['type']}")
+            for labels, value in sorted(metric['series'].items()):
+                if metric['type'] != 'histogram':
+                    lines.append(f"{name}{format_metric_labels(label_names, labels)} {value:g}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(metric['buckets'], value['buckets']):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{format_metric_labels(label_names, labels, [('le', f'{bound:g}')])} {cumulative}")
+                lines.append(f"{name}_bucket{format_metric_labels(label_names, labels, [('le', '+Inf')])} {value['count']}")
+                lines.append(f"{name}_sum{format_metric_labels(label_names, labels)} {value['sum']:.6f}")
+                lines.append(f"{name}_count{format_metric_labels(label_names, labels)} {value['count']}")
+    return '\n'.join(lines) + '\n'
+
+def current_metrics_endpoint():
+    return getattr(request_db_stats, 'endpoint', None) or 'background'
+
+def record_db_call(sql, seconds):
+    statement = sql.lstrip().split(None, 1)[0].upper() if sql and sql.strip() else 'UNKNOWN'
+    observe_metric('db_query_duration_seconds', (statement,), seconds)
+    stats = getattr(request_db_stats, 'stats', None)
+    if stats is not None:
+        stats['queries'] += 1
+        stats['seconds'] += seconds
+    if seconds * 1000 >= SLOW_QUERY_MS:
+        increment_metric('db_slow_queries_total', (statement,))
+        print(f"느린 쿼리 ({seconds * 1000:.1f}ms, {current_metrics_endpoint()}): {' '.join(sql.split())}")
+
+def record_rows_fetched(count):
+    if count:
+        increment_metric('db_rows_fetched_total', (current_metrics_endpoint(),), count)
+
+class InstrumentedCursor:
+    # 실행 시간/가져온 행 수를 기록하는 커서 래퍼 (나머지 속성은 원래 커서로 전달)
+    def __init__(self, cursor):
+        object.__setattr__(self, '_cursor', cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._cursor, name, value)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self._cursor.close()
+
+    def _timed(self, method, statement, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(statement, *args, **kwargs)
+        finally:
+            record_db_call(statement if isinstance(statement, str) else '', time.perf_counter() - start)
+
+    def execute(self, statement, *args, **kwargs):
+        self._timed(self._cursor.execute, statement, *args, **kwargs)
+        return self if self._cursor.description else None
+
+    def executemany(self, statement, *args, **kwargs):
+        return self._timed(self._cursor.executemany, statement, *args, **kwargs)
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        record_rows_fetched(1 if row is not None else 0)
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        rows = self._cursor.fetchmany(*args, **kwargs)
+        record_rows_fetched(len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        record_rows_fetched(len(rows))
+        return rows
+
+    def __iter__(self):
+        # 행마다 기록하지 않고 arraysize 단위로 모아서 기록
+        while True:
+            rows = self.fetchmany()
+            if not rows:
+                return
+            yield from rows
+
+class InstrumentedConnection:
+    def __init__(self, conn):
+        object.__setattr__(self, '_conn', conn)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._conn, name, value)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self._conn.close()
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self._conn.cursor(*args, **kwargs))
+
+def timed_job(func):
+    # 스케줄러 작업 실행 시간/결과 기록
+    @functools.wraps(func)
+    def run(*args, **kwargs):
+        request_db_stats.endpoint = f'job:{func.__name__}'
+        start = time.perf_counter()
+        outcome = 'error'
+        try:
+            result = func(*args, **kwargs)
+            outcome = 'success'
+            return result
+        finally:
+            observe_metric('scheduler_job_duration_seconds', (func.__name__, outcome), time.perf_counter() - start)
+            set_metric('scheduler_job_last_run_timestamp_seconds', (func.__name__, outcome), time.time())
+            request_db_stats.endpoint = None
+    return run
+
+def start_request_metrics():
+    request_db_stats.endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    request_db_stats.stats = {'queries': 0, 'seconds': 0.0}
+    request_db_stats.started = time.perf_counter()
+
+def record_request_metrics(response):
+    started = getattr(request_db_stats, 'started', None)
+    if started is None:
+        return response
+    endpoint = request_db_stats.endpoint
+    stats = request_db_stats.stats
+    observe_metric('http_request_duration_seconds', (endpoint, request.method), time.perf_counter() - started)
+    increment_metric('http_requests_total', (endpoint, request.method, str(response.status_code)))
+    observe_metric('http_request_db_queries', (endpoint,), stats['queries'])
+    observe_metric('http_request_db_seconds', (endpoint,), stats['seconds'])
+    request_db_stats.started = None
+    return response
+
+def clear_request_metrics(error=None):
+    # 처리되지 않은 예외로 after_request 가 건너뛰어진 경우도 500 으로 기록
+    if getattr(request_db_stats, 'started', None) is not None:
+        endpoint = request_db_stats.endpoint
+        observe_metric('http_request_duration_seconds', (endpoint, request.method), time.perf_counter() - request_db_stats.started)
+        increment_metric('http_requests_total', (endpoint, request.method, '500'))
+        request_db_stats.started = None
+    request_db_stats.stats = None
+
+# DB 접속 정보 및 커넥션 풀 설정 (환경변수로 변경 가능)
+DB_USER = os.environ.get('DB_USER', 'system')
+DB_PASSWORD = os.environ.get('DB_PASSWORD', 'oradb1')
+DB_DSN = os.environ.get('DB_DSN', 'localhost/xe')
+DB_BACKEND = os.environ.get('DB_BACKEND', 'oracle')  # oracle | sqlite (sqlite: Oracle 없이 개발/벤치마크용)
+SQLITE_PATH = os.environ.get('SQLITE_PATH', os.path.join('bench', 'smart_store.db'))
+POOL_MIN = int(os.environ.get('DB_POOL_MIN', 2))                    # 최소 연결 수
+POOL_MAX = int(os.environ.get('DB_POOL_MAX', 10))                   # 최대 연결 수
+POOL_INCREMENT = int(os.environ.get('DB_POOL_INCREMENT', 1))        # 부족할 때 한 번에 늘릴 연결 수
+POOL_STMT_CACHE = int(os.environ.get('DB_STMT_CACHE', 40))          # 연결당 SQL 문장 캐시 크기
+POOL_WAIT_TIMEOUT = int(os.environ.get('DB_POOL_WAIT_TIMEOUT', 5000))  # 연결 대기 제한 시간(ms)
+
+# 매장 (매장마다 DB/스키마를 따로 두고, 요청/작업마다 현재 매장의 풀로 연결)
+# STORES_CONFIG: JSON 문자열 또는 JSON 파일 경로, {"매장 ID": {"user", "password", "dsn", "schema", "sqlite_path"}}
+# 빠진 값은 위 DB_* 설정을 사용하고, 설정이 없으면 기본 매장 하나만 둠 (기존 단일 매장과 같음)
+STORES_CONFIG = os.environ.get('STORES_CONFIG', '')
+STORE_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,50}$')  # 파일/잠금 이름에도 쓰이므로 제한
+SCHEMA_NAME_PATTERN = re.compile(r'^[A-Za-z][A-Za-z0-9_$#]{0,127}$')
+CHAIN_WORKERS = int(os.environ.get('CHAIN_WORKERS', os.cpu_count() or 4))  # 전 매장 집계 요청(/api/chain/*)을 동시에 돌릴 스레드 수
+
+def store_sqlite_path(store_id, default_store_id):
+    # 기본 매장은 SQLITE_PATH, 다른 매장은 같은 디렉토리의 <이름>_<매장 ID>.db
+    if store_id == default_store_id:
+        return SQLITE_PATH
+    root, ext = os.path.splitext(SQLITE_PATH)
+    return f'{root}_{store_id}{ext or ".db"}'
+
+def load_store_configs(value, default_store_id=None):
+    # 반환: (매장 ID -> 접속 설정, 기본 매장 ID) - 잘못된 설정이면 ValueError
+    if value and not value.lstrip().startswith('{'):
+        with open(value, encoding='utf-8') as f:
+            value = f.read()
+    configs = json.loads(value) if value else {default_store_id or 'main': {}}
+    if not isinstance(configs, dict) or not configs:
+        raise ValueError('STORES_CONFIG 는 매장 ID -> 접속 설정 객체여야 합니다.')
+    default_store_id = default_store_id or next(iter(configs))
+    if default_store_id not in configs:
+        raise ValueError(f'DEFAULT_STORE_ID 가 STORES_CONFIG 에 없습니다: {default_store_id}')
+    stores = OrderedDict()
+    for store_id, config in configs.items():
+        config = config or {}
+        if not STORE_ID_PATTERN.match(store_id):
+            raise ValueError(f'잘못된 매장 ID: {store_id}')
+        if config.get('schema') and not SCHEMA_NAME_PATTERN.match(config['schema']):
+            raise ValueError(f'잘못된 스키마 이름 ({store_id}): {config["schema"]}')
+        stores[store_id] = {
+            'user': config.get('user', DB_USER),
+            'password': config.get('password', DB_PASSWORD),
+            'dsn': config.get('dsn', DB_DSN),
+            'schema': config.get('schema'),  # 같은 DB 의 매장별 스키마 (연결마다 CURRENT_SCHEMA 로 지정)
+            'sqlite_path': config.get('sqlite_path') or store_sqlite_path(store_id, default_store_id)
+        }
+    return stores, default_store_id
+
+STORES, DEFAULT_STORE_ID = load_store_configs(STORES_CONFIG, os.environ.get('DEFAULT_STORE_ID'))
+
+# 현재 매장 (요청 훅/백그라운드 작업/스케줄러가 지정, asyncio 태스크와 스레드마다 따로 유지됨)
+current_store_id = contextvars.ContextVar('current_store_id', default=DEFAULT_STORE_ID)
+
+def get_current_store_id():
+    return current_store_id.get()
+
+def get_store_ids():
+    return list(STORES)
+
+@contextlib.contextmanager
+def store_context(store_id):
+    if store_id not in STORES:
+        raise KeyError(f'알 수 없는 매장: {store_id}')
+    token = current_store_id.set(store_id)
+    try:
+        yield store_id
+    finally:
+        current_store_id.reset(token)
+
+def store_path(base, store_id=None):
+    # 매장별 파일 경로 (기본 매장은 기존 경로 그대로, 다른 매장은 매장 ID 하위 디렉토리)
+    store_id = store_id or get_current_store_id()
+    return base if store_id == DEFAULT_STORE_ID else os.path.join(base, store_id)
+
+def store_url(path, store_id=None):
+    # 다른 매장의 결과를 가리키는 URL 에는 store_id 를 붙임
+    store_id = store_id or get_current_store_id()
+    return path if store_id == DEFAULT_STORE_ID else f'{path}?store_id={store_id}'
+
+class StoreLocal:
+    # 매장마다 따로 두는 메모리 상태 (처음 접근할 때 factory() 로 생성)
+    def __init__(self, factory):
+        self.factory = factory
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def get(self, store_id=None):
+        store_id = store_id or get_current_store_id()
+        value = self.values.get(store_id)
+        if value is None:
+            with self.lock:
+                value = self.values.get(store_id)
+                if value is None:
+                    value = self.values[store_id] = self.factory()
+        return value
+
+# 전 매장 요청 (매장별 조회는 DB 대기가 대부분이라 스레드 풀로 동시에 보내고 부분 결과를 합침)
+# 오래 걸리는 스케줄러 작업이 풀을 차지하지 않도록 요청 경로 전용 (스케줄러는 each_store_in_turn 사용)
+chain_executor = ThreadPoolExecutor(max_workers=CHAIN_WORKERS, thread_name_prefix='chain')
+chain_worker = threading.local()  # active: chain_executor 에서 func 를 실행 중인 스레드
+
+def map_stores(func, store_ids=None):
+    # 매장마다 store_context 안에서 func(store_id) 를 실행해 {매장 ID: 결과} 반환 (오류는 그대로 전달)
+    def run(store_id):
+        chain_worker.active = True
+        try:
+            with store_context(store_id):
+                return func(store_id)
+        finally:
+            chain_worker.active = False
+    store_ids = list(store_ids or STORES)
+    if getattr(chain_worker, 'active', False):
+        # 풀 안에서 다시 풀에 넣으면 앞의 작업이 뒤에 줄 선 작업을 기다리며 교착될 수 있어 현재 스레드에서 차례로 실행
+        return each_store_in_turn(func, store_ids)
+    return dict(zip(store_ids, chain_executor.map(run, store_ids)))
+
+def each_store_in_turn(func, store_ids=None):
+    # 매장마다 현재 스레드에서 차례로 func(store_id) 실행 (스케줄러 작업용, 결과는 map_stores 와 같은 형태)
+    results = {}
+    for store_id in list(store_ids or STORES):
+        with store_context(store_id):
+            results[store_id] = func(store_id)
+    return results
+
+def select_request_store():
+    # ?store_id= 또는 X-Store-Id 헤더로 요청의 매장을 고름 (없으면 기본 매장)
+    store_id = request.args.get('store_id') or request.headers.get('X-Store-Id') or DEFAULT_STORE_ID
+    if store_id not in STORES:
+        return jsonify({'error': '알 수 없는 매장입니다.', 'store_id': store_id}), 404
+    g.store_token = current_store_id.set(store_id)
+
+def clear_request_store(error=None):
+    token = g.pop('store_token', None)
+    if token is not None:
+        current_store_id.reset(token)
+
+def stream_in_store(body):
+    # 스트리밍 응답 본문은 요청 처리(teardown)가 끝난 뒤 읽히므로 요청의 매장을 붙잡아 두고 실행
+    store_id = get_current_store_id()
+
+    def generate():
+        with store_context(store_id):
+            yield from body
+    return generate()
+
+db_pools = {}  # 매장 ID -> 커넥션 풀
+pool_lock = threading.Lock()
+# 풀에서 연결을 빌릴 때 기다린 시간 통계
+pool_wait_stats = {'acquires': 0, 'total_wait_ms': 0.0, 'max_wait_ms': 0.0, 'timeouts': 0}
+
+def get_db_module():
+    # DB 드라이버 모듈 (sqlite_backend 는 app.py 가 쓰는 oracledb 기능만 같은 이름으로 제공)
+    if DB_BACKEND == 'sqlite':
+        import sqlite_backend
+        return sqlite_backend
+    import oracledb
+    return oracledb
+
+def create_db_pool(store_id):
+    config = STORES[store_id]
+    if DB_BACKEND == 'sqlite':
+        return get_db_module().create_pool(
+            config['sqlite_path'],
+            min=POOL_MIN,
+            max=POOL_MAX,
+            increment=POOL_INCREMENT,
+            wait_timeout=POOL_WAIT_TIMEOUT
+        )
+    oracledb = get_db_module()
+    return oracledb.create_pool(
+        user=config['user'],
+        password=config['password'],
+        dsn=config['dsn'],
+        min=POOL_MIN,
+        max=POOL_MAX,
+        increment=POOL_INCREMENT,
+        stmtcachesize=POOL_STMT_CACHE,
+        getmode=oracledb.POOL_GETMODE_TIMEDWAIT,  # 연결이 모두 사용 중이면 제한 시간까지 대기
+        wait_timeout=POOL_WAIT_TIMEOUT
+    )
+
+def get_db_pool(store_id=None):
+    store_id = store_id or get_current_store_id()
+    pool = db_pools.get(store_id)
+    if pool is None:
+        with pool_lock:
+            pool = db_pools.get(store_id)
+            if pool is None:
+                pool = db_pools[store_id] = create_db_pool(store_id)
+    return pool
+
+def get_db_connection():
+    # 현재 매장의 풀에서 연결을 빌려옴 (conn.close() 를 호출하면 풀로 반환됨)
+    store_id = get_current_store_id()
+    pool = get_db_pool(store_id)
+    start = time.perf_counter()
+    try:
+        conn = pool.acquire()
+    except get_db_module().Error:
+        record_pool_timeout()
+        raise
+    record_pool_wait(time.perf_counter() - start)
+    schema = STORES[store_id]['schema']
+    if schema:
+        conn.current_schema = schema  # 다음 호출과 함께 전달됨 (별도 왕복 없음)
+    # 커서의 실행 시간/행 수를 /metrics 에 기록
+    return InstrumentedConnection(conn)
+
+def record_pool_wait(seconds):
+    waited_ms = seconds * 1000
+    with pool_lock:
+        pool_wait_stats['acquires'] += 1
+        pool_wait_stats['total_wait_ms'] += waited_ms
+        pool_wait_stats['max_wait_ms'] = max(pool_wait_stats['max_wait_ms'], waited_ms)
+    observe_metric('db_pool_wait_seconds', (), seconds)
+
+def record_pool_timeout():
+    with pool_lock:
+        pool_wait_stats['timeouts'] += 1
+    increment_metric('db_pool_timeouts_total', ())
+
+def get_pool_stats():
+    # 크기/사용 중 연결은 현재 매장의 풀, 대기 통계는 이 프로세스의 모든 풀 합계
+    pool = get_db_pool()
+    with pool_lock:
+        acquires = pool_wait_stats['acquires']
+        stats = {
+            'store_id': get_current_store_id(),
+            'min': pool.min,
+            'max': pool.max,
+            'increment': pool.increment,
+            'open': pool.opened,
+            'busy': pool.busy,
+            'stmt_cache_size': pool.stmtcachesize,
+            'wait_timeout_ms': pool.wait_timeout,
+            'acquires': acquires,
+            'timeouts': pool_wait_stats['timeouts'],
+            'avg_wait_ms': round(pool_wait_stats['total_wait_ms'] / acquires, 3) if acquires else 0,
+            'max_wait_ms': round(pool_wait_stats['max_wait_ms'], 3)
+        }
+    return stats
+
+# 앱이 사용하는 보조 테이블 (없으면 생성)
+SCHEMA_DDL = [
+    # 엑셀 일괄 입고용 스테이징 테이블 (PRODUCTS 와 같은 컬럼, 커밋 시 비워짐)
+    """
+    CREATE GLOBAL TEMPORARY TABLE PRODUCTS_IMPORT_STAGE
+    ON COMMIT DELETE ROWS
+    AS SELECT BARCODE, PRODUCT_NAME, EXPIRATION_DATE, QUANTITY, PRICE FROM PRODUCTS WHERE 1 = 0
+    """,
+    # 일별 상품별 판매 집계
+    """
+    CREATE TABLE SALES_DAILY_PRODUCT (
+        SALE_DAY DATE NOT NULL,
+        BARCODE VARCHAR2(50) NOT NULL,
+        PRODUCT_NAME VARCHAR2(200),
+        QUANTITY NUMBER DEFAULT 0 NOT NULL,
+        REVENUE NUMBER DEFAULT 0 NOT NULL,
+        SALE_COUNT NUMBER DEFAULT 0 NOT NULL,
+        PRICE_SUM NUMBER DEFAULT 0 NOT NULL,
+        CONSTRAINT PK_SALES_DAILY_PRODUCT PRIMARY KEY (SALE_DAY, BARCODE)
+    )
+    """,
+    # 일별 매장 전체 판매 집계
+    """
+    CREATE TABLE SALES_DAILY_STORE (
+        SALE_DAY DATE PRIMARY KEY,
+        QUANTITY NUMBER DEFAULT 0 NOT NULL,
+        REVENUE NUMBER DEFAULT 0 NOT NULL,
+        SALE_COUNT NUMBER DEFAULT 0 NOT NULL,
+        PRICE_SUM NUMBER DEFAULT 0 NOT NULL
+    )
+    """,
+    # 월별 매장 전체 판매 집계
+    """
+    CREATE TABLE SALES_MONTHLY_STORE (
+        SALE_MONTH DATE PRIMARY KEY,
+        QUANTITY NUMBER DEFAULT 0 NOT NULL,
+        REVENUE NUMBER DEFAULT 0 NOT NULL,
+        SALE_COUNT NUMBER DEFAULT 0 NOT NULL,
+        PRICE_SUM NUMBER DEFAULT 0 NOT NULL
+    )
+    """,
+    # 입고 추천 결과 스냅샷 (LAST_SALE_ID: 분석 시점의 마지막 SALE.ID)
+    """
+    CREATE TABLE RECOMMENDATION_SNAPSHOTS (
+        GENERATED_AT TIMESTAMP DEFAULT SYSTIMESTAMP NOT NULL,
+        LAST_SALE_ID NUMBER DEFAULT 0 NOT NULL,
+        RECOMMENDATIONS CLOB,
+        EXPLANATION CLOB
+    )
+    """,
+    "CREATE INDEX IX_RECOMMENDATION_GENERATED ON RECOMMENDATION_SNAPSHOTS (GENERATED_AT)",
+    # 폐기 이력 (SWEEP_ID: 같은 폐기 처리로 옮겨진 행 묶음, REASON: expired / out_of_stock / manual)
+    """
+    CREATE TABLE DISCARD_HISTORY (
+        DISCARDED_AT TIMESTAMP DEFAULT SYSTIMESTAMP NOT NULL,
+        SWEEP_ID VARCHAR2(32) NOT NULL,
+        REASON VARCHAR2(20) NOT NULL,
+        BARCODE VARCHAR2(100),
+        PRODUCT_NAME VARCHAR2(200),
+        EXPIRATION_DATE DATE,
+        QUANTITY NUMBER,
+        PRICE NUMBER
+    )
+    """,
+    "CREATE INDEX IX_DISCARD_HISTORY_AT ON DISCARD_HISTORY (DISCARDED_AT)",
+    # 판매 이력 구간 조회 (/api/sales_history, 수요 예측 학습, 집계 재계산)
+    "CREATE INDEX IX_SALE_DATE ON SALE (SALE_DATE)",
+    # 스케줄러 작업 리스(한 작업은 한 프로세스만 실행)와 마지막 실행 기록 (SCHEDULER_LOCK=db)
+    """
+    CREATE TABLE SCHEDULER_RUNS (
+        JOB_NAME VARCHAR2(100) PRIMARY KEY,
+        OWNER VARCHAR2(100),
+        LEASE_UNTIL TIMESTAMP,
+        LAST_STARTED TIMESTAMP,
+        LAST_FINISHED TIMESTAMP,
+        LAST_DURATION_MS NUMBER,
+        LAST_OUTCOME VARCHAR2(20),
+        LAST_ERROR VARCHAR2(1000)
+    )
+    """,
+]
+
+schema_ready_stores = set()  # 스키마를 확인한 매장 ID
+schema_lock = threading.Lock()
+
+def is_schema_ready(store_id=None):
+    return (store_id or get_current_store_id()) in schema_ready_stores
+
+def ensure_schema():
+    store_id = get_current_store_id()
+    if store_id in schema_ready_stores:
+        return
+    with schema_lock:
+        if store_id in schema_ready_stores:
+            return
+        if DB_BACKEND == 'sqlite':
+            get_db_pool(store_id)  # SQLite 스키마는 풀을 만들 때 sqlite_backend 가 생성
+            schema_ready_stores.add(store_id)
+            return
+        import oracledb
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        try:
+            for ddl in SCHEMA_DDL:
+                try:
+                    cursor.execute(ddl)
+                except oracledb.DatabaseError as e:
+                    error, = e.args
+                    if error.code not in (955, 1408):  # ORA-00955/01408: 이미 존재하는 객체/인덱스는 무시
+                        raise
+            schema_ready_stores.add(store_id)
+        finally:
+            cursor.close()
+            conn.close()
+
+@atexit.register
+def close_db_pool():
+    # 프로세스 종료 시 모든 매장의 풀 정리
+    with pool_lock:
+        pools = list(db_pools.values())
+        db_pools.clear()
+    for pool in pools:
+        try:
+            pool.close(force=True)
+        except Exception as e:
+            print(f"커넥션 풀 종료 오류: {str(e)}")
+
+# 재고 스냅샷 캐시 설정 (이 프로세스의 쓰기는 버전 증가로 바로 반영, 다른 프로세스의 쓰기는 가벼운 합계 조회로 확인)
+INVENTORY_PROBE_INTERVAL = float(os.environ.get('INVENTORY_PROBE_INTERVAL', 10))  # 초 (다른 프로세스의 변경을 확인하는 주기)
+# 초 (합계가 같아 조회로는 안 보이는 변경 - 유통기한/이름만 바뀐 재업로드 등 - 도 이 시간이 지나면 다시 읽어 반영)
+INVENTORY_CACHE_TTL = float(os.environ.get('INVENTORY_CACHE_TTL', 300))
+
+def new_inventory_state():
+    # products: 바코드 -> (BARCODE, PRODUCT_NAME, EXPIRATION_DATE, QUANTITY, PRICE), barcodes: 바코드 정렬 목록
+    # by_expiry: (유통기한, 바코드) 정렬 목록, out_of_stock: 수량이 0 이하인 바코드 (유통기한 인덱스)
+    # totals: [행 수, 수량 합, 가격 합] (INVENTORY_PROBE_SQL 결과와 비교해 다른 프로세스의 변경을 찾음)
+    return {
+        'lock': threading.RLock(),
+        'load_lock': threading.Lock(),
+        'version': 0,  # 재고가 바뀔 때마다 1씩 증가
+        'snapshot': {'version': -1, 'loaded_at': 0.0, 'probed_at': 0.0, 'barcodes': [], 'products': {}, 'by_expiry': [],
+                     'out_of_stock': set(), 'totals': [0, 0, 0]}
+    }
+
+inventory_states = StoreLocal(new_inventory_state)  # 매장별 재고 스냅샷
+
+INVENTORY_SNAPSHOT_SQL = "SELECT BARCODE, PRODUCT_NAME, EXPIRATION_DATE, QUANTITY, PRICE FROM PRODUCTS ORDER BY BARCODE"
+
+INVENTORY_PROBE_SQL = "SELECT COUNT(*), NVL(SUM(QUANTITY), 0), NVL(SUM(PRICE), 0) FROM PRODUCTS"
+
+def inventory_snapshot_state(inventory=None):
+    # fresh: 그대로 사용, probe: 합계만 조회해 다른 프로세스의 변경 확인
+    # stale: 이 프로세스의 쓰기로 무효화됐거나 INVENTORY_CACHE_TTL 이 지나 다시 읽음
+    inventory = inventory or inventory_states.get()
+    snapshot = inventory['snapshot']
+    now = time.monotonic()
+    if snapshot['version'] != inventory['version'] or now - snapshot['loaded_at'] >= INVENTORY_CACHE_TTL:
+        return 'stale'
+    if now - snapshot['probed_at'] >= INVENTORY_PROBE_INTERVAL:
+        return 'probe'
+    return 'fresh'
+
+def inventory_totals(count, quantity, price):
+    # 합계는 더하는 순서에 따라 소수점 끝자리가 달라질 수 있어 반올림해서 비교
+    return (int(count), round(float(quantity or 0), 4), round(float(price or 0), 4))
+
+def inventory_probe_matches(version, probe):
+    # 조회한 합계가 스냅샷과 같으면 확인 시각만 갱신 (조회 도중 이 프로세스가 쓴 경우도 다시 읽지 않음, 다음에 다시 확인)
+    inventory = inventory_states.get()
+    with inventory['lock']:
+        snapshot = inventory['snapshot']
+        if snapshot['version'] != version:
+            return True
+        if inventory_totals(*snapshot['totals']) != inventory_totals(*probe):
+            return False
+        snapshot['probed_at'] = time.monotonic()
+        return True
+
+def refresh_inventory_snapshot():
+    # 스냅샷이 무효화됐거나 다른 프로세스가 PRODUCTS 를 바꿨을 때만 한 번 읽어서 교체 (매장마다 동시에 한 스레드만 조회)
+    inventory = inventory_states.get()
+    with inventory['lock']:
+        if inventory_snapshot_state(inventory) == 'fresh':
+            return
+    with inventory['load_lock']:
+        with inventory['lock']:
+            state = inventory_snapshot_state(inventory)
+            if state == 'fresh':
+                return
+            version = inventory['version']
+
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        try:
+            if state == 'probe':
+                cursor.execute(INVENTORY_PROBE_SQL)
+                if inventory_probe_matches(version, cursor.fetchone()):
+                    return
+            cursor.arraysize = PRODUCTS_FETCH_ARRAYSIZE
+            cursor.execute(INVENTORY_SNAPSHOT_SQL)
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+            conn.close()
+        install_inventory_snapshot(version, rows)
+
+def install_inventory_snapshot(version, rows):
+    inventory = inventory_states.get()
+    now = time.monotonic()
+    with inventory['lock']:
+        # 조회 도중 쓰기가 있었다면 version 이 달라 다음 조회 때 다시 읽음
+        inventory['snapshot'].update({
+            'version': version,
+            'loaded_at': now,
+            'probed_at': now,
+            'barcodes': [row[0] for row in rows],
+            'products': {row[0]: tuple(row) for row in rows},
+            'by_expiry': sorted((row[2], row[0]) for row in rows if row[2]),
+            'out_of_stock': {row[0] for row in rows if row[3] is not None and row[3] <= 0},
+            'totals': [len(rows), sum(row[3] or 0 for row in rows), sum(row[4] or 0 for row in rows)]
+        })
+
+def get_inventory_products(after=None, limit=None):
+    # 바코드 순으로 정렬된 재고 행 목록 (after/limit 로 키셋 페이지 조회 가능)
+    refresh_inventory_snapshot()
+    inventory = inventory_states.get()
+    with inventory['lock']:
+        barcodes = inventory['snapshot']['barcodes']
+        products = inventory['snapshot']['products']
+        start = bisect.bisect_right(barcodes, after) if after else 0
+        end = start + limit if limit else len(barcodes)
+        return [products[barcode] for barcode in barcodes[start:end]]
+
+def get_inventory_version():
+    inventory = inventory_states.get()
+    with inventory['lock']:
+        return inventory['version']
+
+def patch_inventory(patch=None):
+    # 버전을 올리고, 스냅샷이 최신이었다면 patch 로 바로 고침 (patch 가 없으면 무효화만)
+    inventory = inventory_states.get()
+    with inventory['lock']:
+        snapshot = inventory['snapshot']
+        was_fresh = snapshot['version'] == inventory['version']
+        inventory['version'] += 1
+        if was_fresh and patch:
+            patch(snapshot)
+            snapshot['version'] = inventory['version']
+
+def invalidate_inventory():
+    patch_inventory()
+
+def index_row_change(snapshot, old_row, new_row):
+    # 한 상품의 행이 바뀔 때 합계와 유통기한 인덱스를 함께 고침 (old_row/new_row 가 None 이면 추가/삭제)
+    totals = snapshot['totals']
+    for row, sign in ((old_row, -1), (new_row, 1)):
+        if row is not None:
+            totals[0] += sign
+            totals[1] += sign * (row[3] or 0)
+            totals[2] += sign * (row[4] or 0)
+    index_expiry(snapshot, old_row, new_row)
+
+def index_expiry(snapshot, old_row, new_row):
+    # 유통기한 인덱스 (by_expiry, out_of_stock) 수정
+    by_expiry = snapshot['by_expiry']
+    old_key = (old_row[2], old_row[0]) if old_row is not None and old_row[2] else None
+    new_key = (new_row[2], new_row[0]) if new_row is not None and new_row[2] else None
+    if old_key != new_key:
+        if old_key:
+            index = bisect.bisect_left(by_expiry, old_key)
+            if index < len(by_expiry) and by_expiry[index] == old_key:
+                del by_expiry[index]
+        if new_key:
+            bisect.insort(by_expiry, new_key)
+    if new_row is not None and new_row[3] is not None and new_row[3] <= 0:
+        snapshot['out_of_stock'].add(new_row[0])
+    elif old_row is not None:
+        snapshot['out_of_stock'].discard(old_row[0])
+
+def upsert_inventory_product(barcode_number, name, expiration_date, quantity, price):
+    def patch(snapshot):
+        if barcode_number not in snapshot['products']:
+            bisect.insort(snapshot['barcodes'], barcode_number)
+        row = (barcode_number, name, expiration_date, quantity, price)
+        index_row_change(snapshot, snapshot['products'].get(barcode_number), row)
+        snapshot['products'][barcode_number] = row
+    patch_inventory(patch)
+
+def adjust_inventory_quantities(deltas):
+    # deltas: 바코드 -> 수량 변화량
+    def patch(snapshot):
+        for barcode_number, delta in deltas.items():
+            product = snapshot['products'].get(barcode_number)
+            if product:
+                row = product[:3] + ((product[3] or 0) + delta,) + product[4:]
+                index_row_change(snapshot, product, row)
+                snapshot['products'][barcode_number] = row
+    patch_inventory(patch)
+
+def remove_inventory_products(barcodes):
+    def patch(snapshot):
+        for barcode_number in set(barcodes):
+            product = snapshot['products'].pop(barcode_number, None)
+            if product is not None:
+                index = bisect.bisect_left(snapshot['barcodes'], barcode_number)
+                del snapshot['barcodes'][index]
+                index_row_change(snapshot, product, None)
+    patch_inventory(patch)
+
+# 재고 행 분류 (row: BARCODE, PRODUCT_NAME, EXPIRATION_DATE, QUANTITY, PRICE)
+ALERT_DAYS = 3  # 유통기한 임박 기준 일수
+
+def is_alert_row(row, now):
+    # 유통기한이 지나지 않았고 3일 이내 + 재고 있음 (이미 지난 상품은 만료 구간)
+    return bool(row[2] and now <= row[2] <= now + timedelta(days=ALERT_DAYS) and row[3] and row[3] > 0)
+
+def is_expired_row(row, now):
+    # 유통기한이 지났거나 재고 없음
+    return bool((row[2] and row[2] < now) or (row[3] is not None and row[3] <= 0))
+
+def is_restock_row(row, now):
+    # 재고가 0이고 유통기한이 남은 상품
+    return bool(row[3] == 0 and row[2] and row[2] >= now)
+
+# 유통기한 인덱스 조회: 현재 시각 기준 경계 두 개로 by_expiry 를 expired | alert | fresh 구간으로 나눔
+# 시간이 지나면 경계만 뒤로 이동하므로 결과 크기만큼만 훑음 (위 is_*_row 와 같은 조건)
+def select_expiry_rows(kind, now):
+    inventory = inventory_states.get()
+    with inventory['lock']:
+        snapshot = inventory['snapshot']
+        products = snapshot['products']
+        by_expiry = snapshot['by_expiry']
+        expired_end = bisect.bisect_left(by_expiry, (now,))  # 유통기한 < now
+        if kind == 'alert':
+            alert_end = bisect.bisect_left(by_expiry, (now + timedelta(days=ALERT_DAYS, microseconds=1),))
+            return [products[barcode_number] for _, barcode_number in by_expiry[expired_end:alert_end]
+                    if products[barcode_number][3] and products[barcode_number][3] > 0]
+        if kind == 'expired':
+            rows = [products[barcode_number] for _, barcode_number in by_expiry[:expired_end]]
+            rows.extend(sorted(
+                (products[barcode_number] for barcode_number in snapshot['out_of_stock']
+                 if not products[barcode_number][2] or products[barcode_number][2] >= now),
+                key=lambda row: (row[2] is None, row[2] or now, row[0])
+            ))
+            return rows
+        if kind == 'restock':
+            return sorted(
+                (products[barcode_number] for barcode_number in snapshot['out_of_stock']
+                 if is_restock_row(products[barcode_number], now)),
+                key=lambda row: row[0]
+            )
+        raise ValueError(f'알 수 없는 구간: {kind}')
+
+def get_expiry_rows(kind, now=None):
+    # kind: alert (임박), expired (만료/재고 없음), restock (재고 0 + 유통기한 남음)
+    refresh_inventory_snapshot()
+    return select_expiry_rows(kind, now or datetime.now())
+
+# 유통기한 임박 할인 등급표 (남은 일수 -> 할인율 %), 예: DISCOUNT_TIERS="3:10,2:20,1:30"
+DEFAULT_DISCOUNT_TIERS = '3:10,2:20,1:30'
+
+def parse_discount_tiers(value):
+    # 잘못된 값이면 ValueError (남은 일수는 0 이상, 할인율은 1~99 정수)
+    tiers = {}
+    for item in value.split(','):
+        if not item.strip():
+            continue
+        days_left, separator, rate = item.partition(':')
+        try:
+            days_left, rate = int(days_left), int(rate)
+        except ValueError:
+            raise ValueError(f'"남은일수:할인율" 형식이 아님: {item.strip()!r}')
+        if not separator or days_left < 0 or not 0 < rate < 100:
+            raise ValueError(f'남은 일수는 0 이상, 할인율은 1~99 여야 함: {item.strip()!r}')
+        tiers[days_left] = rate
+    return tiers
+
+def load_discount_tiers():
+    # 설정이 잘못돼도 앱은 뜨도록 기본 등급표를 사용하고 경고를 남김
+    value = os.environ.get('DISCOUNT_TIERS', DEFAULT_DISCOUNT_TIERS)
+    try:
+        return parse_discount_tiers(value)
+    except ValueError as e:
+        print(f"DISCOUNT_TIERS 설정 오류 ({str(e)}), 기본값 {DEFAULT_DISCOUNT_TIERS} 사용")
+        return parse_discount_tiers(DEFAULT_DISCOUNT_TIERS)
+
+DISCOUNT_TIERS = load_discount_tiers()
+
+def round_price(value):
+    # Oracle ROUND 와 같은 반올림 (0.5 는 올림)
+    return int(math.floor(value + 0.5))
+
+def apply_discounts(products, today=None):
+    # 조회한 상품 묶음 전체에 할인가와 할인율을 한 번에 적용 (expiration_date 는 datetime)
+    # 등급표를 오늘 기준 유통기한 날짜 -> 할인율로 한 번 바꿔 두고 행마다 조회만 함
+    today = today or datetime.now().date()
+    rate_by_date = {today + timedelta(days=days_left): rate for days_left, rate in DISCOUNT_TIERS.items()}
+    for product in products:
+        expiration_date = product.get('expiration_date')
+        rate = rate_by_date.get(expiration_date.date()) if expiration_date else None
+        if rate:
+            product['price'] = round_price((product['price'] or 0) * (100 - rate) / 100)
+            product['discount'] = f'{rate}%'
+        else:
+            product['discount'] = '없음'
+    return products
+
+# 조회 응답 캐시 (ETag/Last-Modified 조건부 GET + 압축)
+RESPONSE_CACHE_SIZE = int(os.environ.get('RESPONSE_CACHE_SIZE', 256))  # 보관할 응답 수 (쿼리 문자열별)
+SALES_CACHE_TTL = float(os.environ.get('SALES_CACHE_TTL', 30))  # 초 (다른 프로세스의 판매를 반영하는 주기)
+COMPRESS_MIN_BYTES = int(os.environ.get('COMPRESS_MIN_BYTES', 1024))  # 이보다 작은 응답은 압축하지 않음
+COMPRESS_LEVEL = int(os.environ.get('COMPRESS_LEVEL', 6))
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# (매장 ID, 응답 키) -> {'version', 'expires', 'etag', 'last_modified', 'body', 'encoded': {인코딩: 바이트}}
+response_cache = OrderedDict()
+response_cache_lock = threading.Lock()
+sales_versions = {}  # 매장 ID -> 판매/집계가 바뀔 때마다 1씩 증가하는 값
+sales_version_lock = threading.Lock()
+
+def get_sales_version(store_id=None):
+    with sales_version_lock:
+        return sales_versions.get(store_id or get_current_store_id(), 0)
+
+def bump_sales_version():
+    store_id = get_current_store_id()
+    with sales_version_lock:
+        sales_versions[store_id] = sales_versions.get(store_id, 0) + 1
+
+def json_default(value):
+    # orjson/json 이 직접 못 쓰는 값 (Oracle NUMBER 의 Decimal, 날짜 등)
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    return str(value)
+
+def dumps_json(payload):
+    # jsonify 와 같은 키 정렬 순서로 직렬화 (orjson 이 있으면 사용)
+    if orjson is not None:
+        return orjson.dumps(payload, default=json_default, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, default=json_default, ensure_ascii=False, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+def snapshot_response_version(minute=False):
+    # 재고 스냅샷이 교체/수정될 때마다 바뀌는 값 (minute=True 면 날짜 경계가 움직이는 목록용으로 분 단위 추가)
+    inventory = inventory_states.get()
+    with inventory['lock']:
+        version = (inventory['snapshot']['version'], inventory['snapshot']['loaded_at'])
+    return version + (datetime.now().strftime('%Y%m%d%H%M'),) if minute else version
+
+def inventory_response_version(minute=False):
+    refresh_inventory_snapshot()
+    return snapshot_response_version(minute)
+
+def get_cached_response(key, version, build, ttl=None):
+    # 같은 버전(+ttl 이내)이면 직렬화된 본문을 재사용, 아니면 build() 로 다시 만들어 ETag 계산
+    key = (get_current_store_id(), key)  # 같은 경로라도 매장마다 따로 보관
+    now = time.monotonic()
+    with response_cache_lock:
+        entry = response_cache.get(key)
+        if entry and entry['version'] == version and (entry['expires'] is None or now < entry['expires']):
+            response_cache.move_to_end(key)
+            return entry
+
+    body = dumps_json(build())
+    etag = hashlib.sha1(body).hexdigest()[:20]
+    with response_cache_lock:
+        previous = response_cache.get(key)
+        # 다시 만들어도 내용이 같으면 Last-Modified 와 압축본을 그대로 유지
+        if previous and previous['etag'] == etag:
+            last_modified, encoded = previous['last_modified'], previous['encoded']
+        else:
+            last_modified, encoded = datetime.utcnow().replace(microsecond=0), {}
+        entry = {
+            'version': version,
+            'expires': now + ttl if ttl else None,
+            'etag': etag,
+            'last_modified': last_modified,
+            'body': body,
+            'encoded': encoded
+        }
+        response_cache[key] = entry
+        response_cache.move_to_end(key)
+        while len(response_cache) > RESPONSE_CACHE_SIZE:
+            response_cache.popitem(last=False)
+    return entry
+
+def choose_encoding(accept_encoding):
+    # Accept-Encoding 에서 br(설치된 경우) > gzip 순으로 선택
+    accepted = {}
+    for item in (accept_encoding or '').split(','):
+        name, _, params = item.strip().partition(';')
+        quality = 1.0
+        if params.strip().startswith('q='):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.lower()] = quality
+    if brotli is not None and accepted.get('br', 0) > 0:
+        return 'br'
+    if accepted.get('gzip', 0) > 0:
+        return 'gzip'
+    return None
+
+def encoded_body(entry, accept_encoding):
+    # (본문, Content-Encoding) 반환, 압축본은 캐시 항목에 보관해서 재사용
+    body = entry['body']
+    encoding = choose_encoding(accept_encoding) if len(body) >= COMPRESS_MIN_BYTES else None
+    if encoding is None:
+        return body, None
+    data = entry['encoded'].get(encoding)
+    if data is None:
+        if encoding == 'br':
+            data = brotli.compress(body, quality=min(COMPRESS_LEVEL, 11))
+        else:
+            data = gzip.compress(body, compresslevel=min(max(COMPRESS_LEVEL, 1), 9))
+        entry['encoded'][encoding] = data
+    return data, encoding
+
+def is_not_modified(entry, if_none_match, if_modified_since):
+    # If-None-Match 가 있으면 그것만, 없으면 If-Modified-Since 로 판단 (werkzeug 파싱 결과)
+    if if_none_match:
+        return if_none_match.contains(entry['etag'])
+    return bool(if_modified_since) and if_modified_since.replace(tzinfo=None) >= entry['last_modified']
+
+def cached_json_response(key, version, build, ttl=None):
+    # 조건부 GET 이면 304 (본문/DB 조회 없음), 아니면 압축된 JSON 응답
+    entry = get_cached_response(key, version, build, ttl)
+    response = Response(mimetype='application/json')
+    response.set_etag(entry['etag'])
+    response.last_modified = entry['last_modified']
+    response.headers['Cache-Control'] = 'no-cache'
+    response.vary.add('Accept-Encoding')
+    if is_not_modified(entry, request.if_none_match, request.if_modified_since):
+        response.status_code = 304
+        return response
+    data, encoding = encoded_body(entry, request.headers.get('Accept-Encoding'))
+    response.set_data(data)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    return response
+
+# /api/products 응답에 쓸 수 있는 필드와 컬럼
+PRODUCT_COLUMNS = OrderedDict([
+    ('barcode', 'BARCODE'),
+    ('name', 'PRODUCT_NAME'),
+    ('expiration_date', 'EXPIRATION_DATE'),
+    ('quantity', 'QUANTITY'),
+    ('price', 'PRICE')
+])
+PRODUCTS_MAX_LIMIT = 1000
+PRODUCTS_FETCH_ARRAYSIZE = int(os.environ.get('PRODUCTS_FETCH_ARRAYSIZE', 500))  # 한 번에 가져올 행 수
+
+def parse_product_fields(value):
+    if not value:
+        return list(PRODUCT_COLUMNS)
+    fields = [field.strip() for field in value.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in PRODUCT_COLUMNS]
+    if unknown:
+        raise ValueError(f"알 수 없는 필드입니다: {', '.join(unknown)}")
+    return fields
+
+def build_products_query(fields, after=None, limit=None):
+    # 키셋 페이지네이션을 위해 BARCODE 는 항상 첫 컬럼으로 조회
+    selected = ['barcode'] + [field for field in fields if field != 'barcode']
+    sql = f"SELECT {', '.join(PRODUCT_COLUMNS[field] for field in selected)} FROM PRODUCTS"
+    params = {}
+    if after:
+        sql += " WHERE BARCODE > :after"
+        params['after'] = after
+    sql += " ORDER BY BARCODE"
+    if limit:
+        sql += " FETCH FIRST :limit ROWS ONLY"
+        params['limit'] = limit
+    return sql, params, selected
+
+def product_row_to_dict(row, selected, fields):
+    values = dict(zip(selected, row))
+    if 'expiration_date' in values:
+        values['expiration_date'] = values['expiration_date'].strftime('%Y-%m-%d') if values['expiration_date'] else ''
+    return {field: values[field] for field in fields}
+
+def stream_products_ndjson(sql, params, selected, fields):
+    # 한 번에 arraysize 만큼만 가져와 한 줄씩 내보냄 (전체 목록을 메모리에 두지 않음)
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.arraysize = PRODUCTS_FETCH_ARRAYSIZE
+        cursor.prefetchrows = PRODUCTS_FETCH_ARRAYSIZE
+        cursor.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany()
+            if not rows:
+                break
+            yield ''.join(
+                json.dumps(product_row_to_dict(row, selected, fields), ensure_ascii=False, default=str) + '\n'
+                for row in rows
+            )
+    except Exception as e:
+        print(f"상품 스트리밍 오류: {str(e)}")
+        yield json.dumps({'error': str(e)}, ensure_ascii=False) + '\n'
+    finally:
+        cursor.close()
+        conn.close()
+
+def parse_products_args(args):
+    # 반환: (fields, limit, after, format) - 잘못된 값이면 ValueError
+    fields = parse_product_fields(args.get('fields'))
+    limit = args.get('limit')
+    if limit is not None:
+        try:
+            limit = int(limit)
+        except ValueError:
+            raise ValueError(f'limit 은 1~{PRODUCTS_MAX_LIMIT} 사이의 정수여야 합니다.')
+        if not 0 < limit <= PRODUCTS_MAX_LIMIT:
+            raise ValueError(f'limit 은 1~{PRODUCTS_MAX_LIMIT} 사이여야 합니다.')
+    after = args.get('after')
+    output_format = args.get('format', 'json')
+    if output_format not in ('json', 'ndjson'):
+        raise ValueError('format 은 json 또는 ndjson 이어야 합니다.')
+    return fields, limit, after, output_format
+
+def products_payload(rows, fields, limit):
+    selected = list(PRODUCT_COLUMNS)
+    products = [product_row_to_dict(row, selected, fields) for row in rows]
+    if limit is None:
+        return products
+    # limit 을 준 경우 다음 페이지 조회용 커서(after)를 함께 반환
+    return {
+        'items': products,
+        'next_after': rows[-1][0] if len(products) == limit else None
+    }
+
+def alert_products_payload(rows, now):
+    # 유통기한 3일 이내 + 재고 있는 상품에 할인가 적용
+    products = apply_discounts([
+        {
+            'barcode': row[0] if row[0] else '정보 없음',
+            'name': row[1] if row[1] else '정보 없음',
+            'expiration_date': row[2],
+            'quantity': row[3] if row[3] else 0,
+            'price': row[4] if row[4] else 0
+        }
+        for row in rows
+    ], now.date())
+    for product in products:
+        product['expiration_date'] = product['expiration_date'].strftime('%Y-%m-%d')
+    return products
+
+def expired_products_payload(rows):
+    # 유통기한이 지났거나 재고가 없는 제품
+    return [
+        {
+            'barcode': row[0] if row[0] else '',
+            'name': row[1] if row[1] else '',
+            'expiration_date': row[2].strftime('%Y-%m-%d') if row[2] else ''
+        }
+        for row in rows
+    ]
+
+# 엑셀 일괄 입고 설정
+IMPORT_CHUNK_SIZE = int(os.environ.get('IMPORT_CHUNK_SIZE', 5000))  # 한 번에 DB로 보낼 행 수
+IMPORT_COLUMNS = ['barcode', 'name', 'expiration_date', 'quantity', 'price']
+
+def read_excel_chunks(file, chunk_size=IMPORT_CHUNK_SIZE):
+    # xlsx 는 openpyxl 읽기 전용 모드로 행을 흘려 읽고, 그 외 형식은 한 번에 읽어서 나눔
+    import pandas as pd
+    from openpyxl import load_workbook
+    filename = (file.filename or '').lower()
+    if not filename.endswith(('.xlsx', '.xlsm')):
+        df = pd.read_excel(file, dtype={'barcode': str})
+        return (df.iloc[i:i + chunk_size] for i in range(0, len(df), chunk_size))
+
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    rows = workbook.active.iter_rows(values_only=True)
+    header = [str(cell).strip() if cell is not None else '' for cell in next(rows, ())]
+
+    def chunks():
+        try:
+            width = len(header)
+            chunk = []
+            for row in rows:
+                # 읽기 전용 모드에서는 행마다 셀 개수가 다를 수 있어 헤더 길이에 맞춤
+                chunk.append((tuple(row) + (None,) * width)[:width])
+                if len(chunk) >= chunk_size:
+                    yield pd.DataFrame(chunk, columns=header)
+                    chunk = []
+            if chunk:
+                yield pd.DataFrame(chunk, columns=header)
+        finally:
+            workbook.close()
+    return chunks()
+
+def convert_expiration_dates(values):
+    # 문자열(YYYY-MM-DD), 날짜 셀, 엑셀 일련번호를 한 번에 변환 (변환 불가 값은 NaT)
+    import pandas as pd
+    serials = pd.to_numeric(values, errors='coerce')
+    from_serial = pd.Timestamp('1899-12-30') + pd.to_timedelta(serials, unit='D')
+    from_text = pd.to_datetime(values.where(serials.isna()), format='%Y-%m-%d', errors='coerce')
+    return from_text.fillna(from_serial).dt.normalize()
+
+def normalize_barcodes(values):
+    # 숫자로 읽힌 바코드(880123.0 등)를 문자열로 정리
+    barcodes = values.astype(str).str.strip().str.replace(r'\.0$', '', regex=True)
+    return barcodes.where(values.notna() & (barcodes != ''))
+
+def prepare_import_chunk(df, first_row):
+    # 한 덩어리의 엑셀 행을 검증하고 DB 바인드용 행과 거부 목록으로 나눔
+    import numpy as np
+    import pandas as pd
+    df = df.reset_index(drop=True)
+    missing = [column for column in IMPORT_COLUMNS if column not in df.columns]
+    if missing:
+        raise ValueError(f"엑셀 파일에 필요한 열이 없습니다: {', '.join(missing)}")
+
+    row_numbers = np.arange(first_row, first_row + len(df))
+    barcodes = normalize_barcodes(df['barcode'])
+    names = df['name'].where(df['name'].notna())
+    expirations = convert_expiration_dates(df['expiration_date'])
+    quantities = pd.to_numeric(df['quantity'], errors='coerce')
+    prices = pd.to_numeric(df['price'], errors='coerce')
+
+    reasons = pd.Series(np.select(
+        [barcodes.isna(), names.isna(), expirations.isna(), quantities.isna(), quantities % 1 != 0, prices.isna()],
+        ['바코드 없음', '상품명 없음', '유통기한 형식 오류', '수량 형식 오류', '수량은 정수여야 함', '가격 형식 오류'],
+        default=''
+    ))
+    # 같은 파일 안에서 바코드가 중복되면 마지막 행만 반영
+    duplicated = barcodes.duplicated(keep='last') & (reasons == '')
+    reasons = reasons.mask(duplicated, '파일 내 중복 바코드 (마지막 행 반영)')
+
+    valid = (reasons == '').to_numpy()
+    rejected = [
+        {'row': int(row), 'barcode': barcode if isinstance(barcode, str) else None, 'error': reason}
+        for row, barcode, reason in zip(row_numbers[~valid], barcodes[~valid], reasons[~valid])
+    ]
+    rows = list(zip(
+        barcodes[valid],
+        names[valid].astype(str),
+        expirations[valid].dt.strftime('%Y-%m-%d'),
+        quantities[valid].astype('int64').tolist(),
+        prices[valid].tolist()
+    ))
+    return rows, row_numbers[valid], rejected
+
+def stage_import_chunk(cursor, rows, row_numbers, seen):
+    # 스테이징 테이블에 배열 DML로 적재 (seen: 앞 덩어리에서 적재한 바코드 -> 엑셀 행 번호)
+    # 앞 덩어리에 같은 바코드가 있으면 그 행을 스테이징에서 지우고 거부 목록에 올림 (파일 전체에서 마지막 행만 반영)
+    rejected = []
+    earlier = [(barcode_number, seen.pop(barcode_number)) for barcode_number, *_ in rows if barcode_number in seen]
+    if earlier:
+        cursor.executemany(
+            "DELETE FROM PRODUCTS_IMPORT_STAGE WHERE BARCODE = :1",
+            [(barcode_number,) for barcode_number, _ in earlier]
+        )
+        rejected.extend(
+            {'row': row, 'barcode': barcode_number, 'error': '파일 내 중복 바코드 (마지막 행 반영)'}
+            for barcode_number, row in earlier
+        )
+
+    cursor.executemany(
+        """
+        INSERT INTO PRODUCTS_IMPORT_STAGE
+        (BARCODE, PRODUCT_NAME, EXPIRATION_DATE, QUANTITY, PRICE)
+        VALUES (:1, :2, TO_DATE(:3, 'YYYY-MM-DD'), :4, :5)
+        """,
+        rows,
+        batcherrors=True
+    )
+    failed = set()
+    for error in cursor.getbatcherrors():
+        failed.add(error.offset)
+        rejected.append({
+            'row': int(row_numbers[error.offset]),
+            'barcode': rows[error.offset][0],
+            'error': error.message
+        })
+    for offset, row in enumerate(rows):
+        if offset not in failed:
+            seen[row[0]] = int(row_numbers[offset])
+    return rejected
+
+def merge_import_stage(cursor):
+    # 파일 전체를 적재한 뒤 MERGE 한 번으로 PRODUCTS 에 반영
+    cursor.execute("""
+        MERGE INTO PRODUCTS p
+        USING PRODUCTS_IMPORT_STAGE s
+        ON (p.BARCODE = s.BARCODE)
+        WHEN MATCHED THEN UPDATE SET
+            p.QUANTITY = s.QUANTITY,
+            p.PRICE = s.PRICE,
+            p.EXPIRATION_DATE = s.EXPIRATION_DATE
+        WHEN NOT MATCHED THEN INSERT
+            (BARCODE, PRODUCT_NAME, EXPIRATION_DATE, QUANTITY, PRICE)
+            VALUES (s.BARCODE, s.PRODUCT_NAME, s.EXPIRATION_DATE, s.QUANTITY, s.PRICE)
+    """)
+    return cursor.rowcount
+
+# 바코드 조회 (스캐너용): 재고 스냅샷의 바코드 -> 상품 딕셔너리를 인덱스로 사용
+BARCODE_INDEX_ENABLED = os.environ.get('BARCODE_INDEX_ENABLED', '1') == '1'
+LOOKUP_MAX_BARCODES = 1000
+LOOKUP_PRODUCTS_SQL = """
+    SELECT BARCODE, PRODUCT_NAME, EXPIRATION_DATE, QUANTITY, PRICE
+    FROM PRODUCTS
+    WHERE BARCODE IN (SELECT COLUMN_VALUE FROM TABLE(:barcodes))
+"""
+
+def lookup_products(barcodes):
+    # 바코드 목록을 한 번에 조회해 {바코드: 행} 반환
+    if BARCODE_INDEX_ENABLED:
+        refresh_inventory_snapshot()
+        inventory = inventory_states.get()
+        with inventory['lock']:
+            products = inventory['snapshot']['products']
+            return {barcode_number: products[barcode_number] for barcode_number in barcodes if barcode_number in products}
+
+    # 인덱스를 쓰지 않으면 바코드 배열을 컬렉션 하나로 바인드해 한 번에 조회
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        barcode_list = conn.gettype('SYS.ODCIVARCHAR2LIST').newobject(list(barcodes))
+        cursor.execute(LOOKUP_PRODUCTS_SQL, {'barcodes': barcode_list})
+        return {row[0]: row for row in cursor}
+    finally:
+        cursor.close()
+        conn.close()
+
+def warm_barcode_index():
+    # 시작 시 재고 스냅샷(바코드 인덱스)을 미리 채움
+    if not BARCODE_INDEX_ENABLED:
+        return
+    try:
+        refresh_inventory_snapshot()
+    except Exception as e:
+        print(f"바코드 인덱스 준비 중 오류 발생: {str(e)}")
+
+def parse_lookup_barcodes(data):
+    barcodes = data.get('barcodes')
+    if not isinstance(barcodes, list) or not barcodes:
+        raise ValueError('바코드 목록이 필요합니다.')
+    if len(barcodes) > LOOKUP_MAX_BARCODES:
+        raise ValueError(f'한 번에 최대 {LOOKUP_MAX_BARCODES}개까지 조회할 수 있습니다.')
+    return [str(barcode_number).strip() for barcode_number in barcodes]
+
+def lookup_payload(barcodes, found):
+    # 찾은 상품은 요청 순서대로, 없는 바코드는 중복 없이 반환
+    columns = list(PRODUCT_COLUMNS)
+    return {
+        'products': [product_row_to_dict(found[barcode_number], columns, columns)
+                     for barcode_number in barcodes if barcode_number in found],
+        'missing': [barcode_number for barcode_number in dict.fromkeys(barcodes) if barcode_number not in found]
+    }
+
+# 판매 집계(롤업) 테이블 유지
+ROLLUP_COMPACT_DAYS = int(os.environ.get('ROLLUP_COMPACT_DAYS', 2))  # 야간 작업에서 다시 계산할 최근 일수
+
+# 판매 한 건을 집계 테이블에 더하는 MERGE (product / day / month 순서로 갱신해 잠금 순서를 고정)
+SALES_ROLLUP_MERGES = [
+    """
+    MERGE INTO SALES_DAILY_PRODUCT r
+    USING (SELECT TRUNC(SYSDATE) SALE_DAY, :barcode BARCODE, :product_name PRODUCT_NAME,
+                  :quantity QUANTITY, :price PRICE FROM DUAL) s
+    ON (r.SALE_DAY = s.SALE_DAY AND r.BARCODE = s.BARCODE)
+    WHEN MATCHED THEN UPDATE SET
+        r.QUANTITY = r.QUANTITY + s.QUANTITY,
+        r.REVENUE = r.REVENUE + s.QUANTITY * s.PRICE,
+        r.SALE_COUNT = r.SALE_COUNT + 1,
+        r.PRICE_SUM = r.PRICE_SUM + s.PRICE
+    WHEN NOT MATCHED THEN INSERT (SALE_DAY, BARCODE, PRODUCT_NAME, QUANTITY, REVENUE, SALE_COUNT, PRICE_SUM)
+        VALUES (s.SALE_DAY, s.BARCODE, s.PRODUCT_NAME, s.QUANTITY, s.QUANTITY * s.PRICE, 1, s.PRICE)
+    """,
+    """
+    MERGE INTO SALES_DAILY_STORE r
+    USING (SELECT TRUNC(SYSDATE) SALE_DAY, :quantity QUANTITY, :price PRICE FROM DUAL) s
+    ON (r.SALE_DAY = s.SALE_DAY)
+    WHEN MATCHED THEN UPDATE SET
+        r.QUANTITY = r.QUANTITY + s.QUANTITY,
+        r.REVENUE = r.REVENUE + s.QUANTITY * s.PRICE,
+        r.SALE_COUNT = r.SALE_COUNT + 1,
+        r.PRICE_SUM = r.PRICE_SUM + s.PRICE
+    WHEN NOT MATCHED THEN INSERT (SALE_DAY, QUANTITY, REVENUE, SALE_COUNT, PRICE_SUM)
+        VALUES (s.SALE_DAY, s.QUANTITY, s.QUANTITY * s.PRICE, 1, s.PRICE)
+    """,
+    """
+    MERGE INTO SALES_MONTHLY_STORE r
+    USING (SELECT TRUNC(SYSDATE, 'MM') SALE_MONTH, :quantity QUANTITY, :price PRICE FROM DUAL) s
+    ON (r.SALE_MONTH = s.SALE_MONTH)
+    WHEN MATCHED THEN UPDATE SET
+        r.QUANTITY = r.QUANTITY + s.QUANTITY,
+        r.REVENUE = r.REVENUE + s.QUANTITY * s.PRICE,
+        r.SALE_COUNT = r.SALE_COUNT + 1,
+        r.PRICE_SUM = r.PRICE_SUM + s.PRICE
+    WHEN NOT MATCHED THEN INSERT (SALE_MONTH, QUANTITY, REVENUE, SALE_COUNT, PRICE_SUM)
+        VALUES (s.SALE_MONTH, s.QUANTITY, s.QUANTITY * s.PRICE, 1, s.PRICE)
+    """
+]
+
+def sales_rollup_binds(sales):
+    # SALES_ROLLUP_MERGES 순서대로 바인드 목록 반환 (sales: barcode, product_name, quantity, price 딕셔너리 목록)
+    # 상품별 집계는 바코드가 있는 판매만, 매장 합계는 모든 판매 (rebuild_sales_rollups 와 같은 기준)
+    total_rows = [{'quantity': sale['quantity'] or 0, 'price': sale['price'] or 0} for sale in sales]
+    product_rows = [
+        {'barcode': sale['barcode'], 'product_name': sale['product_name'], **total}
+        for sale, total in zip(sales, total_rows) if sale['barcode'] is not None
+    ]
+    return [product_rows, total_rows, total_rows]
+
+def sales_rollup_statements(sales):
+    # 집계 테이블마다 (MERGE 문, 바인드 목록) - 바인드가 없는 테이블은 건너뜀 (asgi.py 와 같이 사용)
+    if not sales:
+        return []
+    return [(sql, rows) for sql, rows in zip(SALES_ROLLUP_MERGES, sales_rollup_binds(sales)) if rows]
+
+def record_sales_rollups(cursor, sales):
+    # SALE INSERT 와 같은 트랜잭션에서 호출
+    for sql, rows in sales_rollup_statements(sales):
+        cursor.executemany(sql, rows)
+
+def rebuild_sales_rollups(days=None):
+    # 최근 days 일(없으면 전체 기간)의 집계를 SALE 에서 다시 계산
+    ensure_schema()
+    start_day = (datetime.now() - timedelta(days=days)).replace(hour=0, minute=0, second=0, microsecond=0) if days else datetime(1900, 1, 1)
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        # 다시 계산하는 동안 판매 집계 갱신을 막음 (MERGE 와 같은 순서로 잠금)
+        cursor.execute("LOCK TABLE SALES_DAILY_PRODUCT IN EXCLUSIVE MODE")
+        cursor.execute("LOCK TABLE SALES_DAILY_STORE IN EXCLUSIVE MODE")
+        cursor.execute("LOCK TABLE SALES_MONTHLY_STORE IN EXCLUSIVE MODE")
+        params = {'start_day': start_day}
+
+        cursor.execute("DELETE FROM SALES_DAILY_PRODUCT WHERE SALE_DAY >= :start_day", params)
+        cursor.execute("""
+            INSERT INTO SALES_DAILY_PRODUCT (SALE_DAY, BARCODE, PRODUCT_NAME, QUANTITY, REVENUE, SALE_COUNT, PRICE_SUM)
+            SELECT TRUNC(SALE_DATE), BARCODE, MAX(PRODUCT_NAME), SUM(NVL(QUANTITY, 0)),
+                   SUM(NVL(QUANTITY, 0) * NVL(PRICE, 0)), COUNT(*), SUM(NVL(PRICE, 0))
+            FROM SALE
+            WHERE SALE_DATE >= :start_day AND BARCODE IS NOT NULL
+            GROUP BY TRUNC(SALE_DATE), BARCODE
+        """, params)
+        daily_rows = cursor.rowcount
+
+        # 매장 합계는 SALE 에서 바로 계산 (바코드가 없는 판매도 MERGE 경로처럼 매출에 포함)
+        cursor.execute("DELETE FROM SALES_DAILY_STORE WHERE SALE_DAY >= :start_day", params)
+        cursor.execute("""
+            INSERT INTO SALES_DAILY_STORE (SALE_DAY, QUANTITY, REVENUE, SALE_COUNT, PRICE_SUM)
+            SELECT TRUNC(SALE_DATE), SUM(NVL(QUANTITY, 0)), SUM(NVL(QUANTITY, 0) * NVL(PRICE, 0)),
+                   COUNT(*), SUM(NVL(PRICE, 0))
+            FROM SALE
+            WHERE SALE_DATE >= :start_day
+            GROUP BY TRUNC(SALE_DATE)
+        """, params)
+
+        # 월 집계는 시작일이 속한 달 전체를 일별 집계에서 다시 합산
+        cursor.execute("DELETE FROM SALES_MONTHLY_STORE WHERE SALE_MONTH >= TRUNC(:start_day, 'MM')", params)
+        cursor.execute("""
+            INSERT INTO SALES_MONTHLY_STORE (SALE_MONTH, QUANTITY, REVENUE, SALE_COUNT, PRICE_SUM)
+            SELECT TRUNC(SALE_DAY, 'MM'), SUM(QUANTITY), SUM(REVENUE), SUM(SALE_COUNT), SUM(PRICE_SUM)
+            FROM SALES_DAILY_STORE
+            WHERE SALE_DAY >= TRUNC(:start_day, 'MM')
+            GROUP BY TRUNC(SALE_DAY, 'MM')
+        """, params)
+        conn.commit()
+        bump_sales_version()
+        return {'start_day': start_day.strftime('%Y-%m-%d'), 'daily_product_rows': daily_rows}
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+def compact_sales_rollups():
+    # 매일 새벽: 지난 며칠 집계를 SALE 기준으로 다시 맞춤
+    try:
+        result = rebuild_sales_rollups(ROLLUP_COMPACT_DAYS)
+        print(f"판매 집계 정리 완료: {result}")
+    except Exception as e:
+        print(f"판매 집계 정리 중 오류 발생: {str(e)}")
+        raise
+
+def backfill_sales_rollups():
+    # 집계 테이블이 비어 있으면 전체 판매 이력으로 채움 (최초 1회)
+    try:
+        ensure_schema()
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT COUNT(*) FROM SALES_DAILY_STORE WHERE ROWNUM = 1")
+            is_empty = cursor.fetchone()[0] == 0
+        finally:
+            cursor.close()
+            conn.close()
+        if is_empty:
+            result = rebuild_sales_rollups()
+            print(f"판매 집계 초기 생성 완료: {result}")
+    except Exception as e:
+        print(f"판매 집계 초기 생성 중 오류 발생: {str(e)}")
+        raise
+
+# 최근 구매 기록 (고정 크기 링 버퍼, seq 는 SALE.ID 를 그대로 사용)
+RECENT_PURCHASES_MAX = int(os.environ.get('RECENT_PURCHASES_MAX', 200))
+# memory: 이 프로세스의 링 버퍼, sale: SALE 테이블에서 조회 (여러 워커가 같은 목록을 봄)
+RECENT_PURCHASES_SOURCE = os.environ.get('RECENT_PURCHASES_SOURCE', 'memory')
+
+def new_recent_purchases_state():
+    # warmed: SALE 의 최근 기록을 한 번 불러왔는지 (스케줄러가 없으면 첫 조회 때)
+    return {'entries': deque(maxlen=RECENT_PURCHASES_MAX), 'lock': threading.Lock(), 'warmed': False}
+
+recent_purchases_states = StoreLocal(new_recent_purchases_state)  # 매장별 최근 구매 링 버퍼
+
+def record_recent_purchases(entries):
+    # 커밋이 끝난 구매만 seq 순서대로 추가 (오래된 항목은 자동으로 밀려남)
+    state = recent_purchases_states.get()
+    recent_purchases = state['entries']
+    with state['lock']:
+        for entry in sorted(entries, key=lambda item: item['seq']):
+            if recent_purchases and recent_purchases[-1]['seq'] >= entry['seq']:
+                # 다른 스레드가 먼저 커밋한 경우: seq 순서를 유지하도록 제자리에 삽입
+                if any(item['seq'] == entry['seq'] for item in recent_purchases):
+                    continue
+                position = sum(1 for item in recent_purchases if item['seq'] < entry['seq'])
+                if position == 0 and len(recent_purchases) == recent_purchases.maxlen:
+                    continue  # 버퍼에 남을 수 없는 오래된 기록
+                if len(recent_purchases) == recent_purchases.maxlen:
+                    recent_purchases.popleft()
+                    position -= 1
+                recent_purchases.insert(position, entry)
+            else:
+                recent_purchases.append(entry)
+
+# since 이후 최신 limit 건을 오래된 순서로 조회
+RECENT_PURCHASES_SQL = """
+    SELECT ID, BARCODE, PRODUCT_NAME, PRICE, QUANTITY, SALE_DATE FROM (
+        SELECT ID, BARCODE, PRODUCT_NAME, PRICE, QUANTITY, SALE_DATE
+        FROM SALE
+        WHERE ID > :since
+        ORDER BY ID DESC
+        FETCH FIRST :limit ROWS ONLY
+    )
+    ORDER BY ID
+"""
+
+def sale_row_to_purchase(row):
+    return {
+        'seq': row[0],
+        'barcode': row[1],
+        'name': row[2],
+        'price': row[3],
+        'quantity': row[4],
+        'purchase_date': row[5].strftime('%Y-%m-%d %H:%M:%S') if row[5] else ''
+    }
+
+def parse_since(value):
+    # ?since= 값 (숫자가 아니면 None)
+    return int(value) if value and value.lstrip('-').isdigit() else None
+
+def recent_purchases_params(since=0, limit=RECENT_PURCHASES_MAX):
+    return {'since': since or 0, 'limit': limit}
+
+def load_recent_purchases_from_sale(since=0, limit=RECENT_PURCHASES_MAX):
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(RECENT_PURCHASES_SQL, recent_purchases_params(since, limit))
+        return [sale_row_to_purchase(row) for row in cursor]
+    finally:
+        cursor.close()
+        conn.close()
+
+def get_recent_purchases_since(since=0):
+    if RECENT_PURCHASES_SOURCE == 'sale':
+        return load_recent_purchases_from_sale(since)
+    state = recent_purchases_states.get()
+    if not state['warmed']:
+        warm_recent_purchases()
+    with state['lock']:
+        return [entry for entry in state['entries'] if entry['seq'] > since]
+
+def warm_recent_purchases():
+    # 시작 시 SALE 의 최근 기록으로 링 버퍼를 채움
+    try:
+        record_recent_purchases(load_recent_purchases_from_sale())
+        recent_purchases_states.get()['warmed'] = True
+    except Exception as e:
+        print(f"최근 구매 기록 불러오기 오류: {str(e)}")
+
+# 상품 구매 처리 (AI 구매와 부하 생성기가 함께 사용)
+def sample_products(cursor, count):
+    # 재고 스냅샷에서 무작위 바코드를 골라 그 행만 DB 에서 다시 읽음 (전체 정렬 없이 count 개, 가격은 apply_discounts 로 할인)
+    barcodes = pick_in_stock_barcodes(count)
+    if not barcodes:
+        return []
+    binds = {f'b{index}': barcode_number for index, barcode_number in enumerate(barcodes)}
+    cursor.execute(
+        "SELECT BARCODE, PRODUCT_NAME, PRICE, EXPIRATION_DATE FROM PRODUCTS "
+        f"WHERE QUANTITY > 0 AND BARCODE IN ({', '.join(':' + name for name in binds)})",
+        binds
+    )
+    return priced_sample(cursor.fetchall())
+
+def pick_in_stock_barcodes(count):
+    # 정렬된 바코드 목록에서 무작위 위치를 뽑고 품절만 걸러냄 (품절이 많아 모자라면 재고 있는 목록에서 다시 뽑음)
+    refresh_inventory_snapshot()
+    inventory = inventory_states.get()
+    with inventory['lock']:
+        barcodes = inventory['snapshot']['barcodes']
+        out_of_stock = inventory['snapshot']['out_of_stock']
+        if len(barcodes) <= len(out_of_stock):
+            return []
+        picked = [barcode_number for barcode_number in random.sample(barcodes, min(len(barcodes), count * 2))
+                  if barcode_number not in out_of_stock][:count]
+        if len(picked) < count and len(picked) < len(barcodes) - len(out_of_stock):
+            in_stock = [barcode_number for barcode_number in barcodes if barcode_number not in out_of_stock]
+            picked = random.sample(in_stock, min(len(in_stock), count))
+        return picked
+
+def priced_sample(rows):
+    # (바코드, 상품명, 정가, 유통기한) 행에 임박 할인을 적용해 (바코드, 상품명, 판매가, 유통기한) 로 돌려줌
+    products = apply_discounts([
+        {'barcode': row[0], 'name': row[1], 'price': row[2], 'expiration_date': row[3]}
+        for row in rows
+    ])
+    return [
+        (product['barcode'], product['name'], product['price'], product['expiration_date'])
+        for product in products
+    ]
+
+def purchase_products(cursor, products):
+    # 상품마다 1개씩 구매: 재고 차감과 SALE 기록을 배열 DML 로 처리 (커밋은 호출한 쪽에서)
+    cursor.executemany(
+        "UPDATE PRODUCTS SET QUANTITY = QUANTITY - 1 WHERE BARCODE = :1 AND QUANTITY > 0",
+        [(product[0],) for product in products],
+        arraydmlrowcounts=True
+    )
+    # 그 사이 재고가 떨어진 상품은 제외
+    bought = [product for product, count in zip(products, cursor.getarraydmlrowcounts()) if count]
+    if not bought:
+        return []
+
+    sale_ids = cursor.var(int, arraysize=len(bought))
+    cursor.setinputsizes(None, None, None, None, sale_ids)
+    cursor.executemany(
+        "INSERT INTO SALE (ID, BARCODE, PRODUCT_NAME, EXPIRATION_DATE, QUANTITY, PRICE, SALE_DATE) "
+        "VALUES (SALE_SEQ.NEXTVAL, :1, :2, :3, 1, :4, SYSDATE) "
+        "RETURNING ID INTO :5",
+        [(product[0], product[1], product[3], product[2]) for product in bought]
+    )
+    record_sales_rollups(cursor, [
+        {'barcode': product[0], 'product_name': product[1], 'quantity': 1, 'price': product[2]}
+        for product in bought
+    ])
+
+    purchase_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    return [
+        {
+            'seq': sale_ids.getvalue(index)[0],
+            'barcode': product[0],
+            'name': product[1],
+            'price': product[2],
+            'quantity': 1,
+            'purchase_date': purchase_date
+        }
+        for index, product in enumerate(bought)
+    ]
+
+def after_purchases_committed(purchases):
+    # 커밋된 구매를 재고 캐시/최근 구매 기록/이벤트에 반영
+    if not purchases:
+        return
+    deltas = {}
+    for purchase in purchases:
+        deltas[purchase['barcode']] = deltas.get(purchase['barcode'], 0) - purchase['quantity']
+    adjust_inventory_quantities(deltas)
+    record_recent_purchases(purchases)
+    bump_sales_version()
+    for barcode_number, delta in deltas.items():
+        publish_event('stock_decremented', {'barcode': barcode_number, 'delta': delta})
+    for purchase in purchases:
+        publish_event('purchase', purchase)
+
+# 장바구니 결제 (한 트랜잭션에서 재고 차감 + 판매 기록, 하나라도 부족하면 전체 취소)
+CHECKOUT_MAX_LINES = 200
+
+def parse_cart_lines(items):
+    # 같은 바코드는 합치고, 행 잠금 순서를 고정하기 위해 바코드 순으로 정렬
+    if not isinstance(items, list) or not items:
+        raise ValueError('장바구니가 비어 있습니다.')
+    if len(items) > CHECKOUT_MAX_LINES:
+        raise ValueError(f'장바구니에는 최대 {CHECKOUT_MAX_LINES}개 항목까지 담을 수 있습니다.')
+    quantities = {}
+    for item in items:
+        barcode_number = str(item.get('barcode') or '').strip() if isinstance(item, dict) else ''
+        quantity = item.get('quantity', 1) if isinstance(item, dict) else None
+        if not barcode_number or not isinstance(quantity, int) or isinstance(quantity, bool) or quantity <= 0:
+            raise ValueError('각 항목에는 바코드와 1 이상의 정수 수량이 필요합니다.')
+        quantities[barcode_number] = quantities.get(barcode_number, 0) + quantity
+    return sorted(quantities.items())
+
+CHECKOUT_UPDATE_SQL = """
+    UPDATE PRODUCTS SET QUANTITY = QUANTITY - :quantity
+    WHERE BARCODE = :barcode AND QUANTITY >= :quantity
+    RETURNING PRODUCT_NAME, EXPIRATION_DATE, PRICE, QUANTITY
+    INTO :out_name, :out_expiration, :out_price, :out_remaining
+"""
+CHECKOUT_SALE_SQL = (
+    "INSERT INTO SALE (ID, BARCODE, PRODUCT_NAME, EXPIRATION_DATE, QUANTITY, PRICE, SALE_DATE) "
+    "VALUES (SALE_SEQ.NEXTVAL, :1, :2, :3, :4, :5, SYSDATE) "
+    "RETURNING ID INTO :6"
+)
+
+def checkout_update_binds(cursor, lines):
+    # 재고 차감 UPDATE 의 RETURNING 출력 변수를 준비하고 바인드 목록과 함께 반환
+    db = get_db_module()
+    count = len(lines)
+    out_vars = {
+        'out_name': cursor.var(str, arraysize=count),
+        'out_expiration': cursor.var(db.DB_TYPE_DATE, arraysize=count),
+        'out_price': cursor.var(db.DB_TYPE_NUMBER, arraysize=count),
+        'out_remaining': cursor.var(int, arraysize=count)
+    }
+    cursor.setinputsizes(**out_vars)
+    return out_vars, [{'barcode': barcode_number, 'quantity': quantity} for barcode_number, quantity in lines]
+
+def checkout_products(lines, out_vars):
+    # 판매가는 유통기한 임박 할인 등급표로 계산
+    return apply_discounts([
+        {
+            'barcode': barcode_number,
+            'name': out_vars['out_name'].getvalue(index)[0],
+            'expiration_date': out_vars['out_expiration'].getvalue(index)[0],
+            'price': out_vars['out_price'].getvalue(index)[0] or 0,
+            'quantity': quantity,
+            'remaining': out_vars['out_remaining'].getvalue(index)[0]
+        }
+        for index, (barcode_number, quantity) in enumerate(lines)
+    ])
+
+def checkout_sale_binds(cursor, products):
+    sale_ids = cursor.var(int, arraysize=len(products))
+    cursor.setinputsizes(None, None, None, None, None, sale_ids)
+    return sale_ids, [
+        (product['barcode'], product['name'], product['expiration_date'], product['quantity'], product['price'])
+        for product in products
+    ]
+
+def checkout_rollup_sales(products):
+    return [
+        {'barcode': product['barcode'], 'product_name': product['name'],
+         'quantity': product['quantity'], 'price': product['price']}
+        for product in products
+    ]
+
+def checkout_purchases(products, sale_ids):
+    purchase_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    return [
+        {
+            'seq': sale_ids.getvalue(index)[0],
+            'barcode': product['barcode'],
+            'name': product['name'],
+            'price': product['price'],
+            'discount': product['discount'],
+            'quantity': product['quantity'],
+            'remaining': product['remaining'],
+            'purchase_date': purchase_date
+        }
+        for index, product in enumerate(products)
+    ]
+
+def checkout_cart(cursor, lines):
+    # 재고가 충분할 때만 차감하는 UPDATE 를 배열로 실행하고, 모두 성공하면 SALE 을 한 번에 기록
+    # 반환: (구매 목록, 실패한 (바코드, 수량) 목록) - 커밋/롤백은 호출한 쪽에서
+    out_vars, update_rows = checkout_update_binds(cursor, lines)
+    cursor.executemany(CHECKOUT_UPDATE_SQL, update_rows, arraydmlrowcounts=True)
+    failed = failed_checkout_lines(lines, cursor.getarraydmlrowcounts())
+    if failed:
+        return [], failed
+
+    products = checkout_products(lines, out_vars)
+    sale_ids, sale_rows = checkout_sale_binds(cursor, products)
+    cursor.executemany(CHECKOUT_SALE_SQL, sale_rows)
+    record_sales_rollups(cursor, checkout_rollup_sales(products))
+    return checkout_purchases(products, sale_ids), []
+
+def failed_checkout_lines(lines, rowcounts):
+    # 재고 부족/없는 상품이라 UPDATE 가 0행이었던 (바코드, 수량) 항목
+    return [line for line, updated in zip(lines, rowcounts) if not updated]
+
+def rejected_lines_query(failed):
+    binds = {f'b{index}': barcode_number for index, (barcode_number, _) in enumerate(failed)}
+    sql = f"SELECT BARCODE, QUANTITY FROM PRODUCTS WHERE BARCODE IN ({', '.join(':' + name for name in binds)})"
+    return sql, binds
+
+def describe_rejected(failed, available):
+    return [
+        {
+            'barcode': barcode_number,
+            'requested': quantity,
+            'available': available.get(barcode_number),
+            'error': '재고 부족' if barcode_number in available else '제품을 찾을 수 없습니다.'
+        }
+        for barcode_number, quantity in failed
+    ]
+
+def describe_rejected_lines(cursor, failed):
+    # 실패한 항목의 현재 재고를 한 번에 조회해 사유를 붙임
+    cursor.execute(*rejected_lines_query(failed))
+    return describe_rejected(failed, dict(cursor.fetchall()))
+
+def process_checkout(lines):
+    ensure_schema()
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        purchases, failed = checkout_cart(cursor, lines)
+        if failed:
+            conn.rollback()
+            return [], describe_rejected_lines(cursor, failed)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+    after_purchases_committed(purchases)
+    return purchases, []
+
+# AI 구매 로직
+def ai_purchase_simulation():
+    ensure_schema()
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    
+    try:
+        # 재고가 있는 상품 1~3개를 DB 에서 무작위로 선택
+        products = sample_products(cursor, random.randint(1, 3))
+        
+        if not products:
+            print("구매할 상품이 없습니다.")
+            return []
+        
+        # 한 트랜잭션으로 재고 차감 + 판매 기록
+        purchases = purchase_products(cursor, products)
+        conn.commit()
+        after_purchases_committed(purchases)
+        for purchase in purchases:
+            print(f"AI가 상품 바코드 {purchase['barcode']}를 구매했습니다.")
+        return purchases
+    except Exception as e:
+        conn.rollback()
+        print(f"구매 처리 중 오류 발생: {str(e)}")
+        raise  # 스케줄러 실행 기록(timed_job)에 실패로 남김
+    finally:
+        cursor.close()
+        conn.close()
+
+# 부하 생성기 (ai_purchase_simulation 과 같은 구매 경로로 대량 구매를 발생시켜 용량 테스트)
+LOADGEN_ENABLED = os.environ.get('LOADGEN_ENABLED', '0') == '1'  # 실제 재고/판매가 바뀌므로 명시적으로 켜야 함
+LOADGEN_CANDIDATE_BATCH = 500  # 워커가 한 번에 뽑아 두는 후보 상품 수
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0
+    index = min(len(sorted_values) - 1, max(0, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+def run_load_generator(rate=100, concurrency=4, duration=10, max_items=3):
+    # rate: 초당 구매(트랜잭션) 수, concurrency: 동시 워커 수, duration: 실행 시간(초)
+    ensure_schema()
+    concurrency = max(1, min(concurrency, POOL_MAX))  # 풀 크기를 넘지 않게
+    interval = concurrency / rate  # 워커 하나의 구매 간격
+    stats_lock = threading.Lock()
+    stats = {'purchases': 0, 'items': 0, 'failed': 0, 'latencies': []}
+    started = time.monotonic()
+    stop_at = started + duration
+    store_id = get_current_store_id()  # 새 스레드는 현재 매장을 물려받지 않으므로 넘겨줌
+
+    def worker():
+        with store_context(store_id):
+            run_worker()
+
+    def run_worker():
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        candidates = []
+        next_tick = time.monotonic()
+        try:
+            while time.monotonic() < stop_at:
+                # 후보 상품은 한 번에 뽑아 두고 가끔 새로 뽑음
+                if not candidates or random.random() < 0.01:
+                    candidates = sample_products(cursor, LOADGEN_CANDIDATE_BATCH)
+                    if not candidates:
+                        break
+                chosen = random.sample(candidates, min(random.randint(1, max_items), len(candidates)))
+                tick_start = time.perf_counter()
+                try:
+                    purchases = purchase_products(cursor, chosen)
+                    conn.commit()
+                except Exception as e:
+                    conn.rollback()
+                    with stats_lock:
+                        stats['failed'] += 1
+                    print(f"부하 생성 구매 오류: {str(e)}")
+                    continue
+                latency_ms = (time.perf_counter() - tick_start) * 1000
+                after_purchases_committed(purchases)
+                with stats_lock:
+                    stats['purchases'] += 1
+                    stats['items'] += len(purchases)
+                    stats['latencies'].append(latency_ms)
+
+                next_tick += interval
+                delay = next_tick - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+        finally:
+            cursor.close()
+            conn.close()
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    elapsed = time.monotonic() - started
+    latencies = sorted(stats['latencies'])
+    return {
+        'rate': rate,
+        'concurrency': concurrency,
+        'duration_s': round(elapsed, 2),
+        'purchases': stats['purchases'],
+        'items': stats['items'],
+        'failed': stats['failed'],
+        'purchases_per_s': round(stats['purchases'] / elapsed, 1) if elapsed else 0,
+        'items_per_s': round(stats['items'] / elapsed, 1) if elapsed else 0,
+        'latency_ms': {
+            'p50': round(percentile(latencies, 50), 2),
+            'p95': round(percentile(latencies, 95), 2),
+            'p99': round(percentile(latencies, 99), 2),
+            'max': round(latencies[-1], 2) if latencies else 0
+        }
+    }
+
+# 여러 워커 프로세스 중 한 곳에서만 실행할 스케줄러 작업 (파일 잠금 또는 DB 리스)
+SCHEDULER_ENABLED = os.environ.get('SCHEDULER_ENABLED', '1') == '1'  # 0 이면 create_app() 이 스케줄러를 띄우지 않음
+SCHEDULER_LOCK = os.environ.get('SCHEDULER_LOCK', 'file')  # file: 같은 서버의 워커끼리, db: 여러 서버
+SCHEDULER_LOCK_DIR = os.environ.get('SCHEDULER_LOCK_DIR', 'locks')
+SCHEDULER_OWNER = f"{os.environ.get('HOSTNAME', 'local')}:{os.getpid()}"
+SCHEDULER_MISFIRE_GRACE = 3600  # 늦어진 실행은 1시간까지 허용하고, 밀린 실행은 한 번으로 합침
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+def scheduler_state_path(name):
+    return os.path.join(SCHEDULER_LOCK_DIR, f'{name}.json')
+
+def read_scheduler_state(name):
+    try:
+        with open(scheduler_state_path(name), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def run_with_file_lease(name, min_gap, func):
+    # 작업별 잠금 파일을 쥔 프로세스만 실행 (최근 min_gap 초 안에 실행됐으면 같은 회차로 보고 건너뜀)
+    os.makedirs(SCHEDULER_LOCK_DIR, exist_ok=True)
+    with open(os.path.join(SCHEDULER_LOCK_DIR, f'{name}.lock'), 'a+') as lock_file:
+        try:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            return None  # 다른 프로세스가 실행 중
+        try:
+            state = read_scheduler_state(name)
+            if state.get('last_started') and time.time() - state['last_started'] < min_gap:
+                return None
+            state.update({'owner': SCHEDULER_OWNER, 'last_started': time.time()})
+            write_json_atomic(scheduler_state_path(name), state)
+            outcome = func()
+            state.update(outcome)
+            write_json_atomic(scheduler_state_path(name), state)
+            return outcome
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+            else:
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+def run_with_db_lease(name, min_gap, lease_seconds, func):
+    # 리스가 비어 있고 최근 min_gap 초 안에 시작된 적이 없을 때만 UPDATE 가 성공 -> 그 프로세스만 실행
+    ensure_schema()
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            MERGE INTO SCHEDULER_RUNS r
+            USING (SELECT :name JOB_NAME FROM DUAL) s
+            ON (r.JOB_NAME = s.JOB_NAME)
+            WHEN NOT MATCHED THEN INSERT (JOB_NAME) VALUES (s.JOB_NAME)
+        """, {'name': name})
+        cursor.execute("""
+            UPDATE SCHEDULER_RUNS
+            SET OWNER = :owner,
+                LEASE_UNTIL = SYSTIMESTAMP + NUMTODSINTERVAL(:lease_seconds, 'SECOND'),
+                LAST_STARTED = SYSTIMESTAMP
+            WHERE JOB_NAME = :name
+              AND (LEASE_UNTIL IS NULL OR LEASE_UNTIL < SYSTIMESTAMP)
+              AND (LAST_STARTED IS NULL OR LAST_STARTED < SYSTIMESTAMP - NUMTODSINTERVAL(:min_gap, 'SECOND'))
+        """, {'owner': SCHEDULER_OWNER, 'lease_seconds': lease_seconds, 'name': name, 'min_gap': min_gap})
+        acquired = cursor.rowcount == 1
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+    if not acquired:
+        return None
+
+    outcome = func()
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            UPDATE SCHEDULER_RUNS
+            SET LEASE_UNTIL = NULL, LAST_FINISHED = SYSTIMESTAMP,
+                LAST_DURATION_MS = :duration_ms, LAST_OUTCOME = :outcome, LAST_ERROR = :error
+            WHERE JOB_NAME = :name AND OWNER = :owner
+        """, {
+            'duration_ms': outcome['last_duration_ms'],
+            'outcome': outcome['last_outcome'],
+            'error': (outcome['last_error'] or '')[:1000] or None,
+            'name': name,
+            'owner': SCHEDULER_OWNER
+        })
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+    return outcome
+
+def leader_job(func, min_gap, lease_seconds=3600):
+    # 모든 워커가 같은 시각에 깨어나도 한 곳에서만 func 를 실행하고, 실행 시간/결과를 기록
+    # (func 는 오류를 삼키지 말고 올려 보내야 last_outcome 과 outcome 지표에 error 로 남음)
+    name = func.__name__
+    timed = timed_job(func)
+
+    def execute():
+        start = time.perf_counter()
+        try:
+            timed()
+            outcome, error = 'success', None
+        except Exception as e:
+            print(f"스케줄러 작업 오류 ({name}): {str(e)}")
+            outcome, error = 'error', str(e)
+        return {
+            'last_finished': time.time(),
+            'last_duration_ms': round((time.perf_counter() - start) * 1000, 1),
+            'last_outcome': outcome,
+            'last_error': error
+        }
+
+    def run_store(store_id):
+        # 리스는 매장마다 따로 잡음 (한 매장이 실행 중이어도 다른 매장은 진행)
+        lease_name = store_job_name(name, store_id)
+        try:
+            if SCHEDULER_LOCK == 'db':
+                result = run_with_db_lease(lease_name, min_gap, lease_seconds, execute)
+            else:
+                result = run_with_file_lease(lease_name, min_gap, execute)
+        except Exception as e:
+            print(f"스케줄러 리스 확인 중 오류 발생 ({lease_name}): {str(e)}")
+            return
+        if result is None:
+            increment_metric('scheduler_job_skipped_total', (name,))
+
+    @functools.wraps(func)
+    def run():
+        each_store_in_turn(run_store)  # APScheduler 스레드에서 차례로 (chain_executor 는 요청 전용)
+    return run
+
+def store_job_name(name, store_id=None):
+    # 스케줄러 리스/실행 기록 이름 (기본 매장은 기존 이름 그대로)
+    store_id = store_id or get_current_store_id()
+    return name if store_id == DEFAULT_STORE_ID else f'{name}@{store_id}'
+
+def each_store(func):
+    # 모든 워커에서 실행하는 스케줄러 작업을 매장마다 실행 (한 매장의 오류가 다른 매장을 막지 않음)
+    def run_store(store_id):
+        try:
+            func()
+        except Exception as e:
+            print(f"스케줄러 작업 오류 ({func.__name__}@{store_id}): {str(e)}")
+
+    @functools.wraps(func)
+    def run():
+        each_store_in_turn(run_store)  # APScheduler 스레드에서 차례로 (chain_executor 는 요청 전용)
+    return run
+
+def add_leader_job(func, trigger, min_gap, catch_up=False, **trigger_args):
+    # cron 트리거만 사용: 모든 워커가 같은 시각에 실행을 시도해야 리스로 한 번만 실행됨
+    job = leader_job(func, min_gap)
+    scheduler.add_job(job, trigger, coalesce=True, misfire_grace_time=SCHEDULER_MISFIRE_GRACE, **trigger_args)
+    if catch_up:
+        # 모든 워커가 꺼져 있어 놓친 회차는 시작 시 한 번만 실행 (min_gap 안에 실행된 적이 있으면 건너뜀)
+        scheduler.add_job(job, 'date', id=f'{func.__name__}_catch_up')
+
+def get_scheduler_jobs():
+    jobs = []
+    for job in (scheduler.get_jobs() if scheduler else []):
+        jobs.append({
+            'id': job.id,
+            'name': job.name,
+            'next_run_time': job.next_run_time.strftime('%Y-%m-%d %H:%M:%S') if job.next_run_time else None
+        })
+    return jobs
+
+scheduler = None  # start_scheduler() 에서 생성
+scheduler_lock = threading.Lock()
+
+# 유통기한 임박/만료 구간으로 넘어간 상품을 찾아 이벤트 발행
+expiry_states = StoreLocal(lambda: {'alert': None, 'expired': None})
+expiry_state_lock = threading.Lock()
+
+def check_expiry_transitions():
+    try:
+        # 유통기한 인덱스의 경계를 현재 시각으로 옮겨 구간이 바뀐 상품만 찾음
+        now = datetime.now()
+        alert = {row[0]: row for row in get_expiry_rows('alert', now)}
+        expired = {row[0]: row for row in get_expiry_rows('expired', now)}
+        expiry_state = expiry_states.get()
+        with expiry_state_lock:
+            previous_alert, previous_expired = expiry_state['alert'], expiry_state['expired']
+            expiry_state.update({'alert': set(alert), 'expired': set(expired)})
+        if previous_alert is None:
+            return  # 첫 실행은 기준 상태만 기록
+        for barcode_number in set(alert) - previous_alert:
+            row = alert[barcode_number]
+            publish_event('product_alert', {'barcode': barcode_number, 'name': row[1],
+                                            'expiration_date': row[2].strftime('%Y-%m-%d'), 'quantity': row[3]})
+        for barcode_number in set(expired) - previous_expired:
+            row = expired[barcode_number]
+            publish_event('product_expired', {'barcode': barcode_number, 'name': row[1],
+                                              'expiration_date': row[2].strftime('%Y-%m-%d') if row[2] else ''})
+    except Exception as e:
+        print(f"유통기한 상태 확인 중 오류 발생: {str(e)}")
+
+def recent_purchases_payload(purchases, since):
+    if since is None:
+        return purchases
+    return {
+        'purchases': purchases,
+        'last_seq': purchases[-1]['seq'] if purchases else since
+    }
+
+def checkout_payload(purchases):
+    return {
+        'message': '결제가 완료되었습니다.',
+        'sale_ids': [purchase['seq'] for purchase in purchases],
+        'lines': purchases,
+        'total': sum(purchase['price'] * purchase['quantity'] for purchase in purchases)
+    }
+
+# 통계 조회용 컬럼 단위 조회 (pyarrow 가 있으면 Oracle 결과를 행 튜플 없이 Arrow 배치로 받음)
+PYARROW_AVAILABLE = importlib.util.find_spec('pyarrow') is not None
+
+STATS_FETCH_BATCH = int(os.environ.get('STATS_FETCH_BATCH', 50000))  # 한 번에 받을 행 수
+SALES_HISTORY_MAX_DAYS = int(os.environ.get('SALES_HISTORY_MAX_DAYS', 400))  # 판매 이력 내보내기 최대 기간
+STATS_FORMATS = {
+    'json': 'application/json',
+    'csv': 'text/csv',
+    'arrow': 'application/vnd.apache.arrow.stream',
+    'parquet': 'application/vnd.apache.parquet'
+}
+
+DAILY_SALES_SQL = """
+    SELECT 
+        TO_CHAR(SALE_DAY, 'YYYY-MM-DD') AS sale_date, 
+        REVENUE AS total_revenue 
+    FROM SALES_DAILY_STORE
+    WHERE SALE_DAY >= TRUNC(SYSDATE) - 30  -- Last 30 days
+    ORDER BY SALE_DAY
+"""
+MONTHLY_SALES_SQL = """
+    SELECT 
+        TO_CHAR(SALE_MONTH, 'YYYY-MM') AS month, 
+        QUANTITY AS total_quantity, 
+        PRICE_SUM / NULLIF(SALE_COUNT, 0) AS price
+    FROM SALES_MONTHLY_STORE
+    WHERE SALE_MONTH >= TRUNC(SYSDATE, 'YYYY') -- 이번 년도부터의 데이터
+    ORDER BY SALE_MONTH
+"""
+SALES_HISTORY_SQL = """
+    SELECT SALE_DATE, BARCODE, PRODUCT_NAME, QUANTITY, PRICE, EXPIRATION_DATE
+    FROM SALE
+    WHERE SALE_DATE >= :start_day AND SALE_DATE < :end_day
+    ORDER BY SALE_DATE, ID
+"""
+SALES_HISTORY_COLUMNS = ['sale_date', 'barcode', 'name', 'quantity', 'price', 'expiration_date']
+
+def parse_stats_format(value, default='json'):
+    fmt = (value or default).lower()
+    if fmt not in STATS_FORMATS:
+        raise ValueError('format 은 json, csv, arrow, parquet 중 하나여야 합니다.')
+    if fmt in ('arrow', 'parquet') and not PYARROW_AVAILABLE:
+        raise ValueError(f'{fmt} 형식은 pyarrow 가 설치되어 있어야 합니다.')
+    return fmt
+
+def iter_arrow_batches(sql, params=None, columns=None):
+    # STATS_FETCH_BATCH 행씩 Arrow RecordBatch 로 받음 (columns 를 주면 컬럼 이름을 바꿈)
+    import pyarrow
+    conn = get_db_connection()
+    elapsed = 0.0
+    try:
+        frames = conn.fetch_df_batches(sql, params or {}, STATS_FETCH_BATCH)
+        while True:
+            start = time.perf_counter()
+            frame = next(frames, None)
+            elapsed += time.perf_counter() - start
+            if frame is None:
+                break
+            table = pyarrow.table(frame)
+            if columns:
+                table = table.rename_columns(columns)
+            record_rows_fetched(table.num_rows)
+            yield from table.to_batches()
+    finally:
+        record_db_call(sql, elapsed)
+        conn.close()
+
+def fetch_dataframe(sql, params=None, columns=None):
+    # 결과 전체를 DataFrame 으로 (pyarrow 가 없으면 fetchall 결과를 한 번에 변환)
+    import pandas as pd
+    if PYARROW_AVAILABLE:
+        import pyarrow
+        batches = list(iter_arrow_batches(sql, params, columns))
+        if batches:
+            return pyarrow.Table.from_batches(batches).to_pandas()
+        return pd.DataFrame(columns=columns)
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.arraysize = STATS_FETCH_BATCH
+        cursor.execute(sql, params or {})
+        rows = cursor.fetchall()
+        names = columns or [column[0].lower() for column in cursor.description]
+    finally:
+        cursor.close()
+        conn.close()
+    return pd.DataFrame(rows, columns=names)
+
+class ChunkSink(io.RawIOBase):
+    # Arrow 작성기가 쓴 바이트를 모아 두었다가 응답으로 꺼내 감 (tell 은 누적 위치)
+    def __init__(self):
+        super().__init__()
+        self.chunks = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+def open_arrow_writer(fmt, sink, schema):
+    if fmt == 'arrow':
+        import pyarrow.ipc
+        return pyarrow.ipc.new_stream(sink, schema)
+    if fmt == 'parquet':
+        import pyarrow.parquet
+        return pyarrow.parquet.ParquetWriter(sink, schema)
+    import pyarrow.csv
+    sink.write('\ufeff'.encode('utf-8'))  # BOM: 엑셀에서 한글이 깨지지 않도록
+    return pyarrow.csv.CSVWriter(sink, schema)
+
+def stream_arrow_table(sql, params, columns, fmt):
+    # 배치를 받는 대로 csv/arrow/parquet 으로 써서 내보냄 (전체 결과를 메모리에 두지 않음)
+    import pyarrow
+    sink = ChunkSink()
+    writer = None
+    try:
+        for batch in iter_arrow_batches(sql, params, columns):
+            if writer is None:
+                writer = open_arrow_writer(fmt, sink, batch.schema)
+            writer.write_batch(batch)
+            yield sink.drain()
+        if writer is None:
+            writer = open_arrow_writer(fmt, sink, pyarrow.schema([(column, pyarrow.null()) for column in columns]))
+        writer.close()
+        yield sink.drain()
+    except Exception as e:
+        # 헤더를 이미 보냈으므로 상태 코드를 바꿀 수 없음, 로그만 남기고 응답을 끊음
+        print(f"통계 내보내기 오류: {str(e)}")
+        raise
+
+def stream_csv_rows(sql, params, columns):
+    # pyarrow 가 없을 때의 CSV 내보내기 (fetchmany 묶음 단위로 기록)
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.arraysize = STATS_FETCH_BATCH
+        cursor.execute(sql, params or {})
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        buffer.write('\ufeff')
+        writer.writerow(columns)
+        while True:
+            rows = cursor.fetchmany()
+            if not rows:
+                break
+            writer.writerows(rows)
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue().encode('utf-8')
+    finally:
+        cursor.close()
+        conn.close()
+
+def stats_table_response(sql, params, columns, fmt, name):
+    # csv/arrow/parquet 파일로 스트리밍 다운로드
+    filename = f"{name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{fmt}"
+    if PYARROW_AVAILABLE:
+        body = stream_arrow_table(sql, params, columns, fmt)
+    else:
+        body = stream_csv_rows(sql, params, columns)
+    return Response(stream_in_store(body), mimetype=STATS_FORMATS[fmt],
+                    headers={'Content-Disposition': f'attachment; filename="{filename}"'})
+
+def query_daily_sales():
+    # 일별 집계 테이블에서 조회 (최근 30일은 최대 31행)
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(DAILY_SALES_SQL)
+        sales_data = cursor.fetchall()
+    finally:
+        cursor.close()
+        conn.close()
+
+    # Convert to JSON format
+    return [{'sale_date': row[0], 'total_revenue': row[1]} for row in sales_data]
+
+def parse_history_range(args):
+    # start/end (YYYY-MM-DD, end 포함) -> [start_day, end_day) 구간, 기본은 최근 30일
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    try:
+        end_day = datetime.strptime(args['end'], '%Y-%m-%d') + timedelta(days=1) if args.get('end') else today + timedelta(days=1)
+        start_day = datetime.strptime(args['start'], '%Y-%m-%d') if args.get('start') else end_day - timedelta(days=30)
+    except ValueError:
+        raise ValueError('start/end 는 YYYY-MM-DD 형식이어야 합니다.')
+    if start_day >= end_day:
+        raise ValueError('start 는 end 보다 앞이어야 합니다.')
+    if (end_day - start_day).days > SALES_HISTORY_MAX_DAYS:
+        raise ValueError(f'한 번에 최대 {SALES_HISTORY_MAX_DAYS}일까지 내보낼 수 있습니다.')
+    return start_day, end_day
 
-def get_db_connection():
-    # 데이터베이스 연결 설정
-    conn = oracledb.connect(
-        user='system',          # 사용자 이름
-        password='oradb1',     # 비밀번호
-        dsn='localhost/xe'     # DSN (데이터베이스 서비스 이름)
+# 입고 엑셀/CSV 내보내기 (행을 하나씩 파일에 써서 메모리 사용량이 행 수와 무관)
+RESTOCK_EXPORT_DIR = os.environ.get('RESTOCK_EXPORT_DIR', 'exports')
+RESTOCK_EXPORT_INLINE_ROWS = int(os.environ.get('RESTOCK_EXPORT_INLINE_ROWS', 5000))  # 이보다 많으면 백그라운드 작업으로 생성
+RESTOCK_EXPORT_MAX_AGE = float(os.environ.get('RESTOCK_EXPORT_MAX_AGE', 60))  # 분 (이보다 오래된 파일은 정리, 아직 받아 가지 않은 작업 파일은 제외)
+RESTOCK_EXPORT_FETCH_BATCH = 1000  # 커서에서 한 번에 가져와 시트에 쓸 행 수
+RESTOCK_EXPORT_FORMATS = {
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'csv': 'text/csv'
+}
+RESTOCK_EXPORT_NAME = re.compile(r'^입고_필요_제품_\d{8}_\d{6}_[0-9a-f]{8}\.(xlsx|csv)$')
+
+def write_restock_export(header, rows, fmt):
+    # rows 를 한 행씩 현재 매장의 내보내기 디렉토리에 기록하고 (파일명, 행 수) 반환
+    export_dir = store_path(RESTOCK_EXPORT_DIR)
+    os.makedirs(export_dir, exist_ok=True)
+    filename = f"입고_필요_제품_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}.{fmt}"
+    path = os.path.join(export_dir, filename)
+    tmp_path = path + '.tmp'
+    count = 0
+    try:
+        if fmt == 'csv':
+            with open(tmp_path, 'w', encoding='utf-8-sig', newline='') as f:  # BOM: 엑셀에서 한글이 깨지지 않도록
+                writer = csv.writer(f)
+                writer.writerow(header)
+                for row in rows:
+                    writer.writerow(row)
+                    count += 1
+        else:
+            from openpyxl import Workbook
+            workbook = Workbook(write_only=True)  # 쓰기 전용 모드: 행을 바로 임시 파일로 내보냄
+            sheet = workbook.create_sheet()
+            sheet.append(header)
+            for row in rows:
+                sheet.append(row)
+                count += 1
+            workbook.save(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    prune_restock_exports()
+    return filename, count
+
+def prune_restock_exports():
+    # 만든 지 RESTOCK_EXPORT_MAX_AGE 분이 지난 파일만 지움 (백그라운드 작업 결과로 아직 다운로드되지 않은 파일은 남김)
+    export_dir = store_path(RESTOCK_EXPORT_DIR)
+    cutoff = time.time() - RESTOCK_EXPORT_MAX_AGE * 60
+    pending = get_pending_job_files('restock_export')
+    try:
+        for name in os.listdir(export_dir):
+            path = os.path.join(export_dir, name)
+            if RESTOCK_EXPORT_NAME.match(name) and name not in pending and os.path.getmtime(path) < cutoff:
+                os.remove(path)
+    except OSError as e:
+        print(f"내보내기 파일 정리 오류: {str(e)}")
+
+def send_restock_export(filename, fmt):
+    return send_file(
+        os.path.abspath(os.path.join(store_path(RESTOCK_EXPORT_DIR), filename)),
+        mimetype=RESTOCK_EXPORT_FORMATS[fmt],
+        as_attachment=True,
+        download_name=filename
     )
-    return conn
 
-@app.route('/')
-def index():
-    return render_template('code.html')
+def parse_export_format(value):
+    fmt = (value or 'xlsx').lower()
+    if fmt not in RESTOCK_EXPORT_FORMATS:
+        raise ValueError('format 은 xlsx 또는 csv 이어야 합니다.')
+    return fmt
+
+# 수량이 0개이거나 유통기한이 지난 제품 (is_expired_row 와 같은 조건, 유통기한 인덱스의 만료 구간과 같은 순서)
+RESTOCK_EXPORT_WHERE = "WHERE EXPIRATION_DATE < SYSDATE OR QUANTITY <= 0"
+RESTOCK_EXPORT_SQL = f"""
+    SELECT BARCODE, PRODUCT_NAME, EXPIRATION_DATE FROM PRODUCTS
+    {RESTOCK_EXPORT_WHERE}
+    ORDER BY EXPIRATION_DATE NULLS LAST, BARCODE
+"""
 
-@app.route('/api/products', methods=['GET'])
-def get_products():
+def count_restock_products():
+    conn = get_db_connection()
+    cursor = conn.cursor()
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT BARCODE, PRODUCT_NAME, EXPIRATION_DATE, QUANTITY, PRICE FROM PRODUCTS")
-        
-        products = []
-        for row in cursor:
-            product = {
-                'barcode': row[0],
-                'name': row[1],
-                'expiration_date': row[2].strftime('%Y-%m-%d') if row[2] else '',
-                'quantity': row[3],
-                'price': row[4]
-            }
-            products.append(product)
-        
+        cursor.execute(f"SELECT COUNT(*) FROM PRODUCTS {RESTOCK_EXPORT_WHERE}")
+        return cursor.fetchone()[0]
+    finally:
         cursor.close()
         conn.close()
-        return jsonify(products)
-    except Exception as e:
-        print("오류 발생:", str(e))  # 오류 메시지 출력
-        print("상세 오류:", traceback.format_exc())  # 상세 오류 출력
-        return jsonify({'error': str(e)}), 500
 
-@app.route('/generate_barcode', methods=['POST'])
-def generate_barcode():
-    try:
-        data = request.json
-        barcode_number = data.get('barcode')
-        
-        if not barcode_number:
-            return jsonify({'error': '바코드 번호가 필요합니다.'}), 400
-        
-        # 바코드 이미지 생성
-        image_path = generate_barcode_image(barcode_number)
-        
-        return jsonify({
-            'message': '바코드 생성 완료',
-            'filename': image_path
-        })
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+def export_restock_products(fmt):
+    # DB 커서에서 fetchmany 묶음으로 읽어 바로 파일에 기록 (메모리에는 한 묶음만 둠)
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    def rows():
+        while True:
+            batch = cursor.fetchmany()
+            if not batch:
+                break
+            for row in batch:
+                yield [row[0] or '', row[1] or '', row[2].strftime('%Y-%m-%d') if row[2] else '']
 
-@app.route('/products/alerts', methods=['GET'])
-def get_alert_products():
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT BARCODE, PRODUCT_NAME, EXPIRATION_DATE, QUANTITY, PRICE FROM PRODUCTS
-            WHERE EXPIRATION_DATE <= SYSDATE + 3 AND QUANTITY > 0
-        """)
-        products = []
-        for row in cursor:
-            product = {
-                'barcode': row[0] if row[0] else '정보 없음',
-                'name': row[1] if row[1] else '정보 없음',
-                'expiration_date': row[2].strftime('%Y-%m-%d') if row[2] else '정보 없음',
-                'quantity': row[3] if row[3] else 0,
-                'price': row[4] if row[4] else 0
-            }
-            expiration_date = row[2]
-            if expiration_date:
-                # 날짜만 비교 (시간 무시)
-                days_left = (expiration_date.date() - datetime.now().date()).days
-                if days_left == 3:
-                    product['price'] = round(product['price'] * 0.9)
-                    product['discount'] = '10%'
-                elif days_left == 2:
-                    product['price'] = round(product['price'] * 0.8)
-                    product['discount'] = '20%'
-                elif days_left == 1:
-                    product['price'] = round(product['price'] * 0.7)
-                    product['discount'] = '30%'
-                else:
-                    product['discount'] = '없음'
-            else:
-                product['discount'] = '없음'
-            products.append(product)
+        cursor.arraysize = RESTOCK_EXPORT_FETCH_BATCH
+        cursor.execute(RESTOCK_EXPORT_SQL)
+        filename, count = write_restock_export(['barcode', 'name', 'expiration_date'], rows(), fmt)
+    finally:
         cursor.close()
         conn.close()
-        return jsonify(products)
-    except Exception as e:
-        print(f"오류 발생: {str(e)}")
-        return jsonify({'error': str(e)}), 500
+    return {'file': filename, 'rows': count, 'download_url': store_url(f'/api/exports/{filename}')}
 
-@app.route('/products/expired', methods=['GET'])
-def get_expired_products():
+def query_monthly_sales():
+    # 월별 집계 테이블에서 조회 (평균 가격 = 가격 합 / 판매 건수)
+    conn = get_db_connection()
+    cursor = conn.cursor()
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        # 유통기한이 지난 제품의 상품명만 조회
-        cursor.execute("""
-            SELECT 
-                BARCODE AS product_barcode, 
-                PRODUCT_NAME AS product_name, 
-                EXPIRATION_DATE AS expiration_date 
-            FROM PRODUCTS
-            WHERE EXPIRATION_DATE < SYSDATE OR QUANTITY <= 0
-        """)
-        products = []
-        for row in cursor:
-            product = {
-                'barcode': row[0] if row[0] else '',
-                'name': row[1] if row[1] else '',
-                'expiration_date': row[2].strftime('%Y-%m-%d') if row[2] else ''
-            }
-            products.append(product)
+        cursor.execute(MONTHLY_SALES_SQL)
+        sales_data = cursor.fetchall()
+    finally:
         cursor.close()
         conn.close()
-        return jsonify(products)  # 상품명 리스트 반환
-    except Exception as e:
-        print(f"오류 발생: {str(e)}", file=sys.stderr)
-        return jsonify({'error': str(e)}), 500
 
-@app.route('/api/add_product', methods=['POST'])
-def add_product():
-    data = request.json
-    name = data.get('name')
-    expiration = data.get('expiration')
-    barcode_number = data.get('barcode')
+    # 결과를 JSON 형식으로 변환
+    return [{'month': row[0], 'total_quantity': row[1], 'price': row[2]} for row in sales_data]
+
+# 전 매장 판매 통계: 매장별 집계 테이블을 동시에 조회하고 부분 합계를 더함
+# (월 평균 가격은 매장 평균의 평균이 아니라 가격 합 / 판매 건수를 합친 뒤 계산)
+CHAIN_MONTHLY_SALES_SQL = """
+    SELECT TO_CHAR(SALE_MONTH, 'YYYY-MM'), QUANTITY, PRICE_SUM, SALE_COUNT
+    FROM SALES_MONTHLY_STORE
+    WHERE SALE_MONTH >= TRUNC(SYSDATE, 'YYYY')
+"""
 
-    # DB에 상품 추가
+def query_store_partials(sql):
     conn = get_db_connection()
     cursor = conn.cursor()
-    
     try:
-        cursor.execute(
-            "INSERT INTO PRODUCTS (BARCODE, PRODUCT_NAME, EXPIRATION_DATE, QUANTITY, PRICE) VALUES (:barcode, :name, TO_DATE(:expiration, 'YYYY-MM-DD'), :quantity, :price)",
-            {
-                'barcode': barcode_number,
-                'name': name,
-                'expiration': expiration,
-                'quantity': data.get('quantity', 0),  # 수량 추가
-                'price': data.get('price', 0)  # 가격 추가
-            }
-        )
-        
-        # 바코드 이미지 생성
-        ean = barcode.get("ean13", barcode_number, writer=ImageWriter())
-        filename = ean.save(os.path.join('static', 'barcodes', barcode_number))  # 바코드 이미지 저장
-        
-        conn.commit()  # 변경 사항 커밋
-        return jsonify({'message': '상품 및 바코드 추가 완료', 'barcode_image': filename})
-    
-    except Exception as e:
-        conn.rollback()  # 오류 발생 시 롤백
-        return jsonify({'error': str(e)}), 500
+        cursor.execute(sql)
+        return cursor.fetchall()
     finally:
         cursor.close()
         conn.close()
 
-@app.route('/api/upload_excel', methods=['POST'])
-def upload_excel():
-    file = request.files['file']
-    try:
-        df = pd.read_excel(file, dtype={'barcode': str})  # 엑셀 파일 읽기
-    except Exception as e:
-        print(f"엑셀 파일 읽기 오류: {str(e)}")
-        return jsonify({'error': '엑셀 파일을 읽는 데 오류가 발생했습니다.'}), 400
+def merge_store_partials(partials):
+    # {매장 ID: [(키, 값...)]} -> [(키, [값 합계...])] (키 순서)
+    merged = {}
+    for rows in partials.values():
+        for key, *values in rows:
+            totals = merged.setdefault(key, [0] * len(values))
+            for index, value in enumerate(values):
+                totals[index] += value or 0
+    return sorted(merged.items())
 
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    for _, row in df.iterrows():
-        try:
-            # 날짜 형식 변환
-            expiration_value = row['expiration_date']
-            
-            # 날짜가 문자열 형식인 경우
-            if isinstance(expiration_value, str):
-                expiration_date = datetime.strptime(expiration_value, '%Y-%m-%d')  # 변환
-            # 날짜가 숫자 형식인 경우
-            elif isinstance(expiration_value, (int, float)):
-                expiration_date = datetime(1899, 12, 30) + pd.to_timedelta(expiration_value, unit='D')
-            else:
-                continue  # 날짜 형식이 올바르지 않은 경우 건너뜀
-            
-            # 데이터베이스에 삽입
-            cursor.execute(
-                """
-                INSERT INTO PRODUCTS 
-                (BARCODE, PRODUCT_NAME, EXPIRATION_DATE, QUANTITY, PRICE)
-                VALUES (:barcode, :name, TO_DATE(:expiration, 'YYYY-MM-DD'), :quantity, :price)
-                """,
-                {
-                    'barcode': row['barcode'],
-                    'name': row['name'],
-                    'expiration': expiration_date.strftime('%Y-%m-%d'),  # 변환된 날짜 사용
-                    'quantity': row['quantity'],
-                    'price': row['price']
-                }
-            )
-        except Exception as e:
-            print(f"데이터 삽입 오류 (바코드: {row.get('barcode', '알 수 없음')}): {str(e)}")
-            continue  # 오류가 발생한 경우 다음 행으로 넘어감
+def chain_sales_version():
+    return tuple(get_sales_version(store_id) for store_id in STORES)
 
-    conn.commit()  # 변경 사항 커밋
-    cursor.close()
-    conn.close()
-    
-    # 엑셀 파일 업로드 후 데이터베이스에서 최신 데이터 가져오기
-    return jsonify({'message': '엑셀 파일에서 데이터가 추가되었습니다.'})
+def query_chain_daily_sales():
+    # 일 매출은 그대로 더할 수 있으므로 매장별 조회와 같은 SQL 사용
+    merged = merge_store_partials(map_stores(lambda store_id: query_store_partials(DAILY_SALES_SQL)))
+    return [{'sale_date': sale_date, 'total_revenue': revenue} for sale_date, (revenue,) in merged]
+
+def query_chain_monthly_sales():
+    merged = merge_store_partials(map_stores(lambda store_id: query_store_partials(CHAIN_MONTHLY_SALES_SQL)))
+    return [
+        {'month': month, 'total_quantity': quantity, 'price': price_sum / sale_count if sale_count else None}
+        for month, (quantity, price_sum, sale_count) in merged
+    ]
 
-@app.route('/barcode')
-def barcode_list():
-    return render_template('barcode.html')
+# 폐기 처리: PRODUCTS 행을 DISCARD_HISTORY 로 옮기고 삭제 (한 트랜잭션)
+# 매일 밤 유통기한이 지난 상품만 자동 폐기 (재고 없음 상품은 입고 추천 목록에 남아야 하므로 /api/expiry_sweep 으로만 폐기)
+EXPIRY_SWEEP_ENABLED = os.environ.get('EXPIRY_SWEEP_ENABLED', '1') == '1'
+DISCARD_MAX_BARCODES = 5000
+DISCARD_ARCHIVE_COLUMNS = "BARCODE, PRODUCT_NAME, EXPIRATION_DATE, QUANTITY, PRICE"
 
-@app.route('/api/discard_product/<int:product_id>', methods=['DELETE'])
-def discard_product(product_id):
+def sweep_expired_products(include_out_of_stock=True):
+    # 만료(/재고 없음) 상품 전체를 INSERT ... SELECT + DELETE 로 한 번에 옮김 (PL/SQL 블록 하나 = 왕복 한 번)
+    # 기준 시각을 바인드해 두 문장이 같은 행을 대상으로 하고, 그 사이 쓰기는 테이블 잠금으로 막음
+    ensure_schema()
+    condition = "QUANTITY <= 0 OR EXPIRATION_DATE < :cutoff" if include_out_of_stock else "EXPIRATION_DATE < :cutoff"
+    sweep_id = uuid.uuid4().hex
     conn = get_db_connection()
     cursor = conn.cursor()
-    
     try:
-        cursor.execute("DELETE FROM PRODUCTS WHERE PRODUCT_ID = :id", {'id': product_id})
-        conn.commit()
-        return jsonify({'message': '제품이 폐기되었습니다.'})
-    except Exception as e:
+        archived = cursor.var(int)
+        deleted = cursor.var(int)
+        cursor.execute(f"""
+            BEGIN
+                LOCK TABLE PRODUCTS IN EXCLUSIVE MODE;
+                INSERT INTO DISCARD_HISTORY (SWEEP_ID, REASON, {DISCARD_ARCHIVE_COLUMNS})
+                SELECT :sweep_id,
+                       CASE WHEN EXPIRATION_DATE < :cutoff THEN 'expired' ELSE 'out_of_stock' END,
+                       {DISCARD_ARCHIVE_COLUMNS}
+                FROM PRODUCTS
+                WHERE {condition};
+                :archived := SQL%ROWCOUNT;
+                DELETE FROM PRODUCTS WHERE {condition};
+                :deleted := SQL%ROWCOUNT;
+                COMMIT;
+            END;
+        """, {'sweep_id': sweep_id, 'cutoff': datetime.now(), 'archived': archived, 'deleted': deleted})
+    except Exception:
         conn.rollback()
-        return jsonify({'error': str(e)}), 500
+        raise
     finally:
         cursor.close()
         conn.close()
 
-@app.route('/.well-known/appspecific/com.chrome.devtools.json')
-def devtools_json():
-    return jsonify({"message": "Chrome DevTools is ready."})
+    result = {'sweep_id': sweep_id, 'archived': archived.getvalue(), 'deleted': deleted.getvalue()}
+    if result['deleted']:
+        invalidate_inventory()
+        publish_event('product_discarded', {'sweep_id': sweep_id, 'count': result['deleted']})
+    return result
 
-@app.route('/api/products/<barcode>', methods=['GET'])
-def get_product_by_barcode(barcode):
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT BARCODE, PRODUCT_NAME, EXPIRATION_DATE, QUANTITY, PRICE FROM PRODUCTS WHERE BARCODE = :barcode", {'barcode': barcode})
-        row = cursor.fetchone()
-        if row:
-            product = {
-                'barcode': row[0],
-                'name': row[1],
-                'expiration_date': row[2],
-                'quantity': row[3],
-                'price': row[4]
-            }
-            return jsonify(product)
-        else:
-            return jsonify({'error': '제품을 찾을 수 없습니다.'}), 404
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
-
-# AI 구매 로직
-def ai_purchase_simulation():
+def discard_barcodes(barcodes, reason='manual'):
+    # 지정한 바코드만 배열 DML 로 옮기고 삭제, 바코드별 결과 반환 (batcherrors: 실패한 바코드만 건너뜀)
+    ensure_schema()
+    sweep_id = uuid.uuid4().hex
+    barcodes = list(dict.fromkeys(barcodes))
+    results = OrderedDict((barcode_number, {'barcode': barcode_number, 'status': 'not_found', 'count': 0})
+                          for barcode_number in barcodes)
     conn = get_db_connection()
     cursor = conn.cursor()
-    
     try:
-        # 재고가 있는 상품 조회
-        cursor.execute("SELECT BARCODE, PRODUCT_NAME, PRICE, EXPIRATION_DATE FROM PRODUCTS WHERE QUANTITY > 0")
-        products = cursor.fetchall()
-        
-        if not products:
-            print("구매할 상품이 없습니다.")
-            return
-        
-        num_to_purchase = random.randint(1, 3)
-        selected_products = random.sample(products, min(num_to_purchase, len(products)))
-
-        for product in selected_products:
-            barcode = product[0]
-            product_name = product[1]
-            price = product[2]
-            expiration_date = product[3]
-            cursor.execute("UPDATE PRODUCTS SET QUANTITY = QUANTITY - 1 WHERE BARCODE = :barcode AND QUANTITY > 0", {'barcode': barcode})
-            print(f"AI가 상품 바코드 {barcode}를 구매했습니다.")
-            
-            # 최근 구매한 상품 리스트에 추가 (구매 시각 추가)
-            recent_purchases.append({
-                'barcode': barcode,
-                'name': product_name,
-                'price': price,
-                'purchase_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            })
+        # 옮기는 동안 다른 트랜잭션이 행을 바꾸지 못하도록 먼저 잠금
+        barcode_list = conn.gettype('SYS.ODCIVARCHAR2LIST').newobject(barcodes)
+        cursor.execute(
+            "SELECT BARCODE FROM PRODUCTS WHERE BARCODE IN (SELECT COLUMN_VALUE FROM TABLE(:barcodes)) FOR UPDATE",
+            {'barcodes': barcode_list}
+        )
+        cursor.fetchall()
 
-            # SALE 테이블에 판매 기록 추가
-            cursor.execute(
-                "INSERT INTO SALE (ID, BARCODE, PRODUCT_NAME, EXPIRATION_DATE, QUANTITY, PRICE, SALE_DATE) "
-                "VALUES (SALE_SEQ.NEXTVAL, :barcode, :product_name, :expiration_date, :quantity, :price, SYSDATE)",
-                {
-                    'barcode': barcode,
-                    'product_name': product_name,
-                    'expiration_date': expiration_date,
-                    'quantity': 1,
-                    'price': price
-                }
-            )
-        
+        rows = [(sweep_id, reason, barcode_number) for barcode_number in barcodes]
+        cursor.executemany(f"""
+            INSERT INTO DISCARD_HISTORY (SWEEP_ID, REASON, {DISCARD_ARCHIVE_COLUMNS})
+            SELECT :1, :2, {DISCARD_ARCHIVE_COLUMNS} FROM PRODUCTS WHERE BARCODE = :3
+        """, rows, batcherrors=True, arraydmlrowcounts=True)
+        archived = cursor.getarraydmlrowcounts()
+        failed = {error.offset: error.message for error in cursor.getbatcherrors()}
+
+        for index, message in failed.items():
+            results[barcodes[index]].update({'status': 'error', 'error': message})
+
+        # 이력에 남은 바코드만 삭제
+        to_delete = [barcode_number for index, barcode_number in enumerate(barcodes)
+                     if index not in failed and archived[index]]
+        if to_delete:
+            cursor.executemany("DELETE FROM PRODUCTS WHERE BARCODE = :1", [(barcode_number,) for barcode_number in to_delete],
+                               batcherrors=True, arraydmlrowcounts=True)
+            for barcode_number, count in zip(to_delete, cursor.getarraydmlrowcounts()):
+                results[barcode_number].update({'status': 'discarded', 'count': count})
+            not_deleted = []
+            for error in cursor.getbatcherrors():
+                results[to_delete[error.offset]].update({'status': 'error', 'count': 0, 'error': error.message})
+                not_deleted.append((sweep_id, to_delete[error.offset]))
+            if not_deleted:
+                # 삭제하지 못한 바코드는 이력에서도 뺌
+                cursor.executemany("DELETE FROM DISCARD_HISTORY WHERE SWEEP_ID = :1 AND BARCODE = :2", not_deleted)
         conn.commit()
-    except Exception as e:
+    except Exception:
         conn.rollback()
-        print(f"구매 처리 중 오류 발생: {str(e)}")
+        raise
     finally:
         cursor.close()
         conn.close()
 
-# 스케줄러 설정
-scheduler = BackgroundScheduler()
-scheduler.add_job(ai_purchase_simulation, 'interval', hours=1)  # 매 1시간마다 실행
-scheduler.start()
+    discarded = [result['barcode'] for result in results.values() if result['status'] == 'discarded']
+    if discarded:
+        remove_inventory_products(discarded)
+        publish_event('product_discarded', {'barcodes': discarded})
+    return sweep_id, list(results.values())
 
-@app.route('/api/recent_purchases', methods=['GET'])
-def get_recent_purchases():
-    try:
-        # recent_purchases 리스트를 반환
-        return jsonify(recent_purchases)
-    except Exception as e:
-        print(f"오류 발생: {str(e)}")  # 오류 로그
-        return jsonify({'error': '내부 서버 오류', 'details': str(e)}), 500
+def scheduled_expiry_sweep():
+    # 오류는 스케줄러 실행 기록(last_outcome)에 남도록 그대로 올려 보냄
+    result = sweep_expired_products(include_out_of_stock=False)
+    print(f"유통기한 만료 상품 폐기: {result['deleted']}건 (이력 {result['archived']}건)")
 
-@app.route('/api/ai_purchase', methods=['POST'])
-def ai_purchase():
-    ai_purchase_simulation()  # AI 구매 로직 실행
-    return jsonify({'message': 'AI가 제품을 구매했습니다.'})
+# 수요 예측 (XGBoost) 설정
+FORECAST_MODEL_DIR = os.environ.get('FORECAST_MODEL_DIR', os.path.join('models', 'demand'))
+FORECAST_HISTORY_DAYS = int(os.environ.get('FORECAST_HISTORY_DAYS', 120))  # 학습에 쓸 판매 이력 일수
+FORECAST_MIN_TRAIN_ROWS = 50  # 이보다 학습 데이터가 적으면 학습하지 않음
+FORECAST_KEEP_MODELS = 5  # 디스크에 남겨 둘 모델 버전 수
+FORECAST_FEATURES = ['lag_1', 'lag_2', 'lag_3', 'lag_7', 'mean_7', 'weekday', 'price', 'days_to_expiry']
+RESTOCK_COVER_DAYS = 3  # 재고가 버텨야 하는 일수
 
-@app.route('/receipts')
-def receipts():
-    return render_template('receipts.html')  # receipts.html 파일을 생성하여 영수증 조회 페이지를 구성합니다.
+forecast_lock = threading.Lock()
+forecast_states = StoreLocal(lambda: {'forecast': None, 'loaded_mtime': 0.0, 'model_version': None, 'model': None})
+forecast_process_pool = None
 
-@app.route('/api/sell_product', methods=['POST'])
-def sell_product():
-    data = request.json
-    barcode = data.get('barcode')
-    quantity = data.get('quantity')
+def forecast_model_dir():
+    # 모델/예측 결과는 매장마다 따로 학습해서 저장
+    return store_path(FORECAST_MODEL_DIR)
 
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT PRODUCT_NAME, EXPIRATION_DATE, PRICE FROM PRODUCTS WHERE BARCODE = :barcode", {'barcode': barcode})
-        product = cursor.fetchone()
-
-        if product:
-            product_name = product[0]
-            expiration_date = product[1]
-            price = product[2]
-
-            # SALE 테이블에 판매 기록 추가
-            cursor.execute(
-                "INSERT INTO SALE (ID, BARCODE, PRODUCT_NAME, EXPIRATION_DATE, QUANTITY, PRICE, SALE_DATE) "
-                "VALUES (SALE_SEQ.NEXTVAL, :barcode, :product_name, :expiration_date, :quantity, :price, SYSDATE)",
-                {
-                    'barcode': barcode,
-                    'product_name': product_name,
-                    'expiration_date': expiration_date,
-                    'quantity': quantity,
-                    'price': price
-                }
-            )
-            conn.commit()
-            return jsonify({'message': '판매 기록이 저장되었습니다.'})
-        else:
-            return jsonify({'error': '제품을 찾을 수 없습니다.'}), 404
-    except Exception as e:
-        print(f"오류 발생: {str(e)}")
-        return jsonify({'error': str(e)}), 500
-    finally:
-        cursor.close()
-        conn.close()
+def load_daily_sales_frame(days=FORECAST_HISTORY_DAYS):
+    # 상품별 일 판매량/평균가/유통기한을 한 번의 GROUP BY 로 가져옴
+    # (pyarrow 가 있으면 Arrow 배치에서 바로 DataFrame 으로 변환)
+    return fetch_dataframe("""
+        SELECT TRUNC(SALE_DATE), BARCODE, MAX(PRODUCT_NAME), SUM(QUANTITY), AVG(PRICE), MIN(EXPIRATION_DATE)
+        FROM SALE
+        WHERE SALE_DATE >= TRUNC(SYSDATE) - :days AND BARCODE IS NOT NULL
+        GROUP BY TRUNC(SALE_DATE), BARCODE
+    """, {'days': days}, ['sale_day', 'barcode', 'name', 'quantity', 'price', 'expiration_date'])
 
-@app.route('/api/daily_sales', methods=['GET'])
-def get_daily_sales():
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT 
-                TO_CHAR(SALE_DATE, 'YYYY-MM-DD') AS sale_date, 
-                SUM(QUANTITY * PRICE) AS total_revenue 
-            FROM SALE
-            WHERE SALE_DATE >= TRUNC(SYSDATE) - 30  -- Last 30 days
-            GROUP BY TO_CHAR(SALE_DATE, 'YYYY-MM-DD')
-            ORDER BY sale_date
-        """)
-        sales_data = cursor.fetchall()
-        cursor.close()
-        conn.close()
-        
-        # Convert to JSON format
-        result = [{'sale_date': row[0], 'total_revenue': row[1]} for row in sales_data]
-        return jsonify(result)
-    except Exception as e:
-        print(f"Error occurred: {str(e)}")  # Log the error
-        return jsonify({'error': 'Internal Server Error', 'details': str(e)}), 500
+def build_demand_features(daily, end_day, barcodes=None):
+    # 일자 x 상품 격자로 펼친 뒤 shift/rolling 으로 특성을 한꺼번에 계산 (행 반복 없음)
+    import numpy as np
+    import pandas as pd
+    end_day = pd.Timestamp(end_day).normalize()
+    start_day = daily['sale_day'].min() if len(daily) else end_day
+    days = pd.date_range(pd.Timestamp(start_day).normalize(), end_day, freq='D')
+    columns = sorted(set(daily['barcode']) | set(barcodes or []))
 
-@app.route('/api/check_and_generate_restock_excel', methods=['POST'])
-def check_and_generate_restock_excel():
-    try:
-        data = request.get_json()
-        products = data.get('products', [])
-        if not products:
-            return jsonify({'error': '입고할 제품이 없습니다.'}), 400
-
-        # 바코드, 유통기한 임의 생성
-        for product in products:
-            # 바코드가 없으면 13자리 임의 숫자 생성
-            if not product.get('barcode'):
-                product['barcode'] = ''.join([str(random.randint(0, 9)) for _ in range(13)])
-            # 유통기한이 없으면 오늘로부터 30일 뒤로 임의 설정
-            if not product.get('expiration_date'):
-                product['expiration_date'] = (datetime.now() + timedelta(days=30)).strftime('%Y-%m-%d')
-
-        output_path = r"C:\Users\마하영\OneDrive\바탕 화면\편의점\입고 엑셀파일\입고_필요_제품.xlsx"
-        df = pd.DataFrame(products)
-        try:
-            df.to_excel(output_path, index=False)
-        except PermissionError as e:
-            print(f"파일 저장 오류: {str(e)}")
-            return jsonify({'error': '파일 저장 중 오류 발생. 파일이 열려 있거나 권한이 없습니다.'}), 500
+    def wide(values, aggfunc):
+        table = daily.pivot_table(index='sale_day', columns='barcode', values=values, aggfunc=aggfunc)
+        return table.reindex(index=days, columns=columns)
 
-        return jsonify({'message': '입고할 주문 엑셀 파일이 생성되었습니다.'}), 200
-    except Exception as e:
-        print(f"Error occurred: {str(e)}")
-        print(traceback.format_exc())
-        return jsonify({'error': str(e)}), 500
+    quantity = wide('quantity', 'sum').fillna(0).astype(float)
+    price = wide('price', 'mean').ffill().astype(float)
+    expiration = wide('expiration_date', 'min').ffill()
+    previous = quantity.shift(1)
 
-@app.route('/restock_list')
-def restock_list():
-    return render_template('restock_list.html')
+    features = {
+        'lag_1': previous,
+        'lag_2': quantity.shift(2),
+        'lag_3': quantity.shift(3),
+        'lag_7': quantity.shift(7),
+        'mean_7': previous.rolling(7, min_periods=1).mean(),
+        'weekday': pd.DataFrame(np.repeat(days.weekday.to_numpy()[:, None], len(columns), axis=1), index=days, columns=columns),
+        'price': price,
+        'days_to_expiry': expiration.apply(lambda column: (pd.to_datetime(column) - days).dt.days),
+        'target': quantity
+    }
+    frame = pd.concat({name: table.stack(future_stack=True) for name, table in features.items()}, axis=1)
+    frame.index.names = ['sale_day', 'barcode']
+    return frame.reset_index()
 
-@app.route('/api/get_restock_list', methods=['GET'])
-def get_restock_list():
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        # 수량이 0인 제품 조회
-        cursor.execute("""
-            SELECT PRODUCT_NAME, PRICE 
-            FROM PRODUCTS 
-            WHERE QUANTITY = 0 AND EXPIRATION_DATE >= SYSDATE
-        """)
-        products = []
-        for row in cursor:
-            product = {
-                'name': row[0],  # PRODUCT_NAME
-                'price': row[1],
-                'quantity': 20  # 입고할 수량을 20으로 설정
-            }
-            products.append(product)
-        cursor.close()
-        conn.close()
-        return jsonify(products)
-    except Exception as e:
-        print(f"Error occurred: {str(e)}")  # 오류 메시지 출력
-        return jsonify({'error': str(e)}), 500
+def fit_demand_model(X, y, model_path):
+    # 별도 프로세스에서 실행되는 학습 함수 (Flask 요청 스레드와 분리)
+    import xgboost as xgb
+    params = {'objective': 'count:poisson', 'max_depth': 4, 'eta': 0.1, 'tree_method': 'hist'}
+    model = xgb.train(params, xgb.DMatrix(X, label=y), num_boost_round=200)
+    model.save_model(model_path)
+    return len(y)
 
-@app.route('/api/generate_restock_excel', methods=['POST'])
-def generate_restock_excel():
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # 수량이 0개이거나 유통기한이 지난 제품 조회
-        cursor.execute("""
-            SELECT BARCODE, PRODUCT_NAME, EXPIRATION_DATE FROM PRODUCTS
-            WHERE QUANTITY <= 0 OR EXPIRATION_DATE < SYSDATE
-        """)
-        
-        products = []
-        for row in cursor:
-            product = {
-                'barcode': row[0] if row[0] else '',
-                'name': row[1] if row[1] else '',
-                'expiration_date': row[2].strftime('%Y-%m-%d') if row[2] else ''
-            }
-            products.append(product)
-        
-        cursor.close()
-        conn.close()
+def get_forecast_process_pool():
+    global forecast_process_pool
+    with forecast_lock:
+        if forecast_process_pool is None:
+            forecast_process_pool = ProcessPoolExecutor(max_workers=1)
+    return forecast_process_pool
 
-        if not products:
-            return jsonify({'message': '입고할 제품이 없습니다.'}), 200
+def read_forecast_metadata():
+    path = os.path.join(forecast_model_dir(), 'latest.json')
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
 
-        # 엑셀 파일 생성
-        df = pd.DataFrame(products)
-        df.to_excel("C:\\Users\\마하영\\OneDrive\\바탕 화면\\편의점\\입고 엑셀파일\\입고_필요_제품.xlsx", index=False)  # 특정 경로에 엑셀 파일로 저장
+def write_json_atomic(path, data):
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, default=str)
+    os.replace(tmp_path, path)
 
-        return jsonify({'message': '입고할 주문 엑셀 파일이 생성되었습니다.'}), 200
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+def train_demand_model():
+    # 판매 이력으로 특성을 만들고 학습은 프로세스 풀에서 수행, 새 버전으로 저장
+    import pandas as pd
+    daily = load_daily_sales_frame()
+    today = datetime.now().date()
+    frame = build_demand_features(daily, today)
+    frame = frame[(frame['sale_day'] < pd.Timestamp(today)) & frame['lag_7'].notna()]
+    if len(frame) < FORECAST_MIN_TRAIN_ROWS:
+        return {'trained': False, 'rows': len(frame), 'reason': '학습 데이터가 부족합니다.'}
 
-@app.route('/sales_statistics')
-def sales_statistics():
-    return render_template('sales_statistics.html')
+    model_dir = forecast_model_dir()
+    os.makedirs(model_dir, exist_ok=True)
+    version = datetime.now().strftime('%Y%m%d%H%M%S')
+    model_path = os.path.join(model_dir, f'demand-{version}.json')
+    X = frame[FORECAST_FEATURES].to_numpy(dtype=float)
+    y = frame['target'].to_numpy(dtype=float)
+    rows = get_forecast_process_pool().submit(fit_demand_model, X, y, model_path).result()
 
-@app.route('/api/monthly_sales', methods=['GET'])
-def get_monthly_sales():
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT 
-            TO_CHAR(SALE_DATE, 'YYYY-MM') AS month, 
-            SUM(QUANTITY) AS total_quantity, 
-            AVG(PRICE) AS price
-        FROM SALE
-        JOIN PRODUCTS ON SALE.BARCODE = PRODUCTS.BARCODE
-        WHERE SALE_DATE >= TRUNC(SYSDATE, 'YYYY') -- 이번 년도부터의 데이터
-        GROUP BY TO_CHAR(SALE_DATE, 'YYYY-MM')
-        ORDER BY month
-    """)
-    sales_data = cursor.fetchall()
-    cursor.close()
-    conn.close()
-    
-    # 결과를 JSON 형식으로 변환
-    result = [{'month': row[0], 'total_quantity': row[1], 'price': row[2]} for row in sales_data]
-    return jsonify(result)
+    metadata = {'version': version, 'path': model_path, 'trained_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                'rows': rows, 'features': FORECAST_FEATURES}
+    write_json_atomic(os.path.join(model_dir, 'latest.json'), metadata)
 
-@app.route('/api/discard_products', methods=['POST'])
-def discard_products():
-    data = request.get_json()
-    barcodes = data.get('barcodes', [])
-    if not barcodes:
-        return jsonify({'error': '폐기할 바코드가 없습니다.'}), 400
+    # 오래된 모델 버전 정리
+    models = sorted(name for name in os.listdir(model_dir) if name.startswith('demand-') and name.endswith('.json'))
+    for name in models[:-FORECAST_KEEP_MODELS]:
+        os.remove(os.path.join(model_dir, name))
+    return dict(metadata, trained=True)
+
+def load_demand_model(metadata):
+    import xgboost as xgb
+    forecast_state = forecast_states.get()
+    with forecast_lock:
+        if forecast_state['model_version'] == metadata['version']:
+            return forecast_state['model']
+    model = xgb.Booster()
+    model.load_model(metadata['path'])
+    with forecast_lock:
+        forecast_state.update({'model_version': metadata['version'], 'model': model})
+    return model
 
+def run_demand_forecast():
+    # 재고에 있는 모든 상품의 내일 수요를 predict 한 번으로 계산해 캐시에 저장
+    import numpy as np
+    import pandas as pd
+    import xgboost as xgb
+    metadata = read_forecast_metadata()
+    if not metadata:
+        return {'forecasted': False, 'reason': '학습된 모델이 없습니다.'}
+    model = load_demand_model(metadata)
+
+    products = {row[0]: row for row in get_inventory_products() if row[0]}
+    today = pd.Timestamp(datetime.now().date())
+    frame = build_demand_features(load_daily_sales_frame(14), today, list(products))
+    frame = frame[frame['sale_day'] == today].set_index('barcode')
+    if frame.empty:
+        return {'forecasted': False, 'reason': '예측할 상품이 없습니다.'}
+
+    # 가격/유통기한은 현재 재고 기준으로 덮어씀
+    current = pd.DataFrame(
+        [(barcode, row[4], row[2]) for barcode, row in products.items()],
+        columns=['barcode', 'price', 'expiration_date']
+    ).set_index('barcode').reindex(frame.index)
+    frame['price'] = pd.to_numeric(current['price'], errors='coerce').fillna(frame['price'])
+    days_to_expiry = (pd.to_datetime(current['expiration_date']) - today).dt.days
+    frame['days_to_expiry'] = days_to_expiry.fillna(frame['days_to_expiry'])
+    frame[['lag_1', 'lag_2', 'lag_3', 'lag_7', 'mean_7']] = frame[['lag_1', 'lag_2', 'lag_3', 'lag_7', 'mean_7']].fillna(0)
+
+    predictions = np.clip(model.predict(xgb.DMatrix(frame[FORECAST_FEATURES].to_numpy(dtype=float))), 0, None)
+    names = pd.Series({barcode: row[1] for barcode, row in products.items()}).reindex(frame.index)
+    by_barcode = {barcode: round(float(value), 2) for barcode, value in zip(frame.index, predictions)}
+    by_name = pd.Series(predictions, index=names.fillna('').to_numpy()).groupby(level=0).sum()
+
+    forecast = {
+        'model_version': metadata['version'],
+        'generated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'by_barcode': by_barcode,
+        'by_name': {name: round(float(value), 2) for name, value in by_name.items() if name}
+    }
+    path = os.path.join(forecast_model_dir(), 'forecast.json')
+    write_json_atomic(path, forecast)
+    with forecast_lock:
+        forecast_states.get().update({'forecast': forecast, 'loaded_mtime': os.path.getmtime(path)})
+    return {'forecasted': True, 'model_version': forecast['model_version'], 'products': len(by_barcode)}
+
+def get_demand_forecast():
+    # 캐시된 예측 (다른 프로세스가 새로 저장했으면 파일에서 다시 읽음)
+    path = os.path.join(forecast_model_dir(), 'forecast.json')
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        # 여러 바코드 삭제
-        cursor.executemany(
-            "DELETE FROM PRODUCTS WHERE BARCODE = :1",
-            [(barcode,) for barcode in barcodes]
-        )
-        conn.commit()
-        cursor.close()
-        conn.close()
-        return jsonify({'message': f'{len(barcodes)}개 제품이 폐기되었습니다.'})
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    forecast_state = forecast_states.get()
+    with forecast_lock:
+        if forecast_state['forecast'] and forecast_state['loaded_mtime'] >= mtime:
+            return forecast_state['forecast']
+    with open(path, encoding='utf-8') as f:
+        forecast = json.load(f)
+    with forecast_lock:
+        forecast_state.update({'forecast': forecast, 'loaded_mtime': mtime})
+    return forecast
+
+def train_and_forecast():
+    result = {'training': train_demand_model()}
+    if result['training'].get('trained'):
+        result['forecast'] = run_demand_forecast()
+    return result
+
+def scheduled_demand_training():
+    try:
+        print(f"수요 예측 모델 학습: {train_and_forecast()}")
+    except Exception as e:
+        print(f"수요 예측 모델 학습 중 오류 발생: {str(e)}")
+        print(traceback.format_exc())
+        raise
+
+def scheduled_demand_forecast():
+    try:
+        print(f"수요 예측 갱신: {run_demand_forecast()}")
     except Exception as e:
-        print(f"폐기 처리 오류: {str(e)}")
-        return jsonify({'error': str(e)}), 500
+        print(f"수요 예측 중 오류 발생: {str(e)}")
+        raise
+
+# 최근 7일간의 판매 데이터
+RECOMMENDATION_SALES_SQL = """
+    SELECT 
+        PRODUCT_NAME,
+        SUM(QUANTITY) as total_sold,
+        AVG(PRICE) as avg_price,
+        COUNT(DISTINCT TO_CHAR(SALE_DATE, 'YYYY-MM-DD')) as days_sold
+    FROM SALE
+    WHERE SALE_DATE >= TRUNC(SYSDATE) - 7
+    GROUP BY PRODUCT_NAME
+    ORDER BY total_sold DESC
+"""
+# 현재 재고 상태
+RECOMMENDATION_INVENTORY_SQL = """
+    SELECT PRODUCT_NAME, QUANTITY
+    FROM PRODUCTS
+    WHERE EXPIRATION_DATE >= SYSDATE
+"""
 
 def analyze_daily_sales_for_recommendation():
+    # 오류는 호출자에게 그대로 전달 (빈 결과를 "입고 필요 없음" 스냅샷으로 저장하지 않도록)
+    conn = get_db_connection()
+    cursor = conn.cursor()
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # 최근 7일간의 판매 데이터 조회
-        cursor.execute("""
-            SELECT 
-                PRODUCT_NAME,
-                SUM(QUANTITY) as total_sold,
-                AVG(PRICE) as avg_price,
-                COUNT(DISTINCT TO_CHAR(SALE_DATE, 'YYYY-MM-DD')) as days_sold
-            FROM SALE
-            WHERE SALE_DATE >= TRUNC(SYSDATE) - 7
-            GROUP BY PRODUCT_NAME
-            ORDER BY total_sold DESC
-        """)
-        
+        cursor.execute(RECOMMENDATION_SALES_SQL)
         sales_data = cursor.fetchall()
         
-        # 현재 재고 상태 조회
-        cursor.execute("""
-            SELECT PRODUCT_NAME, QUANTITY
-            FROM PRODUCTS
-            WHERE EXPIRATION_DATE >= SYSDATE
-        """)
-        
-        inventory_data = {row[0]: row[1] for row in cursor.fetchall()}
-        
-        recommendations = []
-        for product in sales_data:
-            name, total_sold, avg_price, days_sold = product
-            current_stock = inventory_data.get(name, 0)
-            
-            # 판매 추세 분석
-            daily_avg = total_sold / days_sold if days_sold > 0 else 0
-            
-            # 재고가 3일치 판매량보다 적으면 추천
-            if current_stock < (daily_avg * 3):
-                recommendations.append({
-                    'name': name,
-                    'current_stock': current_stock,
-                    'daily_avg_sales': round(daily_avg, 1),
-                    'recommended_quantity': max(20, int(daily_avg * 3 - current_stock)),
-                    'avg_price': round(avg_price, 0)
-                })
-        
-        cursor.close()
-        conn.close()
-        return recommendations
+        cursor.execute(RECOMMENDATION_INVENTORY_SQL)
+        inventory_rows = cursor.fetchall()
     except Exception as e:
         print(f"판매 분석 중 오류 발생: {str(e)}")
-        return []
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+    return recommendations_from_rows(sales_data, inventory_rows)
+
+def recommendations_from_rows(sales_rows, inventory_rows):
+    # RECOMMENDATION_SALES_SQL / RECOMMENDATION_INVENTORY_SQL 결과로 추천 계산 (예측 파일을 읽으므로 asgi.py 는 스레드 풀에서 호출)
+    return build_recommendations(sales_rows, {row[0]: row[1] for row in inventory_rows})
+
+def build_recommendations(sales_data, inventory_data):
+    # 수요 예측 결과가 있으면 상품명별 예측 일판매량 사용
+    forecast = get_demand_forecast()
+    forecast_by_name = forecast['by_name'] if forecast else {}
+    
+    recommendations = []
+    for product in sales_data:
+        name, total_sold, avg_price, days_sold = product
+        current_stock = inventory_data.get(name, 0)
+        
+        # 판매 추세 분석
+        daily_avg = total_sold / days_sold if days_sold > 0 else 0
+        predicted = forecast_by_name.get(name)
+        expected_daily = predicted if predicted is not None else daily_avg
+        
+        # 재고가 3일치 (예측) 판매량보다 적으면 추천
+        if current_stock < (expected_daily * RESTOCK_COVER_DAYS):
+            recommendations.append({
+                'name': name,
+                'current_stock': current_stock,
+                'daily_avg_sales': round(daily_avg, 1),
+                'forecast_daily_sales': round(predicted, 1) if predicted is not None else None,
+                'recommended_quantity': max(20, int(expected_daily * RESTOCK_COVER_DAYS - current_stock)),
+                'avg_price': round(avg_price, 0)
+            })
+    return recommendations
 
 def generate_recommendation_explanation(recommendations):
     try:
@@ -646,12 +3159,14 @@ def generate_recommendation_explanation(recommendations):
             explanation += f"• {item['name']}:\n"
             explanation += f"  - 현재 재고: {item['current_stock']}개\n"
             explanation += f"  - 일평균 판매량: {item['daily_avg_sales']}개\n"
+            if item.get('forecast_daily_sales') is not None:
+                explanation += f"  - 예측 일판매량: {item['forecast_daily_sales']}개\n"
             explanation += f"  - 추천 입고량: {item['recommended_quantity']}개\n"
             explanation += f"  - 입고 필요 이유: 현재 재고가 3일치 판매량보다 부족합니다.\n\n"
         
         explanation += "\n※ 입고 시 참고사항:\n"
         explanation += "1. 추천 수량은 최소 20개 이상입니다.\n"
-        explanation += "2. 재고는 3일치 판매량을 기준으로 계산됩니다.\n"
+        explanation += "2. 재고는 3일치 판매량(예측 모델이 있으면 예측 판매량)을 기준으로 계산됩니다.\n"
         explanation += "3. 실제 입고 시에는 시즌성과 특별 이벤트를 고려하세요."
         
         return explanation
@@ -659,25 +3174,294 @@ def generate_recommendation_explanation(recommendations):
         print(f"설명 생성 중 오류 발생: {str(e)}")
         return "분석 중 오류가 발생했습니다."
 
-@app.route('/api/daily_best_sellers', methods=['GET'])
-def daily_best_sellers():
+# 입고 추천 스냅샷 (자정 작업 결과를 저장해 두고 요청 시 그대로 반환)
+RECOMMENDATION_CACHE_TTL = float(os.environ.get('RECOMMENDATION_CACHE_TTL', 300))  # 다른 프로세스가 만든 스냅샷 확인 주기(초)
+RECOMMENDATION_KEEP_DAYS = 30  # 스냅샷 보관 기간
+
+recommendation_lock = threading.Lock()
+recommendation_states = StoreLocal(lambda: {'snapshot': None, 'checked_at': 0.0, 'refreshing': False})
+
+def read_lob(value):
+    return value.read() if hasattr(value, 'read') else value
+
+LAST_SALE_ID_SQL = "SELECT NVL(MAX(ID), 0) FROM SALE"
+
+def get_last_sale_id(cursor):
+    cursor.execute(LAST_SALE_ID_SQL)
+    return cursor.fetchone()[0]
+
+LATEST_RECOMMENDATION_SQL = """
+    SELECT GENERATED_AT, LAST_SALE_ID, RECOMMENDATIONS, EXPLANATION
+    FROM RECOMMENDATION_SNAPSHOTS
+    ORDER BY GENERATED_AT DESC
+    FETCH FIRST 1 ROWS ONLY
+"""
+INSERT_RECOMMENDATION_SQL = (
+    "INSERT INTO RECOMMENDATION_SNAPSHOTS (GENERATED_AT, LAST_SALE_ID, RECOMMENDATIONS, EXPLANATION) "
+    "VALUES (:generated_at, :last_sale_id, :recommendations, :explanation)"
+)
+PRUNE_RECOMMENDATIONS_SQL = "DELETE FROM RECOMMENDATION_SNAPSHOTS WHERE GENERATED_AT < SYSTIMESTAMP - :keep_days"
+
+def recommendation_row_to_snapshot(row):
+    # row: GENERATED_AT, LAST_SALE_ID, RECOMMENDATIONS, EXPLANATION (LOB 은 이미 읽은 값)
+    return {
+        'generated_at': row[0].strftime('%Y-%m-%d %H:%M:%S'),
+        'last_sale_id': row[1],
+        'recommendations': json.loads(row[2] or '[]'),
+        'explanation': row[3] or ''
+    }
+
+def load_latest_recommendation_snapshot():
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(LATEST_RECOMMENDATION_SQL)
+        row = cursor.fetchone()
+        if not row:
+            return None
+        return recommendation_row_to_snapshot((row[0], row[1], read_lob(row[2]), read_lob(row[3])))
+    finally:
+        cursor.close()
+        conn.close()
+
+def refresh_recommendation_snapshot():
+    # 추천을 새로 계산해 DB 에 저장하고 메모리 스냅샷을 교체
+    ensure_schema()
+    conn = get_db_connection()
+    cursor = conn.cursor()
     try:
-        # 추천 데이터 생성
+        # 분석 전에 마지막 판매 ID 를 기록 (분석 중 들어온 판매는 다음 갱신 대상)
+        last_sale_id = get_last_sale_id(cursor)
         recommendations = analyze_daily_sales_for_recommendation()
-        explanation = generate_recommendation_explanation(recommendations)
-        
-        return jsonify({
-            'recommendations': recommendations,
-            'explanation': explanation
-        })
+        snapshot_row = build_recommendation_snapshot_row(last_sale_id, recommendations)
+        for sql, params in save_recommendation_statements(snapshot_row):
+            cursor.execute(sql, params)
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+    return install_recommendation_snapshot(snapshot_row)
+
+def build_recommendation_snapshot_row(last_sale_id, recommendations):
+    return {
+        'generated_at': datetime.now(),
+        'last_sale_id': last_sale_id,
+        'recommendations': json.dumps(recommendations, ensure_ascii=False, default=str),
+        'explanation': generate_recommendation_explanation(recommendations)
+    }
+
+def save_recommendation_statements(snapshot_row):
+    # 새 스냅샷 저장 + 보관 기간이 지난 스냅샷 정리 (한 트랜잭션)
+    return [
+        (INSERT_RECOMMENDATION_SQL, snapshot_row),
+        (PRUNE_RECOMMENDATIONS_SQL, {'keep_days': RECOMMENDATION_KEEP_DAYS})
+    ]
+
+def install_recommendation_snapshot(snapshot_row):
+    # 저장한 스냅샷으로 메모리 스냅샷을 교체
+    snapshot = recommendation_row_to_snapshot((
+        snapshot_row['generated_at'], snapshot_row['last_sale_id'],
+        snapshot_row['recommendations'], snapshot_row['explanation']
+    ))
+    with recommendation_lock:
+        recommendation_states.get().update({'snapshot': snapshot, 'checked_at': time.monotonic(), 'refreshing': False})
+    return snapshot
+
+def scheduled_recommendation_refresh():
+    try:
+        snapshot = refresh_recommendation_snapshot()
+        print(f"입고 추천 스냅샷 생성 완료: {snapshot['generated_at']} ({len(snapshot['recommendations'])}건)")
     except Exception as e:
-        print(f"데이터 조회 중 오류 발생: {str(e)}")
-        return jsonify({'error': str(e)}), 500
+        print(f"입고 추천 스냅샷 생성 중 오류 발생: {str(e)}")
+        raise
+
+def get_recommendation_snapshot():
+    # 메모리 스냅샷 -> DB 의 최신 스냅샷 -> 새로 계산 순서
+    snapshot = get_cached_recommendation_snapshot()
+    if snapshot:
+        return snapshot
+
+    ensure_schema()
+    latest = load_latest_recommendation_snapshot()
+    if latest is None:
+        return refresh_recommendation_snapshot()
+    return merge_recommendation_snapshot(latest)
+
+def get_cached_recommendation_snapshot():
+    recommendation_state = recommendation_states.get()
+    with recommendation_lock:
+        snapshot = recommendation_state['snapshot']
+        if snapshot and time.monotonic() - recommendation_state['checked_at'] < RECOMMENDATION_CACHE_TTL:
+            return snapshot
+    return None
+
+def merge_recommendation_snapshot(latest):
+    # DB 에서 읽은 스냅샷이 메모리 것보다 새로우면 교체
+    recommendation_state = recommendation_states.get()
+    with recommendation_lock:
+        current = recommendation_state['snapshot']
+        if current is None or latest['generated_at'] >= current['generated_at']:
+            recommendation_state['snapshot'] = latest
+        recommendation_state['checked_at'] = time.monotonic()
+        return recommendation_state['snapshot']
+
+def start_recommendation_refresh_if_changed(snapshot):
+    # 스냅샷 이후 새 판매가 있으면 백그라운드에서 다시 계산 (이미 진행 중이면 건너뜀)
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        if get_last_sale_id(cursor) <= snapshot['last_sale_id']:
+            return None
+    finally:
+        cursor.close()
+        conn.close()
+    recommendation_state = recommendation_states.get()
+    with recommendation_lock:
+        if recommendation_state['refreshing']:
+            return None
+        recommendation_state['refreshing'] = True
+
+    def refresh():
+        try:
+            return refresh_recommendation_snapshot()['generated_at']
+        finally:
+            with recommendation_lock:
+                recommendation_state['refreshing'] = False
+    return start_background_job('recommendation_refresh', refresh)
+
+def best_sellers_payload(snapshot, job_id=None):
+    forecast = get_demand_forecast()
+    return {
+        'recommendations': snapshot['recommendations'],
+        'explanation': snapshot['explanation'],
+        'generated_at': snapshot['generated_at'],
+        'refresh_job_id': job_id,
+        'forecast_model_version': forecast['model_version'] if forecast else None,
+        'forecast_generated_at': forecast['generated_at'] if forecast else None
+    }
+
+def merge_chain_recommendations(snapshots):
+    # 매장별 추천을 상품명으로 묶어 재고/판매량/추천 입고량을 더함 (매장별 추천 입고량은 stores 에 남김)
+    merged = {}
+    for store_id, snapshot in snapshots.items():
+        for item in snapshot['recommendations']:
+            entry = merged.setdefault(item['name'], {
+                'name': item['name'], 'current_stock': 0, 'daily_avg_sales': 0, 'recommended_quantity': 0, 'stores': {}
+            })
+            entry['current_stock'] += item['current_stock'] or 0
+            entry['daily_avg_sales'] = round(entry['daily_avg_sales'] + (item['daily_avg_sales'] or 0), 1)
+            entry['recommended_quantity'] += item['recommended_quantity']
+            entry['stores'][store_id] = item['recommended_quantity']
+    return sorted(merged.values(), key=lambda item: (-item['recommended_quantity'], item['name']))
+
+def start_scheduler():
+    # 이 프로세스의 스케줄러를 한 번만 만들고 작업 등록 후 시작 (각 작업은 매장마다 실행)
+    global scheduler
+    from apscheduler.schedulers.background import BackgroundScheduler
+    with scheduler_lock:
+        if scheduler is not None:
+            return scheduler
+        scheduler = BackgroundScheduler()
+        add_leader_job(ai_purchase_simulation, 'cron', min_gap=1800, minute=0)  # 매 1시간마다 실행 (모든 워커 중 한 곳)
+        scheduler.add_job(each_store(timed_job(warm_recent_purchases)), 'date')  # 시작 시 최근 구매 기록 불러오기
+        scheduler.add_job(each_store(timed_job(warm_barcode_index)), 'date')  # 시작 시 바코드 인덱스 준비
 
-# 스케줄러에 일일 AI 추천 작업 추가
-scheduler.add_job(analyze_daily_sales_for_recommendation, 'cron', hour=0)  # 매일 자정에 실행
+        # 유통기한 임박/만료 구간 변화 이벤트 (1분마다 확인, 구독자가 워커마다 있으므로 모든 워커에서 실행)
+        scheduler.add_job(each_store(timed_job(check_expiry_transitions)), 'interval', minutes=1)
+
+        # 아래 작업은 DB/공유 파일을 갱신하므로 모든 워커 중 한 곳에서만 실행
+        # 수요 예측 (매일 새벽 학습, 매시간 예측 갱신)
+        add_leader_job(scheduled_demand_training, 'cron', min_gap=12 * 3600, catch_up=True, hour=1)
+        add_leader_job(scheduled_demand_forecast, 'cron', min_gap=1800, minute=10)
+        # 일일 AI 추천 (매일 자정)
+        add_leader_job(scheduled_recommendation_refresh, 'cron', min_gap=12 * 3600, catch_up=True, hour=0)
+        # 판매 집계: 시작 시 비어 있으면 채우고, 매일 새벽 최근 며칠을 다시 계산
+        scheduler.add_job(leader_job(backfill_sales_rollups, min_gap=600), 'date')
+        add_leader_job(compact_sales_rollups, 'cron', min_gap=12 * 3600, catch_up=True, hour=0, minute=30)
+        # 유통기한 만료/재고 없음 상품을 폐기 이력으로 옮김 (매일 새벽)
+        if EXPIRY_SWEEP_ENABLED:
+            add_leader_job(scheduled_expiry_sweep, 'cron', min_gap=12 * 3600, hour=0, minute=15)
+        scheduler.start()
+        return scheduler
+
+def create_app(config=None):
+    # 블루프린트와 요청 메트릭 훅을 등록한 앱 생성 (SCHEDULER_ENABLED 설정일 때만 스케줄러 시작)
+    app = Flask(__name__)
+    app.config['SCHEDULER_ENABLED'] = SCHEDULER_ENABLED
+    app.config.update(config or {})
+    # 라우트 모듈은 import app 으로 이 모듈을 쓰므로 앱을 만들 때 불러옴
+    from blueprints import barcodes, inventory, ops, restock, sales
+    for blueprint in (inventory.inventory_bp, sales.sales_bp, barcodes.barcodes_bp, restock.restock_bp, ops.ops_bp):
+        app.register_blueprint(blueprint)
+    app.before_request(start_request_metrics)
+    app.before_request(select_request_store)
+    app.after_request(record_request_metrics)
+    app.teardown_request(clear_request_metrics)
+    app.teardown_request(clear_request_store)
+    if app.config['SCHEDULER_ENABLED']:
+        start_scheduler()
+    return app
+
+default_app = None
+default_app_lock = threading.Lock()
+
+# 시작 시간 예산 (python app.py startup_check 와 pytest 의 tests/test_startup.py 가 measure_startup() 으로 검사)
+STARTUP_BUDGET_MS = float(os.environ.get('STARTUP_BUDGET_MS', 1500))
+STARTUP_LAZY_MODULES = ['pandas', 'numpy', 'xgboost', 'openpyxl', 'barcode', 'oracledb', 'apscheduler', 'pyarrow']
+
+def measure_startup():
+    # 새 인터프리터에서 import + create_app() 시간을 재고, 미리 불러오면 안 되는 모듈이 있는지 확인
+    import subprocess
+    script = (
+        "import json, sys, time\n"
+        "start = time.perf_counter()\n"
+        "import app\n"
+        "app.create_app({'SCHEDULER_ENABLED': False})\n"
+        "elapsed = (time.perf_counter() - start) * 1000\n"
+        f"print(json.dumps({{'ms': elapsed, 'loaded': [m for m in {STARTUP_LAZY_MODULES!r} if m in sys.modules]}}))\n"
+    )
+    directory = os.path.dirname(os.path.abspath(__file__))
+    output = subprocess.run([sys.executable, '-c', script], cwd=directory, capture_output=True, text=True, check=True).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    return {
+        'startup_ms': round(result['ms'], 1),
+        'budget_ms': STARTUP_BUDGET_MS,
+        'eager_modules': result['loaded'],
+        'ok': result['ms'] <= STARTUP_BUDGET_MS and not result['loaded']
+    }
+
+def __getattr__(name):
+    # 기존 진입점(gunicorn app:app, asgi.py 의 store.app)은 처음 접근할 때 기본 앱을 만듦
+    global default_app
+    if name != 'app':
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    with default_app_lock:
+        if default_app is None:
+            default_app = create_app()
+    return default_app
 
 if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == 'loadgen':
+        # 부하 생성: python app.py loadgen --rate 1000 --concurrency 8 --duration 60
+        parser = argparse.ArgumentParser(prog='app.py loadgen')
+        parser.add_argument('--rate', type=float, default=100, help='초당 구매 수')
+        parser.add_argument('--concurrency', type=int, default=4, help='동시 워커 수')
+        parser.add_argument('--duration', type=float, default=10, help='실행 시간(초)')
+        parser.add_argument('--max-items', type=int, default=3, help='구매 1건당 최대 상품 수')
+        parser.add_argument('--store-id', choices=get_store_ids(), default=DEFAULT_STORE_ID, help='구매를 발생시킬 매장')
+        args = parser.parse_args(sys.argv[2:])
+        with store_context(args.store_id):
+            result = run_load_generator(args.rate, args.concurrency, args.duration, args.max_items)
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        sys.exit(0)
+    if len(sys.argv) > 1 and sys.argv[1] == 'startup_check':
+        # 시작 시간 예산 확인: python app.py startup_check (예산 초과나 무거운 모듈 선로딩이면 종료 코드 1)
+        result = measure_startup()
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        sys.exit(0 if result['ok'] else 1)
+
     # 바코드 이미지를 저장할 디렉토리 생성
     os.makedirs('static/barcodes', exist_ok=True)
-    app.run(debug=True, host='0.0.0.0', port=5000) 
\ No newline at end of file
+    # 블루프린트 모듈이 import 하는 app 모듈에서 앱을 만듦 (__main__ 사본과 상태가 나뉘지 않도록)
+    import app as store
+    store.create_app().run(debug=True, host='0.0.0.0', port=5000) 
\ No newline at end of file
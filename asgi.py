@@ -0,0 +1,438 @@
+# 비동기(ASGI) 서빙 모드: uvicorn asgi:app --workers 2
+# 자주 호출되는 조회/판매 경로는 python-oracledb 비동기 풀 위의 async 핸들러로 처리하고,
+# 나머지 경로는 기존 Flask 앱(app.py)으로 넘김 (재고 스냅샷, 최근 구매 기록, 이벤트는 같은 메모리를 공유)
+# 매장 선택(store_id)과 매장별 연결은 app.py 의 매장 설정(STORES_CONFIG)을 그대로 따름
+# SQL 과 행 변환은 app.py 의 함수를 그대로 쓰고, 여기에는 비동기 실행 순서만 둠 (블로킹 호출은 run_in_threadpool)
+# 비동기 풀은 python-oracledb 전용이라 DB_BACKEND 가 oracle 이 아니면 모든 경로를 Flask 앱으로 넘김
+import asyncio
+import contextlib
+import functools
+import json
+import time
+import traceback
+from datetime import datetime
+
+import oracledb
+from a2wsgi import WSGIMiddleware
+from werkzeug.http import http_date, parse_date, parse_etags
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Mount, Route
+
+import app as store
+
+async_pools = {}  # 매장 ID -> 비동기 커넥션 풀
+async_pool_lock = asyncio.Lock()
+inventory_load_locks = {}  # 매장 ID -> 재고 스냅샷 조회 잠금
+
+async def get_async_pool(store_id=None):
+    # 매장의 비동기 풀 (app.py 의 매장 설정을 그대로 사용, 기본은 현재 매장)
+    store_id = store_id or store.get_current_store_id()
+    pool = async_pools.get(store_id)
+    if pool is None:
+        async with async_pool_lock:
+            pool = async_pools.get(store_id)
+            if pool is None:
+                config = store.STORES[store_id]
+                pool = async_pools[store_id] = oracledb.create_pool_async(
+                    user=config['user'],
+                    password=config['password'],
+                    dsn=config['dsn'],
+                    min=store.POOL_MIN,
+                    max=store.POOL_MAX,
+                    increment=store.POOL_INCREMENT,
+                    stmtcachesize=store.POOL_STMT_CACHE,
+                    getmode=oracledb.POOL_GETMODE_TIMEDWAIT,
+                    wait_timeout=store.POOL_WAIT_TIMEOUT
+                )
+    return pool
+
+async def acquire_async_connection(store_id=None):
+    # 동기 풀과 같은 대기 통계를 남김 (/api/pool_stats, /metrics)
+    store_id = store_id or store.get_current_store_id()
+    pool = await get_async_pool(store_id)
+    start = time.perf_counter()
+    try:
+        conn = await pool.acquire()
+    except oracledb.Error:
+        store.record_pool_timeout()
+        raise
+    store.record_pool_wait(time.perf_counter() - start)
+    schema = store.STORES[store_id]['schema']
+    if schema:
+        conn.current_schema = schema
+    return conn
+
+async def fetch_all(sql, params=None, arraysize=None):
+    # 연결을 하나 빌려 한 문장을 실행 (서로 독립적인 조회는 asyncio.gather 로 동시에 실행)
+    conn = await acquire_async_connection()
+    try:
+        with conn.cursor() as cursor:
+            if arraysize:
+                cursor.arraysize = arraysize
+            await cursor.execute(sql, params or {})
+            return await cursor.fetchall()
+    finally:
+        await conn.close()
+
+async def ensure_schema_async():
+    if not store.is_schema_ready():
+        await run_in_threadpool(store.ensure_schema)
+
+# 재고 스냅샷 (app.py 의 refresh_inventory_snapshot 과 같은 규칙)
+async def refresh_inventory_snapshot_async():
+    inventory = store.inventory_states.get()
+    with inventory['lock']:
+        if store.inventory_snapshot_state(inventory) == 'fresh':
+            return
+    load_lock = inventory_load_locks.setdefault(store.get_current_store_id(), asyncio.Lock())
+    async with load_lock:
+        with inventory['lock']:
+            state = store.inventory_snapshot_state(inventory)
+            if state == 'fresh':
+                return
+            version = inventory['version']
+        if state == 'probe':
+            probe = await fetch_all(store.INVENTORY_PROBE_SQL)
+            if store.inventory_probe_matches(version, probe[0]):
+                return
+        rows = await fetch_all(store.INVENTORY_SNAPSHOT_SQL, arraysize=store.PRODUCTS_FETCH_ARRAYSIZE)
+        store.install_inventory_snapshot(version, rows)
+
+async def lookup_products_async(barcodes):
+    if store.BARCODE_INDEX_ENABLED:
+        await refresh_inventory_snapshot_async()
+        return store.lookup_products(barcodes)
+
+    conn = await acquire_async_connection()
+    try:
+        barcode_type = await conn.gettype('SYS.ODCIVARCHAR2LIST')
+        with conn.cursor() as cursor:
+            await cursor.execute(store.LOOKUP_PRODUCTS_SQL, {'barcodes': barcode_type.newobject(list(barcodes))})
+            return {row[0]: row for row in await cursor.fetchall()}
+    finally:
+        await conn.close()
+
+# 결제 (app.py 의 checkout_cart / process_checkout 과 같은 순서, 문장/바인드는 app.py 에서 만듦)
+async def checkout_cart_async(cursor, lines):
+    out_vars, update_rows = store.checkout_update_binds(cursor, lines)
+    await cursor.executemany(store.CHECKOUT_UPDATE_SQL, update_rows, arraydmlrowcounts=True)
+    failed = store.failed_checkout_lines(lines, cursor.getarraydmlrowcounts())
+    if failed:
+        return [], failed
+
+    products = store.checkout_products(lines, out_vars)
+    sale_ids, sale_rows = store.checkout_sale_binds(cursor, products)
+    await cursor.executemany(store.CHECKOUT_SALE_SQL, sale_rows)
+    for sql, rows in store.sales_rollup_statements(store.checkout_rollup_sales(products)):
+        await cursor.executemany(sql, rows)
+    return store.checkout_purchases(products, sale_ids), []
+
+async def process_checkout_async(lines):
+    await ensure_schema_async()
+    conn = await acquire_async_connection()
+    try:
+        with conn.cursor() as cursor:
+            try:
+                purchases, failed = await checkout_cart_async(cursor, lines)
+                if failed:
+                    await conn.rollback()
+                    await cursor.execute(*store.rejected_lines_query(failed))
+                    return [], store.describe_rejected(failed, dict(await cursor.fetchall()))
+                await conn.commit()
+            except Exception:
+                await conn.rollback()
+                raise
+    finally:
+        await conn.close()
+    store.after_purchases_committed(purchases)
+    return purchases, []
+
+# 입고 추천 (판매 집계와 재고 조회는 서로 독립적이므로 동시에 실행)
+async def analyze_daily_sales_for_recommendation_async():
+    try:
+        sales_rows, inventory_rows = await asyncio.gather(
+            fetch_all(store.RECOMMENDATION_SALES_SQL),
+            fetch_all(store.RECOMMENDATION_INVENTORY_SQL)
+        )
+    except Exception as e:
+        print(f"판매 분석 중 오류 발생: {str(e)}")
+        raise
+    # 수요 예측 파일을 읽으므로 이벤트 루프 밖에서 계산
+    return await run_in_threadpool(store.recommendations_from_rows, sales_rows, inventory_rows)
+
+async def refresh_recommendation_snapshot_async():
+    await ensure_schema_async()
+    # 분석 전에 마지막 판매 ID 를 기록 (app.py 의 refresh_recommendation_snapshot 과 같은 순서, 분석 중 들어온 판매는 다음 갱신 대상)
+    sale_rows = await fetch_all(store.LAST_SALE_ID_SQL)
+    recommendations = await analyze_daily_sales_for_recommendation_async()
+    snapshot_row = store.build_recommendation_snapshot_row(sale_rows[0][0], recommendations)
+    conn = await acquire_async_connection()
+    try:
+        with conn.cursor() as cursor:
+            for sql, params in store.save_recommendation_statements(snapshot_row):
+                await cursor.execute(sql, params)
+        await conn.commit()
+    finally:
+        await conn.close()
+    return store.install_recommendation_snapshot(snapshot_row)
+
+async def get_recommendation_snapshot_async():
+    snapshot = store.get_cached_recommendation_snapshot()
+    if snapshot:
+        return snapshot
+
+    await ensure_schema_async()
+    conn = await acquire_async_connection()
+    try:
+        with conn.cursor() as cursor:
+            await cursor.execute(store.LATEST_RECOMMENDATION_SQL)
+            row = await cursor.fetchone()
+            if row:
+                row = (row[0], row[1], await read_lob_async(row[2]), await read_lob_async(row[3]))
+    finally:
+        await conn.close()
+    if row is None:
+        return await refresh_recommendation_snapshot_async()
+    return store.merge_recommendation_snapshot(store.recommendation_row_to_snapshot(row))
+
+async def read_lob_async(value):
+    return await value.read() if hasattr(value, 'read') else value
+
+def error_response(message, status=500, **extra):
+    return JSONResponse({'error': message, **extra}, status_code=status)
+
+async def read_json(request):
+    try:
+        data = await request.json()
+    except ValueError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+async def cached_json_response(request, key, version, build, ttl=None):
+    # app.py 의 cached_json_response 와 같은 캐시/ETag 규칙 (본문 직렬화/압축은 스레드 풀에서)
+    entry = await run_in_threadpool(store.get_cached_response, key, version, build, ttl)
+    headers = {
+        'ETag': f'"{entry["etag"]}"',
+        'Last-Modified': http_date(entry['last_modified']),
+        'Cache-Control': 'no-cache',
+        'Vary': 'Accept-Encoding'
+    }
+    if store.is_not_modified(entry, parse_etags(request.headers.get('if-none-match')),
+                             parse_date(request.headers.get('if-modified-since'))):
+        return Response(status_code=304, headers=headers)
+    data, encoding = store.encoded_body(entry, request.headers.get('accept-encoding'))
+    if encoding:
+        headers['Content-Encoding'] = encoding
+    return Response(data, media_type='application/json', headers=headers)
+
+async def stream_products_ndjson_async(store_id, sql, params, selected, fields):
+    # 한 번에 arraysize 만큼만 가져와 한 줄씩 내보냄 (본문은 핸들러가 끝난 뒤 읽히므로 매장을 직접 받음)
+    conn = await acquire_async_connection(store_id)
+    try:
+        with conn.cursor() as cursor:
+            cursor.arraysize = store.PRODUCTS_FETCH_ARRAYSIZE
+            cursor.prefetchrows = store.PRODUCTS_FETCH_ARRAYSIZE
+            await cursor.execute(sql, params)
+            while True:
+                rows = await cursor.fetchmany()
+                if not rows:
+                    break
+                yield ''.join(
+                    json.dumps(store.product_row_to_dict(row, selected, fields), ensure_ascii=False, default=str) + '\n'
+                    for row in rows
+                )
+    except Exception as e:
+        print(f"상품 스트리밍 오류: {str(e)}")
+        yield json.dumps({'error': str(e)}, ensure_ascii=False) + '\n'
+    finally:
+        await conn.close()
+
+async def get_products(request):
+    try:
+        fields, limit, after, output_format = store.parse_products_args(request.query_params)
+    except ValueError as e:
+        return error_response(str(e), 400)
+
+    if output_format == 'ndjson':
+        sql, params, selected = store.build_products_query(fields, after, limit)
+        body = stream_products_ndjson_async(store.get_current_store_id(), sql, params, selected, fields)
+        return StreamingResponse(body, media_type='application/x-ndjson')
+
+    try:
+        await refresh_inventory_snapshot_async()
+        return await cached_json_response(
+            request, ('products', request.url.query.encode()), store.snapshot_response_version(),
+            lambda: store.products_payload(store.get_inventory_products(after, limit), fields, limit)
+        )
+    except Exception as e:
+        print("오류 발생:", str(e))
+        print("상세 오류:", traceback.format_exc())
+        return error_response(str(e))
+
+async def get_alert_products(request):
+    try:
+        await refresh_inventory_snapshot_async()
+
+        def build():
+            now = datetime.now()
+            return store.alert_products_payload(store.select_expiry_rows('alert', now), now)
+        return await cached_json_response(request, 'alerts', store.snapshot_response_version(minute=True), build)
+    except Exception as e:
+        print(f"오류 발생: {str(e)}")
+        return error_response(str(e))
+
+async def get_expired_products(request):
+    try:
+        await refresh_inventory_snapshot_async()
+        return await cached_json_response(
+            request, 'expired', store.snapshot_response_version(minute=True),
+            lambda: store.expired_products_payload(store.select_expiry_rows('expired', datetime.now()))
+        )
+    except Exception as e:
+        print(f"오류 발생: {str(e)}")
+        return error_response(str(e))
+
+async def get_product_by_barcode(request):
+    barcode = request.path_params['barcode']
+    try:
+        row = (await lookup_products_async([barcode])).get(barcode)
+        if row:
+            columns = list(store.PRODUCT_COLUMNS)
+            return JSONResponse(store.product_row_to_dict(row, columns, columns))
+        return error_response('제품을 찾을 수 없습니다.', 404)
+    except Exception as e:
+        return error_response(str(e))
+
+async def lookup_products_bulk(request):
+    try:
+        barcodes = store.parse_lookup_barcodes(await read_json(request))
+    except ValueError as e:
+        return error_response(str(e), 400)
+
+    try:
+        found = await lookup_products_async(dict.fromkeys(barcodes))
+        return JSONResponse(store.lookup_payload(barcodes, found))
+    except Exception as e:
+        print(f"바코드 일괄 조회 오류: {str(e)}")
+        return error_response(str(e))
+
+async def sell_product(request):
+    data = await read_json(request)
+    try:
+        lines = store.parse_cart_lines([{'barcode': data.get('barcode'), 'quantity': data.get('quantity', 1)}])
+    except ValueError as e:
+        return error_response(str(e), 400)
+
+    try:
+        purchases, rejected = await process_checkout_async(lines)
+        if rejected:
+            if rejected[0]['available'] is None:
+                return error_response('제품을 찾을 수 없습니다.', 404)
+            return error_response('재고가 부족합니다.', 409, available=rejected[0]['available'])
+        return JSONResponse({'message': '판매 기록이 저장되었습니다.', 'sale_id': purchases[0]['seq']})
+    except Exception as e:
+        print(f"오류 발생: {str(e)}")
+        return error_response(str(e))
+
+async def checkout(request):
+    data = await read_json(request)
+    try:
+        lines = store.parse_cart_lines(data.get('items'))
+    except ValueError as e:
+        return error_response(str(e), 400)
+
+    try:
+        purchases, rejected = await process_checkout_async(lines)
+        if rejected:
+            return error_response('재고가 부족하거나 없는 상품이 있어 결제가 취소되었습니다.', 409, rejected=rejected)
+        return JSONResponse(store.checkout_payload(purchases))
+    except Exception as e:
+        print(f"결제 처리 중 오류 발생: {str(e)}")
+        print(traceback.format_exc())
+        return error_response(str(e))
+
+async def get_recent_purchases(request):
+    try:
+        since = store.parse_since(request.query_params.get('since'))
+        if store.RECENT_PURCHASES_SOURCE == 'sale':
+            rows = await fetch_all(store.RECENT_PURCHASES_SQL, store.recent_purchases_params(since))
+            purchases = [store.sale_row_to_purchase(row) for row in rows]
+        else:
+            # 첫 호출이면 SALE 에서 링 버퍼를 채우므로 스레드 풀에서
+            purchases = await run_in_threadpool(store.get_recent_purchases_since, since or 0)
+        return JSONResponse(store.recent_purchases_payload(purchases, since))
+    except Exception as e:
+        print(f"오류 발생: {str(e)}")
+        return JSONResponse({'error': '내부 서버 오류', 'details': str(e)}, status_code=500)
+
+async def daily_best_sellers(request):
+    try:
+        snapshot = await get_recommendation_snapshot_async()
+        job_id = None
+        if request.query_params.get('refresh'):
+            job_id = await run_in_threadpool(store.start_recommendation_refresh_if_changed, snapshot)
+        return JSONResponse(store.best_sellers_payload(snapshot, job_id))
+    except Exception as e:
+        print(f"데이터 조회 중 오류 발생: {str(e)}")
+        return error_response(str(e))
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    yield
+    # 서버 종료 시 모든 매장의 비동기 풀 정리
+    for pool in list(async_pools.values()):
+        try:
+            await pool.close(force=True)
+        except Exception as e:
+            print(f"비동기 커넥션 풀 종료 오류: {str(e)}")
+
+def timed_route(path, handler):
+    # Flask 경로와 같은 이름의 지표로 지연 시간 기록 (/metrics)
+    endpoint = path.replace('{', '<').replace('}', '>')
+
+    @functools.wraps(handler)
+    async def run(request):
+        start = time.perf_counter()
+        status = 500
+        try:
+            # Flask 쪽과 같이 ?store_id= 또는 X-Store-Id 헤더로 매장 선택 (스트리밍 본문은 매장을 직접 넘겨받음)
+            store_id = request.query_params.get('store_id') or request.headers.get('x-store-id') or store.DEFAULT_STORE_ID
+            if store_id not in store.STORES:
+                response = error_response('알 수 없는 매장입니다.', 404, store_id=store_id)
+                status = response.status_code
+                return response
+            token = store.current_store_id.set(store_id)
+            try:
+                response = await handler(request)
+            finally:
+                store.current_store_id.reset(token)
+            status = response.status_code
+            return response
+        finally:
+            store.observe_metric('http_request_duration_seconds', (endpoint, request.method), time.perf_counter() - start)
+            store.increment_metric('http_requests_total', (endpoint, request.method, str(status)))
+    return run
+
+def route(path, handler, methods):
+    return Route(path, timed_route(path, handler), methods=methods)
+
+async_routes = [
+    route('/api/products', get_products, methods=['GET']),
+    route('/api/products/lookup', lookup_products_bulk, methods=['POST']),
+    route('/api/products/{barcode}', get_product_by_barcode, methods=['GET']),
+    route('/products/alerts', get_alert_products, methods=['GET']),
+    route('/products/expired', get_expired_products, methods=['GET']),
+    route('/api/sell_product', sell_product, methods=['POST']),
+    route('/api/checkout', checkout, methods=['POST']),
+    route('/api/recent_purchases', get_recent_purchases, methods=['GET']),
+    route('/api/daily_best_sellers', daily_best_sellers, methods=['GET']),
+]
+
+routes = (async_routes if store.DB_BACKEND == 'oracle' else []) + [
+    # 그 밖의 경로(템플릿, 엑셀, 바코드 이미지, SSE 등)는 Flask 앱이 스레드 풀에서 처리
+    Mount('/', app=WSGIMiddleware(store.app))
+]
+
+app = Starlette(routes=routes, lifespan=lifespan)
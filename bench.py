@@ -0,0 +1,531 @@
+# 벤치마크: 합성 데이터 생성 -> 모든 라우트 부하 측정 -> 결과 저장/비교 (SQLite 백엔드, Oracle 없이 실행)
+#   python bench.py seed --products 100000 --sales 1000000      # bench/smart_store.db + 업로드용 엑셀 생성
+#   python bench.py run --requests 200 --concurrency 4           # bench/results/<시각>-<커밋>.json 저장
+#   python bench.py compare bench/results/A.json bench/results/B.json --threshold 0.2
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import sqlite_backend
+
+BENCH_DIR = os.environ.get('BENCH_DIR', 'bench')
+SEED_DB = os.path.join(BENCH_DIR, 'smart_store.db')
+UPLOAD_XLSX = os.path.join(BENCH_DIR, 'upload.xlsx')
+WORK_DIR = os.path.join(BENCH_DIR, 'work')
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+SEED_CHUNK = 50000  # executemany 한 번에 넣는 행 수
+BARCODE_BASE = 880000000000  # 합성 상품 바코드 (12자리, 상품 번호를 더함)
+NEW_BARCODE_BASE = 990000000000  # 벤치마크 중 새로 등록하는 바코드
+CATEGORIES = ['우유', '삼각김밥', '도시락', '샌드위치', '라면', '과자', '음료', '아이스크림', '빵', '커피']
+PRICES = list(range(500, 10001, 100))
+
+def meta_path(db_path):
+    return db_path + '.json'
+
+# 합성 데이터 생성
+def expiration_day(index, today_julian):
+    # 상품 번호로 정해지는 유통기한 (오늘 기준 -10 ~ +60일, 판매 기록에도 같은 값을 씀)
+    return today_julian + (index * 7919) % 71 - 10
+
+def product_rows(count, rng, today):
+    today_julian = sqlite_backend.to_julian(today)
+    for index in range(count):
+        yield (
+            str(BARCODE_BASE + index),
+            f'{CATEGORIES[index % len(CATEGORIES)]} {index:07d}',
+            expiration_day(index, today_julian),
+            rng.randint(0, 100),
+            rng.choice(PRICES)
+        )
+
+def sale_rows(count, products, days, rng, now):
+    # 판매 시각은 days 일 전부터 지금까지 고르게, 상품은 앞번호일수록 많이 팔리도록 치우치게 뽑음
+    start = sqlite_backend.to_julian(now - timedelta(days=days))
+    span = sqlite_backend.to_julian(now) - start
+    today_julian = sqlite_backend.to_julian(now.replace(hour=0, minute=0, second=0))
+    for index in range(count):
+        product = int(products * rng.random() ** 2)
+        yield (
+            str(BARCODE_BASE + product),
+            f'{CATEGORIES[product % len(CATEGORIES)]} {product:07d}',
+            expiration_day(product, today_julian),
+            rng.randint(1, 3),
+            rng.choice(PRICES),
+            start + span * (index + rng.random()) / count
+        )
+
+def insert_chunks(conn, sql, rows):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= SEED_CHUNK:
+            conn.executemany(sql, chunk)
+            chunk = []
+    if chunk:
+        conn.executemany(sql, chunk)
+
+def write_upload_xlsx(path, products, rows, rng, today):
+    # upload_excel 용 파일: 절반은 기존 상품 갱신, 절반은 새 상품
+    from openpyxl import Workbook
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(['barcode', 'name', 'expiration_date', 'quantity', 'price'])
+    existing = rng.sample(range(products), min(products, rows // 2))
+    for index in range(rows):
+        if index % 2 and index // 2 < len(existing):
+            barcode_number = str(BARCODE_BASE + existing[index // 2])
+        else:
+            barcode_number = str(NEW_BARCODE_BASE - 1 - index)
+        sheet.append([
+            barcode_number,
+            f'업로드 상품 {index:06d}',
+            (today + timedelta(days=rng.randint(1, 60))).strftime('%Y-%m-%d'),
+            rng.randint(1, 50),
+            rng.choice(PRICES)
+        ])
+    workbook.save(path)
+
+def seed(args):
+    os.makedirs(BENCH_DIR, exist_ok=True)
+    for path in (args.db, args.db + '-wal', args.db + '-shm'):
+        if os.path.exists(path):
+            os.remove(path)
+    rng = random.Random(args.seed)
+    now = datetime.now().replace(microsecond=0)
+    today = now.replace(hour=0, minute=0, second=0)
+    start = time.perf_counter()
+
+    sqlite_backend.create_pool(args.db).close()  # 스키마 생성
+    conn = sqlite3.connect(args.db)
+    conn.execute('PRAGMA journal_mode=OFF')
+    conn.execute('PRAGMA synchronous=OFF')
+    insert_chunks(conn, "INSERT INTO PRODUCTS (BARCODE, PRODUCT_NAME, EXPIRATION_DATE, QUANTITY, PRICE) "
+                        "VALUES (?, ?, ?, ?, ?)", product_rows(args.products, rng, today))
+    insert_chunks(conn, "INSERT INTO SALE (BARCODE, PRODUCT_NAME, EXPIRATION_DATE, QUANTITY, PRICE, SALE_DATE) "
+                        "VALUES (?, ?, ?, ?, ?, ?)", sale_rows(args.sales, args.products, args.days, rng, now))
+    conn.commit()
+    conn.close()
+    print(f"상품 {args.products}건, 판매 {args.sales}건 생성: {time.perf_counter() - start:.1f}초")
+
+    # 판매 집계 테이블은 앱의 재계산 경로로 채움
+    store = load_app(args.db)
+    store.rebuild_sales_rollups()
+    store.close_db_pool()
+    conn = sqlite3.connect(args.db)
+    conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    conn.execute('PRAGMA journal_mode=DELETE')
+    conn.close()
+
+    write_upload_xlsx(args.upload, args.products, args.upload_rows, rng, today)
+    with open(meta_path(args.db), 'w', encoding='utf-8') as f:
+        json.dump({
+            'products': args.products,
+            'sales': args.sales,
+            'days': args.days,
+            'seed': args.seed,
+            'upload_rows': args.upload_rows,
+            'created_at': now.strftime('%Y-%m-%d %H:%M:%S')
+        }, f, ensure_ascii=False, indent=2)
+    print(f"시드 완료: {args.db} ({time.perf_counter() - start:.1f}초)")
+
+def load_app(db_path):
+    # app 은 import 할 때 환경변수를 읽으므로 먼저 설정 (이미 지정된 값은 그대로 둠)
+    os.environ['DB_BACKEND'] = 'sqlite'
+    os.environ['SQLITE_PATH'] = db_path
+    os.environ.setdefault('SCHEDULER_ENABLED', '0')
+    os.environ.setdefault('LOADGEN_ENABLED', '1')
+    os.environ.setdefault('SCHEDULER_LOCK_DIR', os.path.join(WORK_DIR, 'locks'))
+    os.environ.setdefault('RESTOCK_EXPORT_DIR', os.path.join(WORK_DIR, 'exports'))
+    os.environ.setdefault('FORECAST_MODEL_DIR', os.path.join(WORK_DIR, 'models'))
+    import app as store
+    return store
+
+# 시나리오: 라우트마다 요청 하나를 만드는 함수 (ctx 는 실행 중 공유하는 상태)
+class BenchContext:
+    def __init__(self, meta, upload_path, rng_seed):
+        self.products = max(int(meta.get('products', 0)), 1)
+        self.upload_path = upload_path
+        self.rng = random.Random(rng_seed)
+        self.lock = threading.Lock()
+        self.next_new = 0
+        # 폐기 시나리오가 쓰는 상품은 뒤쪽 번호에서 하나씩 꺼내 다른 시나리오와 겹치지 않게 함 (PRODUCT_ID = 번호 + 1)
+        self.next_discard = self.products
+        self.job_ids = []
+        self.barcode_files = set()
+
+    def barcode(self):
+        with self.lock:
+            return str(BARCODE_BASE + int(self.products * self.rng.random() ** 2))
+
+    def barcodes(self, count):
+        return [self.barcode() for _ in range(count)]
+
+    def new_barcode(self):
+        with self.lock:
+            self.next_new += 1
+            return str(NEW_BARCODE_BASE + self.next_new)
+
+    def discard_index(self):
+        with self.lock:
+            self.next_discard -= 1
+            return self.next_discard
+
+    def remember_job(self, response):
+        payload = response.get_json(silent=True)
+        job_id = payload.get('job_id') if isinstance(payload, dict) else None
+        if job_id:
+            with self.lock:
+                self.job_ids.append(job_id)
+
+    def job_id(self):
+        with self.lock:
+            return self.rng.choice(self.job_ids) if self.job_ids else 'missing'
+
+    def barcode_file(self, barcode_number, fmt='png'):
+        with self.lock:
+            self.barcode_files.add(f'{barcode_number}.{fmt}')
+        return barcode_number
+
+def upload_request(ctx):
+    return {'data': {'file': (open(ctx.upload_path, 'rb'), 'upload.xlsx')}, 'content_type': 'multipart/form-data'}
+
+def read_first_event(client, path):
+    # SSE 는 끝나지 않으므로 첫 조각만 받고 연결을 닫음
+    response = client.get(path, buffered=False)
+    try:
+        next(iter(response.response))
+    finally:
+        response.close()
+    return response
+
+# (이름, 메서드, 규칙, 요청 수 상한, 경로/요청 인자 생성 함수, 허용 상태 코드)
+# 요청 수 상한이 있는 시나리오는 백그라운드 작업/파일 쓰기처럼 무거운 작업이라 적게 보냄
+SCENARIOS = [
+    ('index', 'GET', '/', None, lambda ctx: ('/', {}), {200}),
+    ('products', 'GET', '/api/products', None, lambda ctx: ('/api/products', {}), {200}),
+    ('products_page', 'GET', '/api/products', None,
+     lambda ctx: ('/api/products?limit=100&fields=barcode,name,quantity', {}), {200}),
+    ('products_etag', 'GET', '/api/products', None, lambda ctx: ('/api/products', {}), {200, 304}),
+    ('alerts', 'GET', '/products/alerts', None, lambda ctx: ('/products/alerts', {}), {200}),
+    ('expired', 'GET', '/products/expired', None, lambda ctx: ('/products/expired', {}), {200}),
+    ('product_by_barcode', 'GET', '/api/products/<barcode>', None,
+     lambda ctx: (f'/api/products/{ctx.barcode()}', {}), {200, 404}),
+    ('lookup', 'POST', '/api/products/lookup', None,
+     lambda ctx: ('/api/products/lookup', {'json': {'barcodes': ctx.barcodes(50)}}), {200}),
+    ('add_product', 'POST', '/api/add_product', None,
+     lambda ctx: ('/api/add_product', {'json': {
+         'name': '벤치마크 상품', 'barcode': ctx.barcode_file(ctx.new_barcode()), 'quantity': 10, 'price': 1500,
+         'expiration': (datetime.now() + timedelta(days=30)).strftime('%Y-%m-%d')}}), {200, 201}),
+    ('upload_excel', 'POST', '/api/upload_excel', 5, lambda ctx: ('/api/upload_excel', upload_request(ctx)), {200}),
+    ('sell_product', 'POST', '/api/sell_product', None,
+     lambda ctx: ('/api/sell_product', {'json': {'barcode': ctx.barcode(), 'quantity': 1}}), {200, 404, 409}),
+    ('checkout', 'POST', '/api/checkout', None,
+     lambda ctx: ('/api/checkout', {'json': {'items': [{'barcode': b, 'quantity': 1} for b in ctx.barcodes(3)]}}),
+     {200, 404, 409}),
+    ('ai_purchase', 'POST', '/api/ai_purchase', None, lambda ctx: ('/api/ai_purchase', {}), {200}),
+    ('recent_purchases', 'GET', '/api/recent_purchases', None, lambda ctx: ('/api/recent_purchases', {}), {200}),
+    ('daily_sales', 'GET', '/api/daily_sales', None, lambda ctx: ('/api/daily_sales', {}), {200}),
+    ('daily_sales_csv', 'GET', '/api/daily_sales', None, lambda ctx: ('/api/daily_sales?format=csv', {}), {200}),
+    ('monthly_sales', 'GET', '/api/monthly_sales', None, lambda ctx: ('/api/monthly_sales', {}), {200}),
+    ('chain_daily_sales', 'GET', '/api/chain/daily_sales', None, lambda ctx: ('/api/chain/daily_sales', {}), {200}),
+    ('chain_monthly_sales', 'GET', '/api/chain/monthly_sales', None, lambda ctx: ('/api/chain/monthly_sales', {}), {200}),
+    ('sales_history', 'GET', '/api/sales_history', 20,
+     lambda ctx: ('/api/sales_history?format=csv', {}), {200}),
+    ('daily_best_sellers', 'GET', '/api/daily_best_sellers', None,
+     lambda ctx: ('/api/daily_best_sellers', {}), {200}),
+    ('daily_best_sellers_refresh', 'GET', '/api/daily_best_sellers', 3,
+     lambda ctx: ('/api/daily_best_sellers?refresh=1', {}), {200}),
+    ('sales_rollups_rebuild', 'POST', '/api/sales_rollups/rebuild', 1,
+     lambda ctx: ('/api/sales_rollups/rebuild', {'json': {'days': 7}}), {202}),
+    ('chain_best_sellers', 'GET', '/api/chain/best_sellers', None,
+     lambda ctx: ('/api/chain/best_sellers', {}), {200}),
+    ('forecast_train', 'POST', '/api/forecast/train', 1, lambda ctx: ('/api/forecast/train', {}), {202}),
+    ('forecast', 'GET', '/api/forecast', None, lambda ctx: ('/api/forecast', {}), {200, 404}),
+    ('load_generator', 'POST', '/api/load_generator', 1,
+     lambda ctx: ('/api/load_generator', {'json': {'rate': 20, 'concurrency': 1, 'duration': 1, 'max_items': 2}}),
+     {202}),
+    ('generate_barcode', 'POST', '/generate_barcode', 20,
+     lambda ctx: ('/generate_barcode', {'json': {'barcode': ctx.barcode_file(ctx.barcode())}}), {200}),
+    ('barcode_image', 'GET', '/api/barcodes/<barcode_number>', 50,
+     lambda ctx: (f'/api/barcodes/{ctx.barcode_file(ctx.barcode(), "svg")}?format=svg', {}), {200}),
+    ('barcode_batch', 'POST', '/api/barcodes/batch', 2,
+     lambda ctx: ('/api/barcodes/batch', {'json': {'barcodes': [ctx.barcode_file(b) for b in ctx.barcodes(5)]}}),
+     {202}),
+    ('barcode_list', 'GET', '/barcode', None, lambda ctx: ('/barcode', {}), {200}),
+    ('restock_list_page', 'GET', '/restock_list', None, lambda ctx: ('/restock_list', {}), {200}),
+    ('get_restock_list', 'GET', '/api/get_restock_list', None, lambda ctx: ('/api/get_restock_list', {}), {200}),
+    ('generate_restock_excel', 'POST', '/api/generate_restock_excel', 5,
+     lambda ctx: ('/api/generate_restock_excel?format=csv', {}), {200, 202}),
+    ('check_and_generate_restock_excel', 'POST', '/api/check_and_generate_restock_excel', 5,
+     lambda ctx: ('/api/check_and_generate_restock_excel?format=csv', {'json': {'products': [
+         {'name': '벤치마크 입고', 'quantity': 5}]}}), {200, 202}),
+    ('download_export', 'GET', '/api/exports/<filename>', None,
+     lambda ctx: ('/api/exports/missing.csv', {}), {404}),
+    ('discard_product', 'DELETE', '/api/discard_product/<int:product_id>', 20,
+     lambda ctx: (f'/api/discard_product/{ctx.discard_index() + 1}', {}), {200}),
+    ('discard_products', 'POST', '/api/discard_products', 20,
+     lambda ctx: ('/api/discard_products', {'json': {'barcodes': [
+         str(BARCODE_BASE + ctx.discard_index()) for _ in range(5)]}}), {200}),
+    ('expiry_sweep', 'POST', '/api/expiry_sweep', 2, lambda ctx: ('/api/expiry_sweep', {}), {200, 202}),
+    ('receipts', 'GET', '/receipts', None, lambda ctx: ('/receipts', {}), {200}),
+    ('sales_statistics', 'GET', '/sales_statistics', None, lambda ctx: ('/sales_statistics', {}), {200}),
+    ('job', 'GET', '/api/jobs/<job_id>', None, lambda ctx: (f'/api/jobs/{ctx.job_id()}', {}), {200, 404}),
+    ('scheduler_jobs', 'GET', '/api/scheduler/jobs', None, lambda ctx: ('/api/scheduler/jobs', {}), {200}),
+    ('pool_stats', 'GET', '/api/pool_stats', None, lambda ctx: ('/api/pool_stats', {}), {200}),
+    ('stores', 'GET', '/api/stores', None, lambda ctx: ('/api/stores', {}), {200}),
+    ('metrics', 'GET', '/metrics', None, lambda ctx: ('/metrics', {}), {200}),
+    ('devtools', 'GET', '/.well-known/appspecific/com.chrome.devtools.json', None,
+     lambda ctx: ('/.well-known/appspecific/com.chrome.devtools.json', {}), {200}),
+    ('events', 'GET', '/api/events', 20, lambda ctx: ('/api/events', {'stream': True}), {200}),
+    ('static', 'GET', '/static/<path:filename>', None, lambda ctx: ('/static/missing.css', {}), {404}),
+]
+
+def check_coverage(app, scenarios):
+    # url_map 의 모든 (규칙, 메서드) 가 시나리오에 있는지 확인
+    covered = {(rule, method) for _, method, rule, _, _, _ in scenarios}
+    missing = []
+    for rule in app.url_map.iter_rules():
+        for method in sorted(rule.methods - {'HEAD', 'OPTIONS'}):
+            if (rule.rule, method) not in covered:
+                missing.append(f'{method} {rule.rule}')
+    return missing
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+def run_scenario(app, ctx, scenario, requests, concurrency, warmup=0):
+    name, method, _, limit, build, expected = scenario
+    count = min(requests, limit) if limit else requests
+    clients = threading.local()
+    latencies = []
+    errors = []
+    results_lock = threading.Lock()
+
+    def one(measured):
+        client = getattr(clients, 'client', None)
+        if client is None:
+            client = clients.client = app.test_client()
+        path, kwargs = build(ctx)
+        start = time.perf_counter()
+        try:
+            if kwargs.pop('stream', False):
+                response = read_first_event(client, path)
+            else:
+                response = client.open(path, method=method, **kwargs)
+            status = response.status_code
+        except Exception as e:
+            # 응답 스트리밍 중 난 예외는 500 과 같게 오류로 셈
+            print(f"{name} 요청 오류: {str(e)}")
+            response, status = None, 'exception'
+        elapsed = time.perf_counter() - start
+        if response is not None:
+            ctx.remember_job(response)
+        if not measured:
+            return
+        with results_lock:
+            latencies.append(elapsed)
+            if status not in expected:
+                errors.append(status)
+
+    # 캐시/연결이 데워지도록 먼저 몇 번 보내고 버림 (무거운 작업이라 요청 수 상한이 있는 시나리오는 제외)
+    for _ in range(0 if limit else warmup):
+        one(False)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=min(concurrency, count)) as executor:
+        list(executor.map(one, [True] * count))
+    wall = time.perf_counter() - start
+    latencies.sort()
+    return {
+        'name': name,
+        'method': method,
+        'requests': count,
+        'errors': len(errors),
+        'error_statuses': sorted(set(map(str, errors))),
+        'seconds': round(wall, 4),
+        'rps': round(count / wall, 2) if wall else 0.0,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 3),
+        'max_ms': round(latencies[-1] * 1000, 3)
+    }
+
+def wait_for_jobs(store, job_ids, timeout=600):
+    # 시나리오가 띄운 백그라운드 작업이 다음 시나리오 측정에 섞이지 않도록 끝날 때까지 기다림
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with store.jobs_lock:
+            running = [job_id for job_id in job_ids
+                       if store.background_jobs.get(job_id, {}).get('status') == 'running']
+        if not running:
+            return
+        time.sleep(0.05)
+    print(f"백그라운드 작업 {len(running)}개가 {timeout}초 안에 끝나지 않았습니다.")
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+def print_results(results):
+    print(f"{'scenario':<34}{'req':>6}{'err':>5}{'req/s':>10}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for result in results:
+        print(f"{result['name']:<34}{result['requests']:>6}{result['errors']:>5}{result['rps']:>10.1f}"
+              f"{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}{result['p99_ms']:>10.2f}")
+
+def remove_barcode_files(store, names):
+    for name in names:
+        path = os.path.join(store.BARCODE_DIR, name)
+        if os.path.exists(path):
+            os.remove(path)
+
+def run(args):
+    if not os.path.exists(args.db):
+        sys.exit(f"{args.db} 가 없습니다. 먼저 python bench.py seed 를 실행하세요.")
+    meta = {}
+    if os.path.exists(meta_path(args.db)):
+        with open(meta_path(args.db), encoding='utf-8') as f:
+            meta = json.load(f)
+
+    # 실행마다 시드 DB 를 복사해서 써서 결과가 이전 실행의 쓰기에 영향받지 않게 함
+    os.makedirs(WORK_DIR, exist_ok=True)
+    work_db = os.path.join(WORK_DIR, 'run.db')
+    for path in (work_db, work_db + '-wal', work_db + '-shm'):
+        if os.path.exists(path):
+            os.remove(path)
+    shutil.copyfile(args.db, work_db)
+    store = load_app(work_db)
+    app = store.create_app({'SCHEDULER_ENABLED': False})
+
+    scenarios = [scenario for scenario in SCENARIOS if not args.only or scenario[0] in args.only]
+    missing = check_coverage(app, SCENARIOS)
+    if missing:
+        sys.exit("시나리오가 없는 라우트: " + ', '.join(missing))
+
+    ctx = BenchContext(meta, args.upload, args.seed)
+    results = []
+    try:
+        for scenario in scenarios:
+            results.append(run_scenario(app, ctx, scenario, args.requests, args.concurrency, args.warmup))
+            print_results(results[-1:])
+            wait_for_jobs(store, list(ctx.job_ids))
+        store.job_executor.shutdown(wait=True)
+    finally:
+        remove_barcode_files(store, ctx.barcode_files)
+        store.close_db_pool()
+
+    report = {
+        'commit': git_commit(),
+        'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'backend': 'sqlite',
+        'dataset': meta,
+        'requests': args.requests,
+        'concurrency': args.concurrency,
+        'warmup': args.warmup,
+        'results': results
+    }
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    output = args.output or os.path.join(RESULTS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}-{report['commit']}.json")
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print()
+    print_results(results)
+    print(f"결과 저장: {output}")
+    if args.baseline:
+        return compare_reports(args.baseline, output, args.threshold, args.min_delta_ms)
+    return 0
+
+# 결과 비교: p95 가 threshold 비율과 min_delta_ms 이상 늘거나 처리량이 threshold 비율 이상 줄면 회귀로 봄
+# (요청 수가 COMPARE_MIN_REQUESTS 보다 적은 시나리오는 값만 보여 주고 판정하지 않음)
+COMPARE_MIN_REQUESTS = 10
+
+def compare_reports(baseline_path, current_path, threshold, min_delta_ms=2.0):
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline_report = json.load(f)
+    with open(current_path, encoding='utf-8') as f:
+        current_report = json.load(f)
+    for key in ('dataset', 'requests', 'concurrency'):
+        if baseline_report.get(key) != current_report.get(key):
+            print(f"주의: 두 실행의 {key} 가 다릅니다. ({baseline_report.get(key)} -> {current_report.get(key)})")
+    baseline = {result['name']: result for result in baseline_report['results']}
+
+    regressions = []
+    print(f"{'scenario':<34}{'p95 before':>12}{'p95 after':>12}{'rps before':>12}{'rps after':>12}")
+    for result in current_report['results']:
+        before = baseline.get(result['name'])
+        if before is None:
+            continue
+        judged = min(before['requests'], result['requests']) >= COMPARE_MIN_REQUESTS
+        slower = (result['p95_ms'] > before['p95_ms'] * (1 + threshold)
+                  and result['p95_ms'] - before['p95_ms'] >= min_delta_ms)
+        fewer = result['rps'] < before['rps'] * (1 - threshold)
+        flag = '  <- 회귀' if judged and (slower or fewer) else ''
+        print(f"{result['name']:<34}{before['p95_ms']:>12.2f}{result['p95_ms']:>12.2f}"
+              f"{before['rps']:>12.1f}{result['rps']:>12.1f}{flag}")
+        if flag:
+            regressions.append(result['name'])
+    if regressions:
+        print(f"회귀 {len(regressions)}건: {', '.join(regressions)}")
+        return 1
+    print("회귀 없음")
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='smart-store 벤치마크')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    seed_parser = commands.add_parser('seed', help='합성 데이터 DB 생성')
+    seed_parser.add_argument('--db', default=SEED_DB)
+    seed_parser.add_argument('--upload', default=UPLOAD_XLSX)
+    seed_parser.add_argument('--products', type=int, default=10000)
+    seed_parser.add_argument('--sales', type=int, default=100000)
+    seed_parser.add_argument('--days', type=int, default=90)
+    seed_parser.add_argument('--upload-rows', type=int, default=1000)
+    seed_parser.add_argument('--seed', type=int, default=42)
+
+    run_parser = commands.add_parser('run', help='모든 라우트 부하 측정')
+    run_parser.add_argument('--db', default=SEED_DB)
+    run_parser.add_argument('--upload', default=UPLOAD_XLSX)
+    run_parser.add_argument('--requests', type=int, default=200, help='시나리오별 요청 수')
+    run_parser.add_argument('--concurrency', type=int, default=4)
+    run_parser.add_argument('--warmup', type=int, default=3, help='시나리오별로 측정 전에 버리는 요청 수')
+    run_parser.add_argument('--seed', type=int, default=42)
+    run_parser.add_argument('--only', nargs='*', help='실행할 시나리오 이름')
+    run_parser.add_argument('--output')
+    run_parser.add_argument('--baseline', help='비교할 이전 결과 파일')
+    run_parser.add_argument('--threshold', type=float, default=0.2)
+    run_parser.add_argument('--min-delta-ms', type=float, default=2.0)
+
+    compare_parser = commands.add_parser('compare', help='두 결과 파일 비교')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.2, help='허용 변화 비율')
+    compare_parser.add_argument('--min-delta-ms', type=float, default=2.0, help='p95 회귀로 보는 최소 증가폭')
+
+    args = parser.parse_args(argv)
+    if args.command == 'seed':
+        seed(args)
+        return 0
+    if args.command == 'run':
+        return run(args)
+    return compare_reports(args.baseline, args.current, args.threshold, args.min_delta_ms)
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,2 @@
+# 라우트 모듈 (app.create_app() 이 모듈마다 블루프린트를 등록)
+# 공용 상태와 쿼리/행 변환은 app.py 에 두고, 각 모듈은 asgi.py 처럼 import app as store 로 사용
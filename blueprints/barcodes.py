@@ -0,0 +1,62 @@
+# 바코드 경로: 바코드 이미지 생성/조회/일괄 렌더링, 바코드 화면
+
+from flask import Blueprint, Response, jsonify, render_template, request
+
+import app as store
+
+barcodes_bp = Blueprint('barcodes', __name__)
+
+@barcodes_bp.route('/generate_barcode', methods=['POST'])
+def generate_barcode():
+    try:
+        data = request.json
+        barcode_number = data.get('barcode')
+        
+        if not barcode_number:
+            return jsonify({'error': '바코드 번호가 필요합니다.'}), 400
+        
+        # 바코드 이미지 생성
+        image_path = store.generate_barcode_image(barcode_number)
+        
+        return jsonify({
+            'message': '바코드 생성 완료',
+            'filename': image_path
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@barcodes_bp.route('/api/barcodes/<barcode_number>', methods=['GET'])
+def get_barcode(barcode_number):
+    fmt = request.args.get('format', 'png')
+    if fmt not in store.BARCODE_FORMATS:
+        return jsonify({'error': '지원하지 않는 이미지 형식입니다.'}), 400
+    if not store.is_valid_ean13(barcode_number):
+        return jsonify({'error': 'EAN-13 바코드는 12~13자리 숫자여야 합니다.'}), 400
+    try:
+        data, etag = store.get_barcode_image(barcode_number, fmt)
+        response = Response(data, mimetype=store.BARCODE_FORMATS[fmt])
+        response.set_etag(etag)
+        # 같은 번호의 바코드 이미지는 바뀌지 않으므로 오래 캐시
+        response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+        return response.make_conditional(request)
+    except Exception as e:
+        print(f"바코드 이미지 조회 오류: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@barcodes_bp.route('/api/barcodes/batch', methods=['POST'])
+def generate_barcode_batch():
+    data = request.get_json() or {}
+    barcodes = [str(number).strip() for number in data.get('barcodes', [])]
+    fmt = data.get('format', 'png')
+    if not barcodes:
+        return jsonify({'error': '바코드 번호가 필요합니다.'}), 400
+    if fmt not in store.BARCODE_FORMATS:
+        return jsonify({'error': '지원하지 않는 이미지 형식입니다.'}), 400
+
+    # 렌더링은 백그라운드 작업으로 넘기고 작업 ID 를 바로 반환
+    job_id = store.start_background_job('barcode_batch', store.render_barcode_batch, barcodes, fmt)
+    return jsonify({'message': '바코드 일괄 생성을 시작했습니다.', 'job_id': job_id, 'count': len(barcodes)}), 202
+
+@barcodes_bp.route('/barcode')
+def barcode_list():
+    return render_template('barcode.html')
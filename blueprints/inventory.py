@@ -0,0 +1,248 @@
+# 재고 경로: 메인 화면, 상품 조회/등록, 엑셀 일괄 입고, 유통기한 임박/만료 목록, 폐기
+import sys
+import traceback
+import uuid
+from datetime import datetime
+
+from flask import Blueprint, Response, jsonify, render_template, request
+
+import app as store
+
+inventory_bp = Blueprint('inventory', __name__)
+
+@inventory_bp.route('/')
+def index():
+    return render_template('code.html')
+
+@inventory_bp.route('/api/products', methods=['GET'])
+def get_products():
+    try:
+        fields, limit, after, output_format = store.parse_products_args(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    if output_format == 'ndjson':
+        sql, params, selected = store.build_products_query(fields, after, limit)
+        return Response(store.stream_in_store(store.stream_products_ndjson(sql, params, selected, fields)), mimetype='application/x-ndjson')
+
+    try:
+        # 재고 스냅샷 캐시에서 바로 응답 (재고가 바뀌지 않았으면 DB 조회 없음, ETag 가 같으면 304)
+        return store.cached_json_response(
+            ('products', request.query_string), store.inventory_response_version(),
+            lambda: store.products_payload(store.get_inventory_products(after, limit), fields, limit)
+        )
+    except Exception as e:
+        print("오류 발생:", str(e))  # 오류 메시지 출력
+        print("상세 오류:", traceback.format_exc())  # 상세 오류 출력
+        return jsonify({'error': str(e)}), 500
+
+@inventory_bp.route('/products/alerts', methods=['GET'])
+def get_alert_products():
+    try:
+        # 유통기한 인덱스에서 임박 구간만 읽음
+        def build():
+            now = datetime.now()
+            return store.alert_products_payload(store.select_expiry_rows('alert', now), now)
+        return store.cached_json_response('alerts', store.inventory_response_version(minute=True), build)
+    except Exception as e:
+        print(f"오류 발생: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@inventory_bp.route('/products/expired', methods=['GET'])
+def get_expired_products():
+    try:
+        # 유통기한 인덱스에서 만료 구간 + 재고 없는 상품만 읽음
+        return store.cached_json_response(
+            'expired', store.inventory_response_version(minute=True),
+            lambda: store.expired_products_payload(store.select_expiry_rows('expired', datetime.now()))
+        )  # 상품명 리스트 반환
+    except Exception as e:
+        print(f"오류 발생: {str(e)}", file=sys.stderr)
+        return jsonify({'error': str(e)}), 500
+
+@inventory_bp.route('/api/add_product', methods=['POST'])
+def add_product():
+    data = request.json
+    name = data.get('name')
+    expiration = data.get('expiration')
+    barcode_number = data.get('barcode')
+
+    # DB에 상품 추가
+    conn = store.get_db_connection()
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute(
+            "INSERT INTO PRODUCTS (BARCODE, PRODUCT_NAME, EXPIRATION_DATE, QUANTITY, PRICE) VALUES (:barcode, :name, TO_DATE(:expiration, 'YYYY-MM-DD'), :quantity, :price)",
+            {
+                'barcode': barcode_number,
+                'name': name,
+                'expiration': expiration,
+                'quantity': data.get('quantity', 0),  # 수량 추가
+                'price': data.get('price', 0)  # 가격 추가
+            }
+        )
+        
+        # 바코드 이미지 생성 (이미 만들어진 이미지는 재사용)
+        filename = store.generate_barcode_image(barcode_number)
+        
+        conn.commit()  # 변경 사항 커밋
+        try:
+            store.upsert_inventory_product(barcode_number, name, datetime.strptime(expiration, '%Y-%m-%d'),
+                                     data.get('quantity', 0), data.get('price', 0))
+        except (TypeError, ValueError):
+            store.invalidate_inventory()
+        store.publish_event('product_added', {
+            'barcode': barcode_number,
+            'name': name,
+            'expiration_date': expiration,
+            'quantity': data.get('quantity', 0),
+            'price': data.get('price', 0)
+        })
+        return jsonify({'message': '상품 및 바코드 추가 완료', 'barcode_image': filename})
+    
+    except Exception as e:
+        conn.rollback()  # 오류 발생 시 롤백
+        return jsonify({'error': str(e)}), 500
+    finally:
+        cursor.close()
+        conn.close()
+
+@inventory_bp.route('/api/upload_excel', methods=['POST'])
+def upload_excel():
+    file = request.files['file']
+    try:
+        chunks = store.read_excel_chunks(file)  # 엑셀 파일 읽기
+    except Exception as e:
+        print(f"엑셀 파일 읽기 오류: {str(e)}")
+        return jsonify({'error': '엑셀 파일을 읽는 데 오류가 발생했습니다.'}), 400
+
+    conn = None
+    cursor = None
+    total_rows = 0
+    imported = 0
+    rejected = []
+    try:
+        store.ensure_schema()
+        conn = store.get_db_connection()
+        cursor = conn.cursor()
+        seen = {}
+        for df in chunks:
+            # 엑셀 행 번호 (1행은 헤더)
+            rows, row_numbers, chunk_rejected = store.prepare_import_chunk(df, total_rows + 2)
+            total_rows += len(df)
+            rejected.extend(chunk_rejected)
+            if rows:
+                rejected.extend(store.stage_import_chunk(cursor, rows, row_numbers, seen))
+        # 모든 덩어리를 검증/적재한 뒤에만 PRODUCTS 를 바꾸고 한 번에 커밋 (중간 실패 시 아무것도 반영되지 않음)
+        if seen:
+            imported = store.merge_import_stage(cursor)
+        conn.commit()
+    except ValueError as e:
+        if conn:
+            conn.rollback()
+        return jsonify({'error': str(e), 'imported': 0}), 400
+    except Exception as e:
+        if conn:
+            conn.rollback()
+        print(f"엑셀 일괄 입고 오류: {str(e)}")
+        print(traceback.format_exc())
+        return jsonify({'error': str(e), 'imported': 0, 'rejected': rejected}), 500
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
+
+    rejected.sort(key=lambda item: item['row'])
+    if imported:
+        store.invalidate_inventory()
+        store.publish_event('products_imported', {'imported': imported, 'rejected': len(rejected)})
+    return jsonify({
+        'message': f'엑셀 파일에서 {imported}개 상품이 반영되었습니다. (거부 {len(rejected)}건)',
+        'total_rows': total_rows,
+        'imported': imported,
+        'rejected_count': len(rejected),
+        'rejected': rejected
+    })
+
+@inventory_bp.route('/api/discard_product/<int:product_id>', methods=['DELETE'])
+def discard_product(product_id):
+    conn = store.get_db_connection()
+    cursor = conn.cursor()
+    
+    try:
+        store.ensure_schema()
+        # 삭제 전에 폐기 이력으로 옮김
+        cursor.execute(
+            f"INSERT INTO DISCARD_HISTORY (SWEEP_ID, REASON, {store.DISCARD_ARCHIVE_COLUMNS}) "
+            f"SELECT :sweep_id, 'manual', {store.DISCARD_ARCHIVE_COLUMNS} FROM PRODUCTS WHERE PRODUCT_ID = :id",
+            {'sweep_id': uuid.uuid4().hex, 'id': product_id}
+        )
+        cursor.execute("DELETE FROM PRODUCTS WHERE PRODUCT_ID = :id", {'id': product_id})
+        conn.commit()
+        store.invalidate_inventory()
+        store.publish_event('product_discarded', {'product_id': product_id})
+        return jsonify({'message': '제품이 폐기되었습니다.'})
+    except Exception as e:
+        conn.rollback()
+        return jsonify({'error': str(e)}), 500
+    finally:
+        cursor.close()
+        conn.close()
+
+@inventory_bp.route('/api/products/<barcode>', methods=['GET'])
+def get_product_by_barcode(barcode):
+    try:
+        row = store.lookup_products([barcode]).get(barcode)
+        if row:
+            return jsonify(store.product_row_to_dict(row, list(store.PRODUCT_COLUMNS), list(store.PRODUCT_COLUMNS)))
+        else:
+            return jsonify({'error': '제품을 찾을 수 없습니다.'}), 404
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@inventory_bp.route('/api/products/lookup', methods=['POST'])
+def lookup_products_bulk():
+    try:
+        barcodes = store.parse_lookup_barcodes(request.get_json(silent=True) or {})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        found = store.lookup_products(dict.fromkeys(barcodes))
+        return jsonify(store.lookup_payload(barcodes, found))
+    except Exception as e:
+        print(f"바코드 일괄 조회 오류: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@inventory_bp.route('/api/discard_products', methods=['POST'])
+def discard_products():
+    data = request.get_json(silent=True) or {}
+    barcodes = data.get('barcodes', [])
+    if not barcodes or not isinstance(barcodes, list):
+        return jsonify({'error': '폐기할 바코드가 없습니다.'}), 400
+    if len(barcodes) > store.DISCARD_MAX_BARCODES:
+        return jsonify({'error': f'한 번에 최대 {store.DISCARD_MAX_BARCODES}개까지 폐기할 수 있습니다.'}), 400
+
+    try:
+        sweep_id, results = store.discard_barcodes([str(barcode).strip() for barcode in barcodes])
+        discarded = sum(1 for result in results if result['status'] == 'discarded')
+        return jsonify({
+            'message': f'{discarded}개 제품이 폐기되었습니다.',
+            'sweep_id': sweep_id,
+            'results': results
+        })
+    except Exception as e:
+        print(f"폐기 처리 오류: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@inventory_bp.route('/api/expiry_sweep', methods=['POST'])
+def expiry_sweep():
+    # 유통기한이 지났거나 재고가 없는 상품 전체를 즉시 폐기 (야간 작업과 같은 처리)
+    try:
+        result = store.sweep_expired_products()
+        return jsonify({'message': f"{result['deleted']}개 제품이 폐기되었습니다.", **result})
+    except Exception as e:
+        print(f"폐기 처리 오류: {str(e)}")
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,129 @@
+# 운영 경로: 백그라운드 작업 상태, 실시간 이벤트(SSE), 메트릭, 커넥션 풀, 매장 목록, 스케줄러 상태
+import queue
+from datetime import datetime
+
+from flask import Blueprint, Response, jsonify, request
+
+import app as store
+
+ops_bp = Blueprint('ops', __name__)
+
+@ops_bp.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = store.get_background_job(job_id)
+    if not job:
+        return jsonify({'error': '작업을 찾을 수 없습니다.'}), 404
+    return jsonify(job)
+
+@ops_bp.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    body = store.render_metrics()
+    with store.pool_lock:
+        pools = list(store.db_pools.items())
+    if pools:
+        # 풀 상태는 조회 시점 값 (매장별)
+        body += (
+            "# HELP db_pool_connections Pooled connections by store and state\n"
+            "# TYPE db_pool_connections gauge\n"
+        )
+        for store_id, pool in pools:
+            body += (
+                f'db_pool_connections{{store="{store_id}",state="open"}} {pool.opened}\n'
+                f'db_pool_connections{{store="{store_id}",state="busy"}} {pool.busy}\n'
+            )
+    return Response(body, mimetype='text/plain; version=0.0.4')
+
+@ops_bp.route('/api/pool_stats', methods=['GET'])
+def pool_stats():
+    try:
+        return jsonify(store.get_pool_stats())
+    except Exception as e:
+        print(f"풀 상태 조회 오류: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@ops_bp.route('/api/stores', methods=['GET'])
+def list_stores():
+    # 접속 정보는 빼고 매장 ID 만 (요청에 ?store_id= 또는 X-Store-Id 헤더로 지정)
+    return jsonify({'default': store.DEFAULT_STORE_ID, 'current': store.get_current_store_id(), 'stores': store.get_store_ids()})
+
+@ops_bp.route('/.well-known/appspecific/com.chrome.devtools.json')
+def devtools_json():
+    return jsonify({"message": "Chrome DevTools is ready."})
+
+@ops_bp.route('/api/events', methods=['GET'])
+def events():
+    # Last-Event-ID 헤더(또는 ?last_event_id=)가 있으면 놓친 이벤트부터 다시 보냄
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    last_event_id = int(last_event_id) if last_event_id and last_event_id.isdigit() else None
+    subscriber, backlog = store.subscribe_events(last_event_id)
+
+    def stream():
+        try:
+            yield 'retry: 3000\n\n'
+            for event in backlog:
+                yield store.format_sse(event)
+            while True:
+                try:
+                    event = subscriber.get(timeout=store.EVENT_HEARTBEAT_SECONDS)
+                except queue.Empty:
+                    yield ': keep-alive\n\n'  # 연결 유지용 주석
+                    continue
+                if event is None:
+                    break
+                yield store.format_sse(event)
+        finally:
+            store.unsubscribe_events(subscriber)
+
+    response = Response(stream(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # 프록시 버퍼링 방지
+    return response
+
+@ops_bp.route('/api/scheduler/jobs', methods=['GET'])
+def scheduler_jobs():
+    # 이 프로세스의 다음 실행 시각과 현재 매장의 공유 실행 기록(리스)
+    try:
+        jobs = store.get_scheduler_jobs()
+        if store.SCHEDULER_LOCK == 'db':
+            conn = store.get_db_connection()
+            cursor = conn.cursor()
+            try:
+                cursor.execute("""
+                    SELECT JOB_NAME, OWNER, LEASE_UNTIL, LAST_STARTED, LAST_FINISHED,
+                           LAST_DURATION_MS, LAST_OUTCOME, LAST_ERROR
+                    FROM SCHEDULER_RUNS
+                """)
+                runs = {
+                    row[0]: {
+                        'owner': row[1],
+                        'running': bool(row[2] and row[2] > datetime.now()),
+                        'last_started': row[3].strftime('%Y-%m-%d %H:%M:%S') if row[3] else None,
+                        'last_finished': row[4].strftime('%Y-%m-%d %H:%M:%S') if row[4] else None,
+                        'last_duration_ms': row[5],
+                        'last_outcome': row[6],
+                        'last_error': row[7]
+                    }
+                    for row in cursor
+                }
+            finally:
+                cursor.close()
+                conn.close()
+        else:
+            runs = {}
+            for job in jobs:
+                state = store.read_scheduler_state(store.store_job_name(job['name']))
+                if state:
+                    runs[store.store_job_name(job['name'])] = {
+                        'owner': state.get('owner'),
+                        'last_started': datetime.fromtimestamp(state['last_started']).strftime('%Y-%m-%d %H:%M:%S') if state.get('last_started') else None,
+                        'last_finished': datetime.fromtimestamp(state['last_finished']).strftime('%Y-%m-%d %H:%M:%S') if state.get('last_finished') else None,
+                        'last_duration_ms': state.get('last_duration_ms'),
+                        'last_outcome': state.get('last_outcome'),
+                        'last_error': state.get('last_error')
+                    }
+        for job in jobs:
+            job['last_run'] = runs.get(store.store_job_name(job['name']))
+        return jsonify({'lock': store.SCHEDULER_LOCK, 'owner': store.SCHEDULER_OWNER, 'store_id': store.get_current_store_id(), 'jobs': jobs})
+    except Exception as e:
+        print(f"스케줄러 상태 조회 오류: {str(e)}")
+        return jsonify({'error': str(e)}), 500
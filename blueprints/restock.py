@@ -0,0 +1,91 @@
+# 입고 경로: 입고 필요 목록, 입고 엑셀/CSV 내보내기와 다운로드
+import os
+import random
+import traceback
+from datetime import datetime, timedelta
+
+from flask import Blueprint, jsonify, render_template, request
+
+import app as store
+
+restock_bp = Blueprint('restock', __name__)
+
+@restock_bp.route('/api/check_and_generate_restock_excel', methods=['POST'])
+def check_and_generate_restock_excel():
+    try:
+        fmt = store.parse_export_format(request.args.get('format'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    try:
+        data = request.get_json()
+        products = data.get('products', [])
+        if not products:
+            return jsonify({'error': '입고할 제품이 없습니다.'}), 400
+
+        def rows():
+            # 바코드, 유통기한 임의 생성
+            for product in products:
+                # 바코드가 없으면 13자리 임의 숫자 생성
+                barcode_number = product.get('barcode') or ''.join([str(random.randint(0, 9)) for _ in range(13)])
+                # 유통기한이 없으면 오늘로부터 30일 뒤로 임의 설정
+                expiration_date = product.get('expiration_date') or (datetime.now() + timedelta(days=30)).strftime('%Y-%m-%d')
+                yield [barcode_number, product.get('name', ''), product.get('price', 0), product.get('quantity', 0), expiration_date]
+
+        filename, _ = store.write_restock_export(['barcode', 'name', 'price', 'quantity', 'expiration_date'], rows(), fmt)
+        return store.send_restock_export(filename, fmt)
+    except Exception as e:
+        print(f"Error occurred: {str(e)}")
+        print(traceback.format_exc())
+        return jsonify({'error': str(e)}), 500
+
+@restock_bp.route('/restock_list')
+def restock_list():
+    return render_template('restock_list.html')
+
+@restock_bp.route('/api/get_restock_list', methods=['GET'])
+def get_restock_list():
+    try:
+        # 유통기한 인덱스에서 수량이 0이고 유통기한이 남은 제품 조회
+        products = []
+        for row in store.get_expiry_rows('restock'):
+            product = {
+                'name': row[1],  # PRODUCT_NAME
+                'price': row[4],
+                'quantity': 20  # 입고할 수량을 20으로 설정
+            }
+            products.append(product)
+        return jsonify(products)
+    except Exception as e:
+        print(f"Error occurred: {str(e)}")  # 오류 메시지 출력
+        return jsonify({'error': str(e)}), 500
+
+@restock_bp.route('/api/generate_restock_excel', methods=['POST'])
+def generate_restock_excel():
+    # 적은 양은 바로 다운로드, 많으면(또는 async=1) 백그라운드 작업으로 만들고 job_id 반환
+    try:
+        fmt = store.parse_export_format(request.args.get('format'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    try:
+        count = store.count_restock_products()
+        if not count:
+            return jsonify({'message': '입고할 제품이 없습니다.'}), 200
+
+        if request.args.get('async') or count > store.RESTOCK_EXPORT_INLINE_ROWS:
+            job_id = store.start_background_job('restock_export', store.export_restock_products, fmt)
+            return jsonify({'message': '입고 엑셀 파일을 생성하고 있습니다.', 'job_id': job_id, 'rows': count}), 202
+
+        result = store.export_restock_products(fmt)
+        return store.send_restock_export(result['file'], fmt)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@restock_bp.route('/api/exports/<filename>', methods=['GET'])
+def download_export(filename):
+    # 백그라운드 작업으로 만든 내보내기 파일 다운로드
+    match = store.RESTOCK_EXPORT_NAME.match(filename)
+    if not match or not os.path.exists(os.path.join(store.store_path(store.RESTOCK_EXPORT_DIR), filename)):
+        return jsonify({'error': '파일을 찾을 수 없습니다.'}), 404
+    response = store.send_restock_export(filename, match.group(1))
+    store.mark_job_file_collected('restock_export', filename)  # 이후 정리 대상이 됨
+    return response
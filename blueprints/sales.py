@@ -0,0 +1,210 @@
+# 판매 경로: 판매/결제, 최근 구매, 일별/월별/전 매장 통계, 판매 이력 내보내기, 입고 추천, 수요 예측
+import traceback
+
+from flask import Blueprint, jsonify, render_template, request
+
+import app as store
+
+sales_bp = Blueprint('sales', __name__)
+
+@sales_bp.route('/api/recent_purchases', methods=['GET'])
+def get_recent_purchases():
+    try:
+        # since 가 있으면 그 이후 새 기록만 반환 (다음 요청에 last_seq 를 since 로 사용)
+        since = store.parse_since(request.args.get('since'))
+        return jsonify(store.recent_purchases_payload(store.get_recent_purchases_since(since or 0), since))
+    except Exception as e:
+        print(f"오류 발생: {str(e)}")  # 오류 로그
+        return jsonify({'error': '내부 서버 오류', 'details': str(e)}), 500
+
+@sales_bp.route('/api/ai_purchase', methods=['POST'])
+def ai_purchase():
+    try:
+        store.ai_purchase_simulation()  # AI 구매 로직 실행
+        return jsonify({'message': 'AI가 제품을 구매했습니다.'})
+    except Exception as e:
+        return jsonify({'error': '구매 처리 중 오류 발생', 'details': str(e)}), 500
+
+@sales_bp.route('/api/load_generator', methods=['POST'])
+def load_generator():
+    if not store.LOADGEN_ENABLED:
+        return jsonify({'error': '부하 생성기가 비활성화되어 있습니다. (LOADGEN_ENABLED=1)'}), 403
+    data = request.get_json(silent=True) or {}
+    try:
+        rate = float(data.get('rate', 100))
+        concurrency = int(data.get('concurrency', 4))
+        duration = float(data.get('duration', 10))
+        max_items = int(data.get('max_items', 3))
+        if rate <= 0 or concurrency <= 0 or duration <= 0 or max_items <= 0:
+            raise ValueError
+    except (TypeError, ValueError):
+        return jsonify({'error': 'rate, concurrency, duration, max_items 는 양수여야 합니다.'}), 400
+    job_id = store.start_background_job('load_generator', store.run_load_generator, rate, concurrency, duration, max_items)
+    return jsonify({'message': '부하 생성을 시작했습니다.', 'job_id': job_id}), 202
+
+@sales_bp.route('/receipts')
+def receipts():
+    return render_template('receipts.html')  # receipts.html 파일을 생성하여 영수증 조회 페이지를 구성합니다.
+
+@sales_bp.route('/api/sell_product', methods=['POST'])
+def sell_product():
+    data = request.json
+    barcode = data.get('barcode')
+    quantity = data.get('quantity', 1)
+
+    try:
+        lines = store.parse_cart_lines([{'barcode': barcode, 'quantity': quantity}])
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        # 결제와 같은 경로로 재고 차감 + 판매 기록
+        purchases, rejected = store.process_checkout(lines)
+        if rejected:
+            if rejected[0]['available'] is None:
+                return jsonify({'error': '제품을 찾을 수 없습니다.'}), 404
+            return jsonify({'error': '재고가 부족합니다.', 'available': rejected[0]['available']}), 409
+        return jsonify({'message': '판매 기록이 저장되었습니다.', 'sale_id': purchases[0]['seq']})
+    except Exception as e:
+        print(f"오류 발생: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@sales_bp.route('/api/checkout', methods=['POST'])
+def checkout():
+    data = request.get_json(silent=True) or {}
+    try:
+        lines = store.parse_cart_lines(data.get('items'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        purchases, rejected = store.process_checkout(lines)
+        if rejected:
+            return jsonify({'error': '재고가 부족하거나 없는 상품이 있어 결제가 취소되었습니다.', 'rejected': rejected}), 409
+        return jsonify(store.checkout_payload(purchases))
+    except Exception as e:
+        print(f"결제 처리 중 오류 발생: {str(e)}")
+        print(traceback.format_exc())
+        return jsonify({'error': str(e)}), 500
+
+@sales_bp.route('/api/daily_sales', methods=['GET'])
+def get_daily_sales():
+    try:
+        fmt = store.parse_stats_format(request.args.get('format'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    try:
+        if fmt != 'json':
+            return store.stats_table_response(store.DAILY_SALES_SQL, None, ['sale_date', 'total_revenue'], fmt, 'daily_sales')
+        # 판매 버전이 같고 SALES_CACHE_TTL 이내면 DB 조회 없이 캐시/304 로 응답
+        return store.cached_json_response('daily_sales', store.get_sales_version(), store.query_daily_sales, store.SALES_CACHE_TTL)
+    except Exception as e:
+        print(f"Error occurred: {str(e)}")  # Log the error
+        return jsonify({'error': 'Internal Server Error', 'details': str(e)}), 500
+
+@sales_bp.route('/api/sales_history', methods=['GET'])
+def export_sales_history():
+    # BI 도구용 SALE 원본 이력 (기본 csv, pyarrow 가 있으면 arrow/parquet)
+    try:
+        fmt = store.parse_stats_format(request.args.get('format'), 'csv')
+        if fmt == 'json':
+            raise ValueError('판매 이력은 csv, arrow, parquet 형식만 지원합니다.')
+        start_day, end_day = store.parse_history_range(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    try:
+        return store.stats_table_response(store.SALES_HISTORY_SQL, {'start_day': start_day, 'end_day': end_day},
+                                    store.SALES_HISTORY_COLUMNS, fmt, 'sales_history')
+    except Exception as e:
+        print(f"Error occurred: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@sales_bp.route('/sales_statistics')
+def sales_statistics():
+    return render_template('sales_statistics.html')
+
+@sales_bp.route('/api/monthly_sales', methods=['GET'])
+def get_monthly_sales():
+    try:
+        fmt = store.parse_stats_format(request.args.get('format'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    try:
+        if fmt != 'json':
+            return store.stats_table_response(store.MONTHLY_SALES_SQL, None, ['month', 'total_quantity', 'price'], fmt, 'monthly_sales')
+        return store.cached_json_response('monthly_sales', store.get_sales_version(), store.query_monthly_sales, store.SALES_CACHE_TTL)
+    except Exception as e:
+        print(f"Error occurred: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@sales_bp.route('/api/chain/daily_sales', methods=['GET'])
+def get_chain_daily_sales():
+    try:
+        return store.cached_json_response('chain_daily_sales', store.chain_sales_version(), store.query_chain_daily_sales, store.SALES_CACHE_TTL)
+    except Exception as e:
+        print(f"전 매장 일별 판매 조회 오류: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@sales_bp.route('/api/chain/monthly_sales', methods=['GET'])
+def get_chain_monthly_sales():
+    try:
+        return store.cached_json_response('chain_monthly_sales', store.chain_sales_version(), store.query_chain_monthly_sales, store.SALES_CACHE_TTL)
+    except Exception as e:
+        print(f"전 매장 월별 판매 조회 오류: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@sales_bp.route('/api/sales_rollups/rebuild', methods=['POST'])
+def rebuild_sales_rollups_api():
+    data = request.get_json(silent=True) or {}
+    days = data.get('days')
+    if days is not None and (not isinstance(days, int) or days <= 0):
+        return jsonify({'error': 'days 는 1 이상의 정수여야 합니다.'}), 400
+    job_id = store.start_background_job('sales_rollup_rebuild', store.rebuild_sales_rollups, days)
+    return jsonify({'message': '판매 집계 재계산을 시작했습니다.', 'job_id': job_id}), 202
+
+@sales_bp.route('/api/daily_best_sellers', methods=['GET'])
+def daily_best_sellers():
+    try:
+        # 저장된 추천 스냅샷 반환 (refresh=1 이면 새 판매가 있을 때 백그라운드 갱신)
+        snapshot = store.get_recommendation_snapshot()
+        job_id = None
+        if request.args.get('refresh'):
+            job_id = store.start_recommendation_refresh_if_changed(snapshot)
+        
+        return jsonify(store.best_sellers_payload(snapshot, job_id))
+    except Exception as e:
+        print(f"데이터 조회 중 오류 발생: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@sales_bp.route('/api/chain/best_sellers', methods=['GET'])
+def chain_best_sellers():
+    try:
+        # 매장별 추천 스냅샷을 동시에 가져와 합침 (스냅샷이 없는 매장만 새로 계산)
+        snapshots = store.map_stores(lambda store_id: store.get_recommendation_snapshot())
+        return jsonify({
+            'recommendations': store.merge_chain_recommendations(snapshots),
+            'stores': {
+                store_id: {'generated_at': snapshot['generated_at'], 'recommendations': len(snapshot['recommendations'])}
+                for store_id, snapshot in snapshots.items()
+            }
+        })
+    except Exception as e:
+        print(f"전 매장 입고 추천 조회 오류: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@sales_bp.route('/api/forecast', methods=['GET'])
+def get_forecast():
+    try:
+        forecast = store.get_demand_forecast()
+        if not forecast:
+            return jsonify({'error': '수요 예측 결과가 없습니다.'}), 404
+        return jsonify(forecast)
+    except Exception as e:
+        print(f"수요 예측 조회 중 오류 발생: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@sales_bp.route('/api/forecast/train', methods=['POST'])
+def train_forecast():
+    # 학습/예측은 백그라운드 작업으로만 실행
+    job_id = store.start_background_job('forecast_train', store.train_and_forecast)
+    return jsonify({'message': '수요 예측 모델 학습을 시작했습니다.', 'job_id': job_id}), 202
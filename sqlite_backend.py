@@ -0,0 +1,621 @@
+# SQLite 저장소 백엔드 (DB_BACKEND=sqlite): Oracle XE 없이 로컬 개발/벤치마크를 돌리기 위한 대체 DB
+# app.py 가 쓰는 python-oracledb 의 일부(풀, 커서, 배열 DML, RETURNING INTO, 컬렉션 바인드)를 흉내 내고,
+# Oracle 전용 SQL 은 문장별로 한 번만 SQLite 문법으로 바꿔서 캐시함
+# 날짜는 율리우스일(REAL)로 저장해 Oracle 처럼 날짜끼리 빼면 일수, 날짜 - 숫자는 날짜가 되도록 함
+import json
+import math
+import queue
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+
+Error = sqlite3.Error
+DatabaseError = sqlite3.DatabaseError
+DB_TYPE_DATE = 'DATE'
+DB_TYPE_NUMBER = 'NUMBER'
+
+STATEMENT_CACHE_SIZE = 512  # 변환한 SQL 보관 수
+
+# PRODUCTS/SALE 과 app.py 의 보조 테이블 (SALE_SEQ.NEXTVAL 은 SALE.ID 의 AUTOINCREMENT 로 대신함)
+SCHEMA_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS PRODUCTS (
+        PRODUCT_ID INTEGER PRIMARY KEY AUTOINCREMENT,
+        BARCODE TEXT UNIQUE,
+        PRODUCT_NAME TEXT,
+        EXPIRATION_DATE REAL,
+        QUANTITY INTEGER,
+        PRICE REAL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS SALE (
+        ID INTEGER PRIMARY KEY AUTOINCREMENT,
+        BARCODE TEXT,
+        PRODUCT_NAME TEXT,
+        EXPIRATION_DATE REAL,
+        QUANTITY INTEGER,
+        PRICE REAL,
+        SALE_DATE REAL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS IX_SALE_DATE ON SALE (SALE_DATE)",
+    "CREATE INDEX IF NOT EXISTS IX_PRODUCTS_EXPIRATION ON PRODUCTS (EXPIRATION_DATE)",
+    """
+    CREATE TABLE IF NOT EXISTS SALES_DAILY_PRODUCT (
+        SALE_DAY REAL NOT NULL,
+        BARCODE TEXT NOT NULL,
+        PRODUCT_NAME TEXT,
+        QUANTITY INTEGER DEFAULT 0 NOT NULL,
+        REVENUE REAL DEFAULT 0 NOT NULL,
+        SALE_COUNT INTEGER DEFAULT 0 NOT NULL,
+        PRICE_SUM REAL DEFAULT 0 NOT NULL,
+        PRIMARY KEY (SALE_DAY, BARCODE)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS SALES_DAILY_STORE (
+        SALE_DAY REAL PRIMARY KEY,
+        QUANTITY INTEGER DEFAULT 0 NOT NULL,
+        REVENUE REAL DEFAULT 0 NOT NULL,
+        SALE_COUNT INTEGER DEFAULT 0 NOT NULL,
+        PRICE_SUM REAL DEFAULT 0 NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS SALES_MONTHLY_STORE (
+        SALE_MONTH REAL PRIMARY KEY,
+        QUANTITY INTEGER DEFAULT 0 NOT NULL,
+        REVENUE REAL DEFAULT 0 NOT NULL,
+        SALE_COUNT INTEGER DEFAULT 0 NOT NULL,
+        PRICE_SUM REAL DEFAULT 0 NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS RECOMMENDATION_SNAPSHOTS (
+        GENERATED_AT REAL DEFAULT (julianday('now', 'localtime')) NOT NULL,
+        LAST_SALE_ID INTEGER DEFAULT 0 NOT NULL,
+        RECOMMENDATIONS TEXT,
+        EXPLANATION TEXT
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS IX_RECOMMENDATION_GENERATED ON RECOMMENDATION_SNAPSHOTS (GENERATED_AT)",
+    """
+    CREATE TABLE IF NOT EXISTS DISCARD_HISTORY (
+        DISCARDED_AT REAL DEFAULT (julianday('now', 'localtime')) NOT NULL,
+        SWEEP_ID TEXT NOT NULL,
+        REASON TEXT NOT NULL,
+        BARCODE TEXT,
+        PRODUCT_NAME TEXT,
+        EXPIRATION_DATE REAL,
+        QUANTITY INTEGER,
+        PRICE REAL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS IX_DISCARD_HISTORY_AT ON DISCARD_HISTORY (DISCARDED_AT)",
+    """
+    CREATE TABLE IF NOT EXISTS SCHEDULER_RUNS (
+        JOB_NAME TEXT PRIMARY KEY,
+        OWNER TEXT,
+        LEASE_UNTIL REAL,
+        LAST_STARTED REAL,
+        LAST_FINISHED REAL,
+        LAST_DURATION_MS REAL,
+        LAST_OUTCOME TEXT,
+        LAST_ERROR TEXT
+    )
+    """,
+]
+
+# 연결마다 만드는 임시 테이블 (Oracle 의 ON COMMIT DELETE ROWS 는 commit() 에서 비워서 흉내 냄)
+TEMP_DDL = [
+    """
+    CREATE TEMP TABLE IF NOT EXISTS PRODUCTS_IMPORT_STAGE (
+        BARCODE TEXT, PRODUCT_NAME TEXT, EXPIRATION_DATE REAL, QUANTITY INTEGER, PRICE REAL
+    )
+    """,
+]
+ON_COMMIT_DELETE = ['temp.PRODUCTS_IMPORT_STAGE']
+
+# MERGE 는 대상 테이블별로 같은 결과를 내는 UPSERT 로 바꿈 (바인드 이름은 app.py 의 MERGE 와 같음)
+MERGE_UPSERTS = {
+    'SALES_DAILY_PRODUCT': """
+        INSERT INTO SALES_DAILY_PRODUCT (SALE_DAY, BARCODE, PRODUCT_NAME, QUANTITY, REVENUE, SALE_COUNT, PRICE_SUM)
+        VALUES (TRUNC(SYSDATE()), :barcode, :product_name, :quantity, :quantity * :price, 1, :price)
+        ON CONFLICT (SALE_DAY, BARCODE) DO UPDATE SET
+            QUANTITY = QUANTITY + excluded.QUANTITY,
+            REVENUE = REVENUE + excluded.REVENUE,
+            SALE_COUNT = SALE_COUNT + 1,
+            PRICE_SUM = PRICE_SUM + excluded.PRICE_SUM
+    """,
+    'SALES_DAILY_STORE': """
+        INSERT INTO SALES_DAILY_STORE (SALE_DAY, QUANTITY, REVENUE, SALE_COUNT, PRICE_SUM)
+        VALUES (TRUNC(SYSDATE()), :quantity, :quantity * :price, 1, :price)
+        ON CONFLICT (SALE_DAY) DO UPDATE SET
+            QUANTITY = QUANTITY + excluded.QUANTITY,
+            REVENUE = REVENUE + excluded.REVENUE,
+            SALE_COUNT = SALE_COUNT + 1,
+            PRICE_SUM = PRICE_SUM + excluded.PRICE_SUM
+    """,
+    'SALES_MONTHLY_STORE': """
+        INSERT INTO SALES_MONTHLY_STORE (SALE_MONTH, QUANTITY, REVENUE, SALE_COUNT, PRICE_SUM)
+        VALUES (TRUNC(SYSDATE(), 'MM'), :quantity, :quantity * :price, 1, :price)
+        ON CONFLICT (SALE_MONTH) DO UPDATE SET
+            QUANTITY = QUANTITY + excluded.QUANTITY,
+            REVENUE = REVENUE + excluded.REVENUE,
+            SALE_COUNT = SALE_COUNT + 1,
+            PRICE_SUM = PRICE_SUM + excluded.PRICE_SUM
+    """,
+    'PRODUCTS': """
+        INSERT INTO PRODUCTS (BARCODE, PRODUCT_NAME, EXPIRATION_DATE, QUANTITY, PRICE)
+        SELECT BARCODE, PRODUCT_NAME, EXPIRATION_DATE, QUANTITY, PRICE FROM temp.PRODUCTS_IMPORT_STAGE WHERE true
+        ON CONFLICT (BARCODE) DO UPDATE SET
+            QUANTITY = excluded.QUANTITY,
+            PRICE = excluded.PRICE,
+            EXPIRATION_DATE = excluded.EXPIRATION_DATE
+    """,
+    'SCHEDULER_RUNS': "INSERT OR IGNORE INTO SCHEDULER_RUNS (JOB_NAME) VALUES (:name)",
+}
+
+# 결과 컬럼 이름이 이 중 하나면(TRUNC/MIN/MAX 로 감싼 경우 포함) 숫자 값을 datetime 으로 바꿈
+DATE_COLUMNS = {
+    'EXPIRATION_DATE', 'SALE_DATE', 'SALE_DAY', 'SALE_MONTH', 'GENERATED_AT', 'DISCARDED_AT',
+    'LEASE_UNTIL', 'LAST_STARTED', 'LAST_FINISHED'
+}
+DATE_LABEL = re.compile(r'^(?:(?:TRUNC|MIN|MAX)\()*\s*(?:\w+\.)?(\w+)', re.I)
+
+class NotSupportedError(DatabaseError):
+    pass
+
+class PoolTimeoutError(DatabaseError):
+    pass
+
+# 날짜 <-> 율리우스일
+UNIX_EPOCH_JULIAN = 2440587.5
+
+def to_julian(value):
+    if isinstance(value, datetime):
+        return UNIX_EPOCH_JULIAN + (value - datetime(1970, 1, 1)).total_seconds() / 86400
+    return UNIX_EPOCH_JULIAN + (value - date(1970, 1, 1)).days
+
+def from_julian(value):
+    seconds = round((value - UNIX_EPOCH_JULIAN) * 86400)
+    return datetime(1970, 1, 1) + timedelta(seconds=seconds)
+
+# Oracle 함수 (연결마다 등록)
+ORACLE_FORMATS = [('YYYY', '%Y'), ('MM', '%m'), ('DD', '%d'), ('HH24', '%H'), ('MI', '%M'), ('SS', '%S')]
+
+def oracle_format(fmt):
+    for token, directive in ORACLE_FORMATS:
+        fmt = fmt.replace(token, directive)
+    return fmt
+
+def sql_sysdate():
+    return to_julian(datetime.now())
+
+def sql_trunc(value, unit=None):
+    if value is None:
+        return None
+    if unit is None and isinstance(value, (int, float)):
+        return math.floor(value + 0.5) - 0.5  # 율리우스일은 정오에 바뀌므로 자정은 .5
+    moment = from_julian(value) if isinstance(value, (int, float)) else datetime.fromisoformat(str(value))
+    if unit in (None, 'DD', 'DDD', 'J'):
+        moment = moment.replace(hour=0, minute=0, second=0)
+    elif unit in ('MM', 'MON', 'MONTH'):
+        moment = moment.replace(day=1, hour=0, minute=0, second=0)
+    elif unit in ('YYYY', 'YEAR', 'Y'):
+        moment = moment.replace(month=1, day=1, hour=0, minute=0, second=0)
+    else:
+        raise ValueError(f'지원하지 않는 TRUNC 단위: {unit}')
+    return to_julian(moment)
+
+def sql_to_char(value, fmt='YYYY-MM-DD HH24:MI:SS'):
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return from_julian(value).strftime(oracle_format(fmt))
+    return str(value)
+
+def sql_to_date(value, fmt='YYYY-MM-DD'):
+    if value is None:
+        return None
+    return to_julian(datetime.strptime(str(value), oracle_format(fmt)))
+
+def sql_numtodsinterval(value, unit):
+    seconds = {'DAY': 86400, 'HOUR': 3600, 'MINUTE': 60, 'SECOND': 1}[unit.upper()]
+    return value * seconds / 86400
+
+SQL_FUNCTIONS = [
+    ('SYSDATE', 0, sql_sysdate),
+    ('TRUNC', 1, sql_trunc),
+    ('TRUNC', 2, sql_trunc),
+    ('TO_CHAR', 1, sql_to_char),
+    ('TO_CHAR', 2, sql_to_char),
+    ('TO_DATE', 1, sql_to_date),
+    ('TO_DATE', 2, sql_to_date),
+    ('NUMTODSINTERVAL', 2, sql_numtodsinterval),
+]
+
+# Oracle SQL -> SQLite SQL
+REWRITES = [
+    (re.compile(r'\bSELECT\s+COLUMN_VALUE\s+FROM\s+TABLE\((:\w+)\)', re.I), r'SELECT value FROM json_each(\1)'),
+    (re.compile(r'\bFETCH\s+FIRST\s+(:\w+|\d+)\s+ROWS\s+ONLY', re.I), r'LIMIT \1'),
+    (re.compile(r'\bWHERE\s+ROWNUM\s*<=\s*(:\w+|\d+)', re.I), r'LIMIT \1'),
+    (re.compile(r'\bWHERE\s+ROWNUM\s*=\s*1\b', re.I), 'LIMIT 1'),
+    (re.compile(r'\bFROM\s+DUAL\b', re.I), ''),
+    (re.compile(r'\bSYS(?:DATE|TIMESTAMP)\b(?!\s*\()', re.I), 'SYSDATE()'),
+    (re.compile(r'\bDBMS_RANDOM\.VALUE\b', re.I), 'RANDOM()'),
+    (re.compile(r'\bNVL\(', re.I), 'IFNULL('),
+    (re.compile(r'\bSALE_SEQ\.NEXTVAL\b', re.I), 'NULL'),
+    (re.compile(r'\bFOR\s+UPDATE\s*$', re.I), ''),
+    (re.compile(r"(?<![\w':]):(\d+)\b"), r'?\1'),
+]
+RETURNING_INTO = re.compile(r'\bRETURNING\s+(.+?)\s+INTO\s+(.+?)\s*$', re.I | re.S)
+MERGE_TARGET = re.compile(r'^\s*MERGE\s+INTO\s+(\w+)', re.I)
+PLSQL_ASSIGN = re.compile(r'^:(\w+)\s*:=\s*SQL%ROWCOUNT$', re.I)
+
+class Statement:
+    def __init__(self, kind, sql='', returning=None, steps=None):
+        self.kind = kind  # sql | noop | plsql
+        self.sql = sql
+        self.returning = returning  # RETURNING ... INTO 의 출력 바인드 이름 목록
+        self.steps = steps  # PL/SQL 블록의 문장 목록
+
+def translate_sql(sql):
+    text = sql.strip().rstrip(';').strip()
+    if re.match(r'^BEGIN\b', text, re.I):
+        # 단순 PL/SQL 블록: 문장 나열, :var := SQL%ROWCOUNT, COMMIT 만 지원
+        body = re.sub(r'^BEGIN\b|\bEND$', '', text, flags=re.I).strip()
+        steps = [step.strip() for step in body.split(';') if step.strip()]
+        return Statement('plsql', steps=[
+            step if PLSQL_ASSIGN.match(step) or step.upper() == 'COMMIT' else translate_sql(step)
+            for step in steps
+        ])
+    if re.match(r'^LOCK\s+TABLE\b', text, re.I):
+        return Statement('noop')  # SQLite 는 쓰기 트랜잭션이 하나뿐이라 테이블 잠금이 필요 없음
+    merge = MERGE_TARGET.match(text)
+    if merge:
+        table = merge.group(1).upper()
+        if table not in MERGE_UPSERTS:
+            raise NotSupportedError(f'SQLite 백엔드에 {table} 용 MERGE 변환이 없습니다.')
+        text = MERGE_UPSERTS[table]
+    returning = None
+    match = RETURNING_INTO.search(text)
+    if match:
+        text = text[:match.start()] + f'RETURNING {match.group(1)}'
+        returning = [bind.strip().lstrip(':') for bind in match.group(2).split(',')]
+    for pattern, replacement in REWRITES:
+        text = pattern.sub(replacement, text)
+    return Statement('sql', text, returning)
+
+class Collection(list):
+    # SYS.ODCIVARCHAR2LIST 등 컬렉션 바인드 (json_each 로 펼침)
+    pass
+
+class CollectionType:
+    def __init__(self, name):
+        self.name = name
+
+    def newobject(self, values=()):
+        return Collection(values)
+
+class Var:
+    # cursor.var(): RETURNING INTO / PL/SQL 출력 변수 (배열 DML 이면 행마다 값 목록)
+    def __init__(self, type_, arraysize=1):
+        self.type = type_
+        self.values = [None] * arraysize
+
+    def setvalue(self, pos, value):
+        if pos >= len(self.values):
+            self.values.extend([None] * (pos + 1 - len(self.values)))
+        self.values[pos] = value
+
+    def getvalue(self, pos=0):
+        return self.values[pos]
+
+class BatchError:
+    def __init__(self, offset, error):
+        self.offset = offset
+        self.message = str(error)
+        self.code = 0
+        self.full_code = type(error).__name__
+
+def bind_value(value):
+    if isinstance(value, (datetime, date)):
+        return to_julian(value)
+    if isinstance(value, Collection):
+        return json.dumps(list(value), ensure_ascii=False)
+    return value
+
+def bind_params(params):
+    if params is None:
+        return ()
+    if isinstance(params, dict):
+        return {name: bind_value(value) for name, value in params.items() if not isinstance(value, Var)}
+    return [bind_value(value) for value in params]
+
+def result_converters(description):
+    # 컬럼별 값 변환: 날짜 컬럼은 datetime, 정수로 떨어지는 실수는 int (Oracle NUMBER 와 같게)
+    converters = []
+    for column in description or ():
+        match = DATE_LABEL.match(column[0])
+        is_date = bool(match) and match.group(1).upper() in DATE_COLUMNS and not column[0].upper().startswith('TO_CHAR')
+        converters.append(convert_date if is_date else convert_number)
+    return converters
+
+def convert_date(value):
+    return from_julian(value) if isinstance(value, (int, float)) else value
+
+def convert_number(value):
+    if isinstance(value, float) and value.is_integer() and abs(value) < 2 ** 53:
+        return int(value)
+    return value
+
+class Cursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self._cursor = connection._conn.cursor()
+        self.arraysize = 100
+        self.prefetchrows = 2
+        self.rowcount = 0
+        self.description = None
+        self._converters = []
+        self._inputsizes = ((), {})
+        self._batcherrors = []
+        self._rowcounts = []
+        self._rows = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __iter__(self):
+        while True:
+            rows = self.fetchmany()
+            if not rows:
+                return
+            yield from rows
+
+    def close(self):
+        self._cursor.close()
+
+    def var(self, type_, arraysize=1, **kwargs):
+        return Var(type_, arraysize)
+
+    def setinputsizes(self, *args, **kwargs):
+        self._inputsizes = (args, kwargs)
+
+    def getbatcherrors(self):
+        return self._batcherrors
+
+    def getarraydmlrowcounts(self):
+        return self._rowcounts
+
+    def _out_vars(self, statement, params):
+        # RETURNING INTO 의 바인드 이름 -> 출력 변수 (setinputsizes 또는 바인드 값으로 받은 Var)
+        args, kwargs = self._inputsizes
+        out = []
+        for name in statement.returning:
+            if name.isdigit():
+                out.append(args[int(name) - 1] if int(name) <= len(args) else None)
+            else:
+                out.append(kwargs.get(name) or (params.get(name) if isinstance(params, dict) else None))
+        return out
+
+    def _run(self, statement, params, row_index=0):
+        self._cursor.execute(statement.sql, bind_params(params))
+        self.description = self._cursor.description
+        self._converters = result_converters(self.description)
+        if statement.returning:
+            rows = [self._convert(row) for row in self._cursor.fetchall()]
+            for position, var in enumerate(self._out_vars(statement, params)):
+                if var is not None:
+                    var.setvalue(row_index, [row[position] for row in rows])
+            self.description = None
+            return len(rows)
+        return self._cursor.rowcount
+
+    def _run_plsql(self, statement, params):
+        rowcount = 0
+        for step in statement.steps:
+            if isinstance(step, Statement):
+                if step.kind == 'sql':
+                    rowcount = self._run(step, params)
+            elif step.upper() == 'COMMIT':
+                self.connection.commit()
+            else:
+                params[PLSQL_ASSIGN.match(step).group(1)].setvalue(0, rowcount)
+
+    def _convert(self, row):
+        return tuple(convert(value) for convert, value in zip(self._converters, row))
+
+    def execute(self, sql, parameters=None, **kwargs):
+        params = parameters if parameters is not None else (kwargs or None)
+        statement = self.connection.statement(sql)
+        self._rows = None
+        if statement.kind == 'noop':
+            self.description = None
+            self.rowcount = 0
+        elif statement.kind == 'plsql':
+            self._run_plsql(statement, params or {})
+            self.description = None
+        else:
+            self.rowcount = self._run(statement, params)
+        return self if self.description else None
+
+    def executemany(self, sql, parameters, batcherrors=False, arraydmlrowcounts=False, **kwargs):
+        statement = self.connection.statement(sql)
+        self._batcherrors = []
+        self._rowcounts = []
+        rows = list(parameters)
+        if statement.kind == 'noop':
+            return
+        if not (batcherrors or arraydmlrowcounts or statement.returning):
+            self._cursor.executemany(statement.sql, [bind_params(row) for row in rows])
+            self.rowcount = self._cursor.rowcount
+            return
+        # 행별 결과가 필요하면 한 행씩 실행 (batcherrors: 실패한 행은 건너뛰고 기록)
+        total = 0
+        for index, row in enumerate(rows):
+            try:
+                count = self._run(statement, row, index)
+            except sqlite3.Error as e:
+                if not batcherrors:
+                    raise
+                self._batcherrors.append(BatchError(index, e))
+                count = 0
+            self._rowcounts.append(count)
+            total += count
+        self.rowcount = total
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        return self._convert(row) if row is not None else None
+
+    def fetchmany(self, size=None):
+        return [self._convert(row) for row in self._cursor.fetchmany(size or self.arraysize)]
+
+    def fetchall(self):
+        return [self._convert(row) for row in self._cursor.fetchall()]
+
+class Connection:
+    def __init__(self, pool, path):
+        self.pool = pool
+        self._conn = sqlite3.connect(path, timeout=pool.busy_timeout, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        for name, count, func in SQL_FUNCTIONS:
+            self._conn.create_function(name, count, func, deterministic=name != 'SYSDATE')
+        for ddl in TEMP_DDL:
+            self._conn.execute(ddl)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def statement(self, sql):
+        return self.pool.statement(sql)
+
+    def cursor(self):
+        return Cursor(self)
+
+    def gettype(self, name):
+        return CollectionType(name)
+
+    def commit(self):
+        for table in ON_COMMIT_DELETE:
+            self._conn.execute(f'DELETE FROM {table}')
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        # 풀로 반환 (끝나지 않은 트랜잭션은 Oracle 풀처럼 롤백)
+        self.rollback()
+        self.pool.release(self)
+
+    def fetch_df_batches(self, statement, parameters=None, size=None):
+        # python-oracledb 의 fetch_df_batches 대신 size 행씩 Arrow 테이블로 반환
+        import pyarrow
+        cursor = self.cursor()
+        try:
+            cursor.execute(statement, parameters)
+            names = [column[0] for column in cursor.description]
+            # 값이 모두 NULL 인 배치에서도 날짜 컬럼 타입이 유지되도록 타입을 지정
+            types = [pyarrow.timestamp('us') if convert is convert_date else None for convert in cursor._converters]
+            while True:
+                rows = cursor.fetchmany(size or 10000)
+                if not rows:
+                    break
+                yield pyarrow.table({
+                    name: pyarrow.array(values, type=type_ if all(value is None for value in values) else None)
+                    for name, type_, values in zip(names, types, zip(*rows))
+                })
+        finally:
+            cursor.close()
+
+class Pool:
+    # python-oracledb 풀과 같은 속성(opened, busy, ...)을 가진 SQLite 연결 풀
+    def __init__(self, path, min=1, max=4, increment=1, stmtcachesize=STATEMENT_CACHE_SIZE, wait_timeout=5000, busy_timeout=30):
+        self.path = path
+        self.min = min
+        self.max = max
+        self.increment = increment
+        self.stmtcachesize = stmtcachesize
+        self.wait_timeout = wait_timeout
+        self.busy_timeout = busy_timeout
+        self.opened = 0
+        self.busy = 0
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._statements = OrderedDict()
+        conn = sqlite3.connect(path)
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            for ddl in SCHEMA_DDL:
+                conn.execute(ddl)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def statement(self, sql):
+        with self._lock:
+            statement = self._statements.get(sql)
+            if statement is not None:
+                self._statements.move_to_end(sql)
+                return statement
+        statement = translate_sql(sql)
+        with self._lock:
+            self._statements[sql] = statement
+            while len(self._statements) > self.stmtcachesize:
+                self._statements.popitem(last=False)
+        return statement
+
+    def acquire(self):
+        with self._lock:
+            if self._idle.empty() and self.opened < self.max:
+                self.opened += 1
+                self.busy += 1
+                create = True
+            else:
+                create = False
+        if create:
+            try:
+                return Connection(self, self.path)
+            except Exception:
+                with self._lock:
+                    self.opened -= 1
+                    self.busy -= 1
+                raise
+        try:
+            conn = self._idle.get(timeout=self.wait_timeout / 1000)
+        except queue.Empty:
+            raise PoolTimeoutError(f'{self.wait_timeout}ms 안에 SQLite 연결을 얻지 못했습니다.')
+        with self._lock:
+            self.busy += 1
+        return conn
+
+    def release(self, conn):
+        with self._lock:
+            self.busy -= 1
+        self._idle.put(conn)
+
+    def close(self, force=False):
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn._conn.close()
+            with self._lock:
+                self.opened -= 1
+
+def create_pool(path, min=1, max=4, increment=1, stmtcachesize=STATEMENT_CACHE_SIZE, wait_timeout=5000, **kwargs):
+    return Pool(path, min=min, max=max, increment=increment, stmtcachesize=stmtcachesize, wait_timeout=wait_timeout)
@@ -0,0 +1,70 @@
+# 저장소 루트의 app.py / blueprints 를 불러올 수 있게 경로 추가
+# DB 동작 테스트는 Oracle 없이 sqlite_backend 로 실행 (app 을 불러오기 전에 환경 변수 설정)
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TEST_DIR = tempfile.mkdtemp(prefix='smart_store_test_')
+os.environ['DB_BACKEND'] = 'sqlite'
+os.environ['SQLITE_PATH'] = os.path.join(TEST_DIR, 'smart_store.db')
+os.environ['SCHEDULER_ENABLED'] = '0'
+os.environ.setdefault('SCHEDULER_LOCK_DIR', os.path.join(TEST_DIR, 'locks'))
+os.environ.setdefault('RESTOCK_EXPORT_DIR', os.path.join(TEST_DIR, 'exports'))
+os.environ.setdefault('FORECAST_MODEL_DIR', os.path.join(TEST_DIR, 'models'))
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    # 테스트마다 빈 SQLite DB 와 빈 재고 스냅샷으로 시작하는 app 모듈
+    import app
+    app.close_db_pool()
+    app.schema_ready_stores.clear()
+    monkeypatch.setitem(app.STORES[app.DEFAULT_STORE_ID], 'sqlite_path', str(tmp_path / 'store.db'))
+    monkeypatch.setattr(app, 'SCHEDULER_LOCK_DIR', str(tmp_path / 'locks'))
+    monkeypatch.setattr(app, 'inventory_states', app.StoreLocal(app.new_inventory_state))
+    app.ensure_schema()
+    yield app
+    app.close_db_pool()
+    app.schema_ready_stores.clear()
+
+
+@pytest.fixture
+def client(store):
+    return store.create_app({'SCHEDULER_ENABLED': False}).test_client()
+
+
+@pytest.fixture
+def add_products(store):
+    # rows: (BARCODE, PRODUCT_NAME, EXPIRATION_DATE, QUANTITY, PRICE)
+    def add(rows):
+        conn = store.get_db_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.executemany(
+                "INSERT INTO PRODUCTS (BARCODE, PRODUCT_NAME, EXPIRATION_DATE, QUANTITY, PRICE) VALUES (:1, :2, :3, :4, :5)",
+                rows
+            )
+            conn.commit()
+        finally:
+            cursor.close()
+            conn.close()
+        store.invalidate_inventory()
+    return add
+
+
+@pytest.fixture
+def query(store):
+    def run(sql, params=None):
+        conn = store.get_db_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute(sql, params or {})
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+            conn.close()
+    return run
@@ -0,0 +1,52 @@
+# 장바구니 결제: 한 줄이라도 재고가 모자라면 장바구니 전체를 취소
+from datetime import datetime, timedelta
+
+import pytest
+
+
+@pytest.fixture
+def products(add_products):
+    expiration = datetime.now() + timedelta(days=30)
+    add_products([
+        ('8800000000011', 'milk', expiration, 5, 1000),
+        ('8800000000028', 'bread', expiration, 1, 2000)
+    ])
+
+
+def stock(query):
+    return dict(query("SELECT BARCODE, QUANTITY FROM PRODUCTS"))
+
+
+def test_checkout_rejects_oversell_and_rolls_back_whole_cart(client, query, products):
+    response = client.post('/api/checkout', json={'items': [
+        {'barcode': '8800000000011', 'quantity': 2},
+        {'barcode': '8800000000028', 'quantity': 3}
+    ]})
+
+    assert response.status_code == 409
+    assert [(item['barcode'], item['available']) for item in response.get_json()['rejected']] == [('8800000000028', 1)]
+    assert stock(query) == {'8800000000011': 5, '8800000000028': 1}
+    assert query("SELECT COUNT(*) FROM SALE") == [(0,)]
+
+
+def test_checkout_rejects_unknown_barcode(client, query, products):
+    response = client.post('/api/checkout', json={'items': [
+        {'barcode': '8800000000011', 'quantity': 1},
+        {'barcode': '8809999999999', 'quantity': 1}
+    ]})
+
+    assert response.status_code == 409
+    assert stock(query)['8800000000011'] == 5
+    assert query("SELECT COUNT(*) FROM SALE") == [(0,)]
+
+
+def test_checkout_sells_every_line(client, query, products):
+    response = client.post('/api/checkout', json={'items': [
+        {'barcode': '8800000000011', 'quantity': 2},
+        {'barcode': '8800000000028', 'quantity': 1}
+    ]})
+
+    assert response.status_code == 200
+    assert response.get_json()['total'] == 2 * 1000 + 2000
+    assert stock(query) == {'8800000000011': 3, '8800000000028': 0}
+    assert query("SELECT BARCODE, QUANTITY FROM SALE ORDER BY BARCODE") == [('8800000000011', 2), ('8800000000028', 1)]
@@ -0,0 +1,44 @@
+# 폐기 처리: 바코드별 결과, 폐기 이력 보관, 야간 작업은 만료 상품만
+from datetime import datetime, timedelta
+
+import pytest
+
+
+@pytest.fixture
+def products(add_products):
+    now = datetime.now()
+    add_products([
+        ('8800000000011', 'expired', now - timedelta(days=1), 5, 1000),
+        ('8800000000028', 'no stock', now + timedelta(days=5), 0, 2000),
+        ('8800000000035', 'fresh', now + timedelta(days=5), 3, 3000)
+    ])
+
+
+def test_discard_barcodes_reports_each_barcode(store, query, products):
+    sweep_id, results = store.discard_barcodes(['8800000000035', '8809999999999', '8800000000035'])
+
+    assert results == [
+        {'barcode': '8800000000035', 'status': 'discarded', 'count': 1},
+        {'barcode': '8809999999999', 'status': 'not_found', 'count': 0}
+    ]
+    assert query("SELECT BARCODE, REASON, QUANTITY FROM DISCARD_HISTORY WHERE SWEEP_ID = :1", [sweep_id]) == [
+        ('8800000000035', 'manual', 3)
+    ]
+    assert [row[0] for row in store.get_inventory_products()] == ['8800000000011', '8800000000028']
+
+
+def test_scheduled_sweep_keeps_out_of_stock_products(store, query, products):
+    store.scheduled_expiry_sweep()
+
+    assert query("SELECT BARCODE, REASON FROM DISCARD_HISTORY") == [('8800000000011', 'expired')]
+    assert [row[0] for row in store.get_expiry_rows('restock')] == ['8800000000028']
+
+
+def test_on_demand_sweep_archives_expired_and_out_of_stock(client, query, products):
+    response = client.post('/api/expiry_sweep')
+
+    assert response.get_json()['deleted'] == 2
+    assert sorted(query("SELECT BARCODE, REASON FROM DISCARD_HISTORY")) == [
+        ('8800000000011', 'expired'), ('8800000000028', 'out_of_stock')
+    ]
+    assert query("SELECT BARCODE FROM PRODUCTS") == [('8800000000035',)]
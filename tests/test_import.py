@@ -0,0 +1,81 @@
+# 엑셀 일괄 입고: 행 검증 사유, 덩어리를 넘는 중복 바코드, 실패 시 아무것도 반영하지 않음
+import functools
+import io
+
+import pandas as pd
+from openpyxl import Workbook
+
+HEADER = ['barcode', 'name', 'expiration_date', 'quantity', 'price']
+
+
+def workbook_file(rows, header=HEADER):
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(header)
+    for row in rows:
+        sheet.append(row)
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    buffer.seek(0)
+    return buffer
+
+
+def upload(client, rows, header=HEADER):
+    return client.post('/api/upload_excel', data={'file': (workbook_file(rows, header), 'products.xlsx')},
+                       content_type='multipart/form-data')
+
+
+def test_prepare_import_chunk_rejection_reasons(store):
+    df = pd.DataFrame([
+        ['8800000000011', 'milk', '2030-01-01', 5, 1000],
+        [None, 'no barcode', '2030-01-01', 5, 1000],
+        ['8800000000028', None, '2030-01-01', 5, 1000],
+        ['8800000000035', 'bad date', '2030/01/01', 5, 1000],
+        ['8800000000042', 'fraction', '2030-01-01', 1.5, 1000],
+        ['8800000000059', 'bad price', '2030-01-01', 5, 'abc'],
+        ['8800000000066', 'first', '2030-01-01', 1, 1000],
+        ['8800000000066', 'last', '2030-01-01', 2, 1000]
+    ], columns=HEADER)
+
+    rows, row_numbers, rejected = store.prepare_import_chunk(df, 2)
+
+    assert {item['row']: item['error'] for item in rejected} == {
+        3: '바코드 없음',
+        4: '상품명 없음',
+        5: '유통기한 형식 오류',
+        6: '수량은 정수여야 함',
+        7: '가격 형식 오류',
+        8: '파일 내 중복 바코드 (마지막 행 반영)'
+    }
+    assert list(row_numbers) == [2, 9]
+    assert [row[:4] for row in rows] == [
+        ('8800000000011', 'milk', '2030-01-01', 5),
+        ('8800000000066', 'last', '2030-01-01', 2)
+    ]
+
+
+def test_upload_excel_keeps_last_row_across_chunks(store, client, query, monkeypatch):
+    monkeypatch.setattr(store, 'read_excel_chunks', functools.partial(store.read_excel_chunks, chunk_size=2))
+
+    response = upload(client, [
+        ['8800000000011', 'milk', '2030-01-01', 1, 1000],
+        ['8800000000028', 'bread', '2030-01-01', 3, 2000],
+        ['8800000000011', 'milk', '2030-02-01', 7, 1100]
+    ])
+
+    body = response.get_json()
+    assert response.status_code == 200
+    assert body['imported'] == 2
+    assert body['rejected'] == [{'row': 2, 'barcode': '8800000000011', 'error': '파일 내 중복 바코드 (마지막 행 반영)'}]
+    assert query("SELECT BARCODE, QUANTITY, PRICE FROM PRODUCTS ORDER BY BARCODE") == [
+        ('8800000000011', 7, 1100),
+        ('8800000000028', 3, 2000)
+    ]
+
+
+def test_upload_excel_missing_column_imports_nothing(client, query):
+    response = upload(client, [['8800000000011', 'milk', '2030-01-01', 1]], header=HEADER[:4])
+
+    assert response.status_code == 400
+    assert response.get_json()['imported'] == 0
+    assert query("SELECT COUNT(*) FROM PRODUCTS") == [(0,)]
@@ -0,0 +1,81 @@
+# 재고 스냅샷의 유통기한 구간 경계와 임박 할인 등급표
+from datetime import datetime, timedelta
+
+import pytest
+
+NOW = datetime(2026, 10, 18, 12, 0, 0)
+ALERT_END = NOW + timedelta(days=3)
+TICK = timedelta(microseconds=1)
+
+ROWS = [
+    ('A_EXPIRED', 'just expired', NOW - TICK, 5, 1000),
+    ('B_NOW', 'expires now', NOW, 5, 1000),
+    ('C_ALERT_END', 'alert end', ALERT_END, 5, 1000),
+    ('D_FRESH', 'after alert', ALERT_END + TICK, 5, 1000),
+    ('E_EMPTY_ALERT', 'no stock, alert window', NOW + timedelta(days=1), 0, 1000),
+    ('F_EMPTY_FRESH', 'no stock, fresh', NOW + timedelta(days=30), 0, 1000),
+    ('G_NEGATIVE', 'negative stock', NOW + timedelta(days=30), -1, 1000),
+    ('H_NO_DATE', 'no expiration', None, 0, 1000),
+    ('I_EXPIRED_EMPTY', 'expired, no stock', NOW - timedelta(days=1), 0, 1000)
+]
+
+
+@pytest.fixture
+def snapshot(store):
+    store.install_inventory_snapshot(store.get_inventory_version(), sorted(ROWS))
+    return store
+
+
+def barcodes(rows):
+    return [row[0] for row in rows]
+
+
+def test_alert_window_includes_now_and_end(snapshot):
+    assert barcodes(snapshot.select_expiry_rows('alert', NOW)) == ['B_NOW', 'C_ALERT_END']
+
+
+def test_expired_lists_past_rows_then_out_of_stock(snapshot):
+    assert barcodes(snapshot.select_expiry_rows('expired', NOW)) == [
+        'I_EXPIRED_EMPTY', 'A_EXPIRED', 'E_EMPTY_ALERT', 'F_EMPTY_FRESH', 'G_NEGATIVE', 'H_NO_DATE'
+    ]
+
+
+def test_restock_is_zero_stock_with_date_left(snapshot):
+    assert barcodes(snapshot.select_expiry_rows('restock', NOW)) == ['E_EMPTY_ALERT', 'F_EMPTY_FRESH']
+
+
+@pytest.mark.parametrize('kind, predicate', [
+    ('alert', 'is_alert_row'), ('expired', 'is_expired_row'), ('restock', 'is_restock_row')
+])
+def test_index_matches_row_predicates(snapshot, kind, predicate):
+    # 인덱스 조회 결과가 행 단위 조건과 같은 행을 고르는지 (경계 바로 앞뒤 시각 포함)
+    for now in (NOW - TICK, NOW, NOW + TICK, ALERT_END - timedelta(days=3), NOW + timedelta(days=2)):
+        expected = {row[0] for row in ROWS if getattr(snapshot, predicate)(row, now)}
+        assert set(barcodes(snapshot.select_expiry_rows(kind, now))) == expected
+
+
+def test_apply_discounts_uses_tier_table(store):
+    today = NOW.date()
+    products = store.apply_discounts([
+        {'price': 1000, 'expiration_date': NOW + timedelta(days=days_left)} for days_left in range(-1, 5)
+    ], today=today)
+
+    assert [(product['price'], product['discount']) for product in products] == [
+        (1000, '없음'), (1000, '없음'), (700, '30%'), (800, '20%'), (900, '10%'), (1000, '없음')
+    ]
+
+
+def test_apply_discounts_rounds_half_up(store, monkeypatch):
+    monkeypatch.setattr(store, 'DISCOUNT_TIERS', {1: 25})
+    products = store.apply_discounts([{'price': 1002, 'expiration_date': NOW + timedelta(days=1)}], today=NOW.date())
+    assert products[0]['price'] == 752
+
+
+@pytest.mark.parametrize('value', ['3-10', 'a:10', '3:0', '3:100', '-1:10'])
+def test_bad_discount_tiers_fall_back_to_default(store, monkeypatch, value):
+    monkeypatch.setenv('DISCOUNT_TIERS', value)
+    assert store.load_discount_tiers() == {3: 10, 2: 20, 1: 30}
+
+
+def test_discount_tiers_ignore_blank_items(store):
+    assert store.parse_discount_tiers('2:25, 1:40,') == {2: 25, 1: 40}
@@ -0,0 +1,51 @@
+# 스케줄러 리스: 같은 작업은 한 곳에서만 실행되고, 실행 결과(성공/오류)가 기록됨
+import pytest
+
+
+def outcome():
+    return {'last_finished': 0.0, 'last_duration_ms': 0.0, 'last_outcome': 'success', 'last_error': None}
+
+
+def run_file_lease(store, name, min_gap, func):
+    return store.run_with_file_lease(name, min_gap, func)
+
+
+def run_db_lease(store, name, min_gap, func):
+    return store.run_with_db_lease(name, min_gap, 3600, func)
+
+
+@pytest.mark.parametrize('run_lease', [run_file_lease, run_db_lease])
+def test_lease_is_exclusive_while_running(store, run_lease):
+    nested = []
+
+    def job():
+        # 실행 중에 다른 워커가 같은 작업을 시도하면 건너뜀
+        nested.append(run_lease(store, 'job', 0, outcome))
+        return outcome()
+
+    assert run_lease(store, 'job', 0, job) is not None
+    assert nested == [None]
+
+
+@pytest.mark.parametrize('run_lease', [run_file_lease, run_db_lease])
+def test_lease_skips_run_within_min_gap(store, run_lease):
+    calls = []
+
+    def job():
+        calls.append(1)
+        return outcome()
+
+    assert run_lease(store, 'job', 3600, job) is not None
+    assert run_lease(store, 'job', 3600, job) is None
+    assert len(calls) == 1
+
+
+def test_leader_job_records_failed_run(store):
+    def failing_job():
+        raise RuntimeError('boom')
+
+    store.leader_job(failing_job, min_gap=0)()
+
+    state = store.read_scheduler_state('failing_job')
+    assert state['last_outcome'] == 'error'
+    assert state['last_error'] == 'boom'
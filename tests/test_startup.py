@@ -0,0 +1,14 @@
+# 시작 시간 예산: 새 인터프리터에서 import app + create_app() 이 예산 안에 끝나고 무거운 모듈을 미리 불러오지 않아야 함
+# (예산과 모듈 목록은 app.py 의 STARTUP_BUDGET_MS / STARTUP_LAZY_MODULES 를 그대로 사용)
+import app
+
+
+def test_create_app_within_budget_without_heavy_imports():
+    result = app.measure_startup()
+    assert not result['eager_modules'], f"create_app() 가 무거운 모듈을 미리 불러옴: {result['eager_modules']}"
+    assert result['ok'], f"시작 시간 {result['startup_ms']}ms > 예산 {result['budget_ms']}ms"
+
+def test_create_app_registers_route_blueprints_without_scheduler():
+    flask_app = app.create_app({'SCHEDULER_ENABLED': False})
+    assert sorted(flask_app.blueprints) == ['barcodes', 'inventory', 'ops', 'restock', 'sales']
+    assert app.scheduler is None